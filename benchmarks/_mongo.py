@@ -0,0 +1,99 @@
+"""
+Utilidades comunes de los benchmarks: arranque de Django, base de datos de
+pruebas (mongomock o un Mongo real) y conteo de round trips.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pymonproject.settings')
+
+import django
+
+django.setup()
+
+from pymongo import DeleteMany, DeleteOne, InsertOne, UpdateMany, UpdateOne, ReplaceOne
+
+
+class BulkResult:
+    def __init__(self):
+        self.inserted_count = 0
+        self.upserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.deleted_count = 0
+
+
+class MongomockCollection:
+    """
+    mongomock no entiende las operaciones bulk de pymongo >= 4.9, así que
+    bulk_write se traduce aquí a las operaciones sueltas equivalentes.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, requests, ordered=True):
+        result = BulkResult()
+        for op in requests:
+            if isinstance(op, InsertOne):
+                self._collection.insert_one(op._doc)
+                result.inserted_count += 1
+                continue
+            if isinstance(op, (DeleteOne, DeleteMany)):
+                delete = self._collection.delete_one if isinstance(op, DeleteOne) else self._collection.delete_many
+                result.deleted_count += delete(op._filter).deleted_count
+                continue
+            if isinstance(op, ReplaceOne):
+                r = self._collection.replace_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, UpdateOne):
+                r = self._collection.update_one(op._filter, op._doc, upsert=op._upsert)
+            elif isinstance(op, UpdateMany):
+                r = self._collection.update_many(op._filter, op._doc, upsert=op._upsert)
+            else:
+                raise TypeError(f'Operación no soportada: {op!r}')
+            result.matched_count += r.matched_count
+            result.modified_count += r.modified_count
+            result.upserted_count += 1 if r.upserted_id is not None else 0
+        return result
+
+
+class MongomockDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        return getattr(self._database, name)
+
+    def __getitem__(self, name):
+        return MongomockCollection(self._database[name])
+
+
+def get_database(uri=None, name='bench_rankingsafa'):
+    """Base de datos de benchmark: mongomock por defecto o un Mongo real con ``uri``."""
+    if uri:
+        import pymongo
+        return pymongo.MongoClient(uri)[name]
+    import mongomock
+    return MongomockDatabase(mongomock.MongoClient()[name])
+
+
+class CountingCollection:
+    """Proxy de una colección que cuenta las llamadas (round trips)."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.round_trips = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def wrapper(*args, **kwargs):
+            self.round_trips += 1
+            return attr(*args, **kwargs)
+        return wrapper
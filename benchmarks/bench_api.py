@@ -0,0 +1,88 @@
+"""
+Benchmark de la API JSON: serializar una página de juegos construyendo un
+Videojuego por fila (model_to_dict + DjangoJSONEncoder) frente a escribir
+los documentos de Mongo directamente (rankingsafa.api), y tiempo hasta el
+primer trozo de la respuesta en streaming frente a la respuesta completa.
+
+    python benchmarks/bench_api.py --games 20000 --page 1000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime
+
+from _mongo import get_database
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.forms.models import model_to_dict
+
+from rankingsafa.api import GAMES, stream_page
+from rankingsafa.catalog import game_from_doc, short_description
+
+WORDS = ['aventura', 'mundo', 'abierto', 'combate', 'historia', 'misiones', 'mazmorras', 'secretos']
+
+
+def generate(n_games):
+    rnd = random.Random(n_games)
+    for i in range(1, n_games + 1):
+        desc = ' '.join(rnd.choices(WORDS, k=60))
+        yield {
+            'code': i, 'name': f'Juego {i}', 'desc': desc, 'short_desc': short_description(desc),
+            'category': [rnd.randint(1, 20)], 'image': f'https://img.example/{i}.jpg',
+            'developer': 'Estudio', 'publisher': 'Editora', 'platforms': ['PC', 'PlayStation 5'],
+            'release_date': datetime(2020, 1, 1 + i % 28), 'price': 29.99, 'age_rating': '16',
+            'duration': 40, 'multiplayer': False, 'reviews_count': 3, 'rating_sum': 12, 'rating_hist': {'4': 3},
+        }
+
+
+def with_models(docs, fields):
+    rows = [model_to_dict(game_from_doc(doc), fields=fields) for doc in docs]
+    return json.dumps({'items': rows}, cls=DjangoJSONEncoder)
+
+
+def without_models(docs, fields):
+    return '{"items":[' + ','.join(GAMES.encode(doc, fields) for doc in docs) + ']}'
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=20000)
+    parser.add_argument('--page', type=int, default=1000, help='Filas por página')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    docs = list(generate(args.games))
+    page = docs[:args.page]
+    for label, fields in (('campos por defecto', GAMES.default_fields), ('code,name', ('code', 'name'))):
+        models_ms = best_of(lambda: with_models(page, fields), args.repeat)
+        raw_ms = best_of(lambda: without_models(page, fields), args.repeat)
+        print(f'{args.page} filas, {label:<18}: modelos {models_ms:>7.1f} ms | documentos {raw_ms:>7.1f} ms '
+              f'| x{models_ms / raw_ms:.1f}')
+
+    database = get_database(args.uri)
+    database.drop_collection('videojuegos')
+    database['videojuegos'].insert_many(docs)
+    collection = database['videojuegos']
+    start = time.perf_counter()
+    chunks = stream_page(GAMES, collection, {}, GAMES.default_fields, size=args.page)
+    first = next(chunks)
+    first_ms = (time.perf_counter() - start) * 1000
+    rest = sum(len(chunk) for chunk in chunks)
+    total_ms = (time.perf_counter() - start) * 1000
+    print(f'streaming: primer trozo ({len(first):,} caracteres) en {first_ms:.1f} ms, '
+          f'página completa ({len(first) + rest:,}) en {total_ms:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
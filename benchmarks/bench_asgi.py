@@ -0,0 +1,149 @@
+"""
+Benchmark de la portada y el detalle de juego servidos con WSGI (vistas
+síncronas, un hilo por petición en curso) frente a ASGI (vistas async de
+rankingsafa.async_views, consultas concurrentes con el AsyncMongoClient),
+con la misma concurrencia: peticiones por segundo y p50/p99 por modo.
+
+Necesita un Mongo real (el cliente async de pymongo no funciona con
+mongomock): usa la conexión 'mongodb' de settings con la base de datos
+--db, que se vacía y se rellena. La caché de páginas se desactiva para
+medir las vistas. Cada modo corre en su propio proceso porque urls.py
+elige las vistas al importarse.
+
+    python benchmarks/bench_asgi.py --concurrency 32 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+MODES = ('wsgi', 'asgi')
+
+
+def configure(db, mode):
+    # Antes de django.setup(): urls.py lee ASYNC_VIEWS al importarse
+    os.environ['RANKINGSAFA_ASYNC_VIEWS'] = '1' if mode == 'asgi' else '0'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pymonproject.settings')
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from django.conf import settings
+    settings.DATABASES['mongodb']['NAME'] = db
+    settings.PAGE_CACHE_SIZE = 0
+    settings.ALLOWED_HOSTS = ['testserver']
+    import _mongo  # noqa: F401  (configura Django)
+
+
+def populate(n_games, n_reviews):
+    from rankingsafa.models import Categoria, Review, Videojuego
+    from rankingsafa.mongo import get_collection
+
+    rnd = random.Random(n_games)
+    for model in (Categoria, Videojuego, Review):
+        get_collection(model).delete_many({})
+    get_collection(Categoria).insert_many([{'code': c, 'name': f'Categoría {c}', 'desc': '', 'image': ''}
+                                           for c in range(1, 21)])
+    get_collection(Videojuego).insert_many([{
+        'code': i, 'name': f'Juego {i}', 'desc': 'Descripción ' * 20, 'short_desc': 'Descripción ' * 5,
+        'category': [rnd.randint(1, 20)], 'image': f'https://example.com/{i}.jpg', 'developer': 'Estudio',
+        'release_date': datetime(2020, 1, 1), 'platforms': ['PC'], 'price': 19.99,
+        'reviews_count': 0, 'rating_sum': 0, 'rating_hist': {},
+    } for i in range(1, n_games + 1)])
+    get_collection(Review).insert_many([{
+        'code': rnd.randint(1, n_games), 'serie': i, 'user': f'usuario{i % 500}',
+        'reviewDate': datetime(2024, rnd.randint(1, 12), rnd.randint(1, 28)), 'rating': rnd.randint(0, 5),
+        'comentary': 'Muy buen juego',
+    } for i in range(1, n_reviews + 1)])
+
+
+def paths(n_games, n_requests):
+    # Mitad portada, mitad detalle de juegos al azar
+    rnd = random.Random(n_requests)
+    return ['/inicio/' if i % 2 else f'/juego/{rnd.randint(1, n_games)}/' for i in range(n_requests)]
+
+
+def run_wsgi(urls, concurrency):
+    from django.test import Client
+
+    local = threading.local()
+
+    def fetch(url):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client()
+        start = time.perf_counter()
+        assert client.get(url).status_code == 200, url
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(fetch, urls))
+
+
+def run_asgi(urls, concurrency):
+    from django.test import AsyncClient
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(url):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(url)
+                assert response.status_code == 200, url
+                return time.perf_counter() - start
+
+        return await asyncio.gather(*(fetch(url) for url in urls))
+
+    return asyncio.run(main())
+
+
+def worker(args):
+    configure(args.db, args.mode)
+    run = run_asgi if args.mode == 'asgi' else run_wsgi
+    # Calentamiento: plantillas, conexiones y copia de las categorías
+    run(paths(args.games, args.concurrency * 2), args.concurrency)
+    urls = paths(args.games, args.requests)
+    start = time.perf_counter()
+    latencies = sorted(run(urls, args.concurrency))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'rps': len(urls) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--db', default='bench_rankingsafa')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return worker(args)
+
+    configure(args.db, 'wsgi')
+    populate(args.games, args.reviews)
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--games', str(args.games), '--requests', str(args.requests),
+             '--concurrency', str(args.concurrency), '--db', args.db],
+            check=True, stdout=subprocess.PIPE, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{mode}: {result['rps']:.0f} req/s, p50 {result['p50']:.1f} ms, p99 {result['p99']:.1f} ms "
+              f'(concurrencia {args.concurrency})')
+
+
+if __name__ == '__main__':
+    main()
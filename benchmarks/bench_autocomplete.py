@@ -0,0 +1,86 @@
+"""
+Benchmark del autocompletado: construcción del índice de prefijos, latencia
+(p50 y p99) de prefijos de distinta longitud y coste de aplicar altas y
+ediciones sueltas sin reconstruir.
+
+No necesita Mongo: los juegos se generan en memoria y se pasan directamente
+a PrefixIndex.
+
+    python benchmarks/bench_autocomplete.py --games 10000 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import _mongo  # noqa: F401  (configura Django)
+
+from rankingsafa.autocomplete import PrefixIndex
+
+WORDS = ('aventura acción mundo abierto combate historia leyenda dragón espada magia nave '
+         'espacio carreras coches fútbol terror zombis supervivencia ritmo sombra reino').split()
+PLATFORMS = ['PC', 'PS5', 'PS4', 'Xbox Series', 'Xbox One', 'Switch', 'iOS', 'Android']
+PREFIXES = ['a', 'es', 'dra', 'leye', 'estudio 12', 'sw', 'zzz']
+
+
+def generate(n_games, seed=0):
+    rnd = random.Random(seed or n_games)
+    for i in range(1, n_games + 1):
+        yield {
+            'code': i,
+            'name': ' '.join(rnd.choices(WORDS, k=rnd.randint(1, 4))).title() + f' {i}',
+            'developer': f'Estudio {rnd.randint(1, 2000)}',
+            'platforms': rnd.sample(PLATFORMS, rnd.randint(1, 3)),
+            'category': [rnd.randint(1, 20)],
+            'reviews_count': rnd.randint(0, 500),
+        }
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    for n in args.games:
+        start = time.perf_counter()
+        index = PrefixIndex(generate(n))
+        build = time.perf_counter() - start
+        keys, ids = index._main
+        print(f'{n} juegos: índice en {build:.1f}s, {len(keys)} claves, {(keys.nbytes + ids.nbytes) / 1e6:.1f} MB')
+
+        for prefix in PREFIXES:
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                found = index.suggest(prefix)
+                timings.append((time.perf_counter() - t0) * 1000)
+            p50, p99 = percentiles(timings)
+            count = sum(len(v) for v in found.values())
+            print(f'  {prefix!r:<14} {count:>3} sugerencias  p50 {p50:>6.3f} ms  p99 {p99:>6.3f} ms')
+
+        # Ediciones sueltas como las de juego_create/juego_update
+        edits = list(generate(args.repeat, seed=n + 1))
+        timings = []
+        for doc in edits:
+            doc['code'] = random.randint(1, n)
+            t0 = time.perf_counter()
+            index.upsert_game(doc)
+            timings.append((time.perf_counter() - t0) * 1000)
+        p50, p99 = percentiles(timings)
+        print(f'  edición incremental        p50 {p50:>6.3f} ms  p99 {p99:>6.3f} ms')
+        timings = []
+        for prefix in PREFIXES:
+            t0 = time.perf_counter()
+            index.suggest(prefix)
+            timings.append((time.perf_counter() - t0) * 1000)
+        print(f'  consultas con {len(index._extra)} claves pendientes: máx {max(timings):.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark de la exportación NDJSON: registros por segundo, tamaño del
+volcado comprimido y memoria máxima al escribirlo en streaming frente a
+cargar todas las filas y serializarlas de una vez. Al final importa el
+volcado dos veces sobre la misma base de datos: la primera solo añade las
+huellas (content_hash) y la segunda no debe cambiar nada.
+
+    python benchmarks/bench_export.py --games 2000 --reviews 10000
+"""
+import argparse
+import io
+import json
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from _mongo import get_database
+
+from rankingsafa.export import SECTIONS, export_chunks, iter_records
+from rankingsafa.importer import import_catalog_stream, report_totals
+
+
+def populate(database, n_games, n_reviews):
+    rnd = random.Random(n_games)
+    for name in SECTIONS:
+        database.drop_collection(name)
+    database['categorias'].insert_many([{'code': c, 'name': f'Categoría {c}', 'desc': '', 'image': ''}
+                                        for c in range(1, 21)])
+    database['videojuegos'].insert_many([{
+        'code': i, 'name': f'Juego {i}', 'desc': 'Descripción ' * 20, 'category': [rnd.randint(1, 20)],
+        'image': '', 'developer': 'Estudio', 'publisher': 'Editora', 'release_date': datetime(2020, 1, 1),
+        'platforms': ['PC'], 'price': 19.99, 'age_rating': '16', 'duration': 30, 'multiplayer': False,
+    } for i in range(1, n_games + 1)])
+    database['reviews'].insert_many([{
+        'code': rnd.randint(1, n_games), 'serie': i, 'user': f'usuario{i % 5000}',
+        'reviewDate': datetime(2024, rnd.randint(1, 12), rnd.randint(1, 28)), 'rating': rnd.randint(0, 5),
+        'comentary': 'Muy buen juego',
+    } for i in range(1, n_reviews + 1)])
+    database['rankings'].insert_many([{
+        'code': i, 'user': f'usuario{i}', 'category': rnd.randint(1, 20), 'rankDate': datetime(2024, 6, 1),
+        'rankingList': rnd.sample(range(1, n_games + 1), 10),
+    } for i in range(1, n_reviews // 10 + 1)])
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    database = get_database(args.uri)
+    populate(database, args.games, args.reviews)
+    collections = {name: database[name] for name in SECTIONS}
+
+    counts = {}
+    size, elapsed, peak = measure(lambda: sum(len(chunk) for chunk in export_chunks(
+        list(SECTIONS), counts=counts, collections=collections)))
+    total = sum(counts.values())
+    print(f'streaming: {total} registros en {elapsed:.1f}s ({total / elapsed:.0f}/s), '
+          f'{size / 1e6:.1f} MB gzip, pico {peak:.1f} MB')
+
+    _, elapsed, peak = measure(lambda: json.dumps([r for _, r in iter_records(list(SECTIONS), collections=collections)]))
+    print(f'todo en memoria: {elapsed:.1f}s, pico {peak:.1f} MB')
+
+    dump = b''.join(export_chunks(list(SECTIONS), collections=collections))
+    targets = {**collections, 'counters': database['counters'], 'import_seen': database['import_seen']}
+    for attempt in (1, 2):
+        report = import_catalog_stream(io.BytesIO(dump), collections=targets, name='volcado.ndjson.gz')
+        print(f'reimportación {attempt}:', report_totals(report))
+    assert report_totals(report)['unchanged'] == total
+
+
+if __name__ == '__main__':
+    main()
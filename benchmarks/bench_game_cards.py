@@ -0,0 +1,79 @@
+"""
+Benchmark de las tarjetas de juego: el bucle de la plantilla renderizando
+todas las tarjetas en cada petición frente a la caché de fragmentos de
+rankingsafa.cards, en frío (primera petición, rellena la caché) y en
+caliente.
+
+No necesita Mongo: los juegos se crean en memoria y los sellos de versión
+se pasan fijos.
+
+    python benchmarks/bench_game_cards.py --cards 1000 10000 50000
+"""
+import argparse
+import random
+import time
+
+import _mongo  # noqa: F401  (configura Django)
+
+from django.template import Template, Context
+from django.template.loader import get_template
+
+from rankingsafa.cache import LRUCache
+from rankingsafa.cards import CARD_TEMPLATES, render_cards
+from rankingsafa.models import Videojuego
+
+COLORS = ['is-primary', 'is-link', 'is-info', 'is-success', 'is-warning', 'is-danger', 'is-dark']
+
+
+def make_games(n):
+    rnd = random.Random(n)
+    games = []
+    for i in range(1, n + 1):
+        reviews = rnd.randint(0, 200)
+        juego = Videojuego(
+            code=i, name=f'Juego {i}', image=f'https://example.com/{i}.jpg',
+            short_desc='Descripción corta del juego ' * 3, category=[rnd.randint(1, 30)],
+            platforms=rnd.sample(['PC', 'PS5', 'Xbox', 'Switch', 'iOS'], 3), price=rnd.choice([0, 19.99, 59.99]),
+            reviews_count=reviews, rating_sum=reviews * rnd.randint(1, 5),
+        )
+        juego.cat_tags = [{'code': c, 'name': f'Categoría {c}', 'color': COLORS[c % len(COLORS)]}
+                          for c in juego.category]
+        games.append(juego)
+    return games
+
+
+def loop_template(style):
+    """El bucle que tenían las plantillas antes de la caché de fragmentos."""
+    source = get_template(CARD_TEMPLATES[style]).template.source
+    return Template('{% for juego in videojuegos %}' + source + '{% endfor %}')
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--style', choices=sorted(CARD_TEMPLATES), default='inicio')
+    args = parser.parse_args()
+
+    stamps = (1, 1)
+    print(f"{'tarjetas':>8} | {'bucle ms':>10} | {'frío ms':>10} | {'caliente ms':>11} | {'mejora':>7} | {'MB':>6}")
+    for n in args.cards:
+        games = make_games(n)
+        template = loop_template(args.style)
+        legacy, legacy_ms = timed(lambda: template.render(Context({'videojuegos': games})))
+
+        cache = LRUCache(f'bench_cards_{n}', n)
+        cold, cold_ms = timed(lambda: render_cards(games, args.style, cache, stamps))
+        warm, warm_ms = timed(lambda: render_cards(games, args.style, cache, stamps))
+        assert warm == cold == legacy, 'los fragmentos no coinciden con el bucle'
+        print(f'{n:>8} | {legacy_ms:>10.1f} | {cold_ms:>10.1f} | {warm_ms:>11.1f} | '
+              f'{legacy_ms / warm_ms:>6.0f}x | {len(warm) / 1e6:>6.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark de los filtros de games_list: el listado original (trae todo el
+catálogo dos veces y filtra en Python) frente a la consulta $in en Mongo y
+distinct('platforms'), y frente a lo que hace la vista (página por clave y
+recuentos de la barra lateral por índice), sin caché y con la caché de
+recuentos.
+Mide documentos transferidos y latencia con filtros selectivos y amplios
+según crece el catálogo.
+
+Por defecto usa mongomock, que no usa índices: los documentos transferidos
+son válidos pero la latencia solo es representativa con --uri contra un
+servidor real. Con --uri se crean los índices multikey y se muestra el plan
+ganador de cada filtro.
+
+    python benchmarks/bench_games_list.py --games 1000 10000 --uri mongodb://localhost
+"""
+import argparse
+import random
+import statistics
+import time
+
+from _mongo import get_database
+
+from rankingsafa.cache import LRUCache
+from rankingsafa.catalog import faceted_search, game_from_doc, game_query
+from rankingsafa.indexes import sync_indexes
+
+N_CATEGORIES = 50
+PLATFORMS = ['PC', 'PlayStation 5', 'Xbox Series X', 'Nintendo Switch', 'PlayStation 4', 'Xbox One',
+             'Nintendo 3DS', 'Stadia', 'Dreamcast', 'Game Boy']
+# Peso de cada plataforma al generar el catálogo: PC en casi todos, Game Boy en muy pocos
+WEIGHTS = [50, 30, 25, 25, 15, 10, 4, 2, 1, 1]
+
+FILTERS = {
+    'selectivo': ([7], ['Game Boy']),
+    'una categoría': ([7], []),
+    'amplio': (list(range(1, 26)), ['PC', 'PlayStation 5']),
+}
+
+
+def populate(database, n_games):
+    database.drop_collection('videojuegos')
+    rnd = random.Random(n_games)
+    database['videojuegos'].insert_many([
+        {
+            'code': i,
+            'name': f'Juego {i}',
+            'desc': 'Descripción del juego ' * 5,
+            'category': rnd.sample(range(1, N_CATEGORIES + 1), rnd.randint(1, 3)),
+            'platforms': sorted(set(rnd.choices(PLATFORMS, WEIGHTS, k=rnd.randint(1, 3)))),
+            'price': 19.99,
+        }
+        for i in range(1, n_games + 1)
+    ])
+
+
+def legacy(collection, categories, platforms):
+    games = [game_from_doc(d) for d in collection.find({})]
+    transferred = len(games)
+    if categories:
+        games = [g for g in games if any(c in (g.category or []) for c in categories)]
+    if platforms:
+        games = [g for g in games if any(p in (g.platforms or []) for p in platforms)]
+    all_platforms = set()
+    for g in (game_from_doc(d) for d in collection.find({})):
+        all_platforms.update(g.platforms or [])
+        transferred += 1
+    return len(games), transferred
+
+
+def db_side(collection, categories, platforms):
+    games = [game_from_doc(d) for d in collection.find(game_query(categories, platforms))]
+    sorted(collection.distinct('platforms'))
+    return len(games), len(games)
+
+
+def facets(collection, categories, platforms, page_size=48):
+    result = faceted_search(categories, platforms, page_size, collection=collection)
+    return result['total'], len(result['games'])
+
+
+def cached_facets(cache, collection, categories, platforms, page_size=48):
+    result = faceted_search(categories, platforms, page_size, collection=collection, cache=cache, stamp=0)
+    return result['total'], len(result['games'])
+
+
+def measure(run, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(timings)
+
+
+def winning_stage(collection, query):
+    plan = collection.find(query).explain()['queryPlanner']['winningPlan']
+    while 'inputStage' in plan:
+        plan = plan['inputStage']
+    return plan.get('stage', '?')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    database = get_database(args.uri)
+    print(f"{'juegos':>7} | {'filtro':<14} | {'modo':<7} | {'resultado':>9} | {'docs leídos':>11} | {'ms':>9}")
+    for n in args.games:
+        populate(database, n)
+        collection = database['videojuegos']
+        if args.uri:
+            sync_indexes(database, only=['videojuegos'])
+        cache = LRUCache('bench_facets', 64)
+        for label, (categories, platforms) in FILTERS.items():
+            modes = (
+                ('python', legacy),
+                ('mongo', db_side),
+                ('facet', facets),
+                ('caché', lambda *a: cached_facets(cache, *a)),
+            )
+            for mode, func in modes:
+                (found, read), ms = measure(lambda: func(collection, categories, platforms), args.repeat)
+                print(f'{n:>7} | {label:<14} | {mode:<7} | {found:>9} | {read:>11} | {ms:>9.2f}')
+            if args.uri:
+                print(f"{'':>7}   plan: {winning_stage(collection, game_query(categories, platforms))}")
+
+
+if __name__ == '__main__':
+    main()
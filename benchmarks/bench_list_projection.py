@@ -0,0 +1,62 @@
+"""
+Benchmark de la proyección de los listados: bytes BSON que salen de Mongo
+por página con documentos completos frente a los campos de LIST_FIELDS de
+cada listado (con short_desc en lugar de la descripción completa).
+
+    python benchmarks/bench_list_projection.py --games 2000 --desc-words 150
+"""
+import argparse
+import random
+
+import bson
+
+from _mongo import get_database
+
+from rankingsafa.catalog import LIST_FIELDS, list_projection, short_description
+
+PAGE_SIZES = {'inicio': 24, 'games_list': 48, 'categoria_games': 48, 'juego_list': 50}
+WORDS = ['aventura', 'mundo', 'abierto', 'combate', 'historia', 'personajes', 'misiones', 'exploración',
+         'jefes', 'mazmorras', 'ciudad', 'secretos', 'cooperativo', 'estrategia', 'recursos']
+
+
+def populate(database, n_games, desc_words):
+    database.drop_collection('videojuegos')
+    rnd = random.Random(n_games)
+    docs = []
+    for i in range(1, n_games + 1):
+        desc = ' '.join(rnd.choices(WORDS, k=desc_words))
+        docs.append({
+            'code': i, 'name': f'Juego {i}', 'desc': desc, 'short_desc': short_description(desc),
+            'category': [rnd.randint(1, 20)], 'image': f'https://img.example/{i}.jpg',
+            'developer': 'Estudio', 'publisher': 'Editora', 'platforms': ['PC', 'PlayStation 5'],
+            'price': 29.99, 'age_rating': '16', 'duration': 40, 'multiplayer': False,
+            'content_hash': 'x' * 40, 'reviews_count': 3, 'rating_sum': 12, 'rating_hist': {'4': 3},
+        })
+    database['videojuegos'].insert_many(docs)
+
+
+def page_bytes(collection, projection, size):
+    docs = list(collection.find({}, projection).sort('code', 1).limit(size))
+    return sum(len(bson.encode(d)) for d in docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--desc-words', type=int, default=150, help='Palabras de cada descripción')
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    database = get_database(args.uri)
+    populate(database, args.games, args.desc_words)
+    collection = database['videojuegos']
+    print(f"{'listado':<16} | {'campos':>6} | {'bytes completos':>15} | {'bytes proyección':>16} | {'ahorro':>7}")
+    for listing, size in PAGE_SIZES.items():
+        full = page_bytes(collection, {'_id': 0}, size)
+        projected = page_bytes(collection, list_projection(listing), size)
+        print(f'{listing:<16} | {len(LIST_FIELDS[listing]):>6} | {full:>15,} | {projected:>16,} | '
+              f'{(1 - projected / full) * 100:>6.1f}%')
+
+
+if __name__ == '__main__':
+    main()
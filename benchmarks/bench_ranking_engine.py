@@ -0,0 +1,66 @@
+"""
+Benchmark del motor vectorizado de rankings (rankingsafa.ranking_engine)
+frente al bucle en Python de rankingsafa.scores.compute_scores.
+
+No necesita Mongo: genera tier lists sintéticas de una categoría. Cada
+tamaño se da como RANKINGSxJUEGOS; --list-len fija los juegos por lista.
+
+    python benchmarks/bench_ranking_engine.py --sizes 1000x50 10000x200 100000x500
+"""
+import argparse
+import random
+import time
+
+import _mongo  # noqa: F401  (configura Django)
+
+from rankingsafa.ranking_engine import PositionMatrix
+from rankingsafa.scores import compute_scores
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def make_lists(n_rankings, n_games, list_len, seed):
+    rng = random.Random(seed)
+    games = range(1, n_games + 1)
+    # Popularidad sesgada: unos pocos juegos aparecen en casi todas las listas
+    weights = [1 / (g ** 0.8) for g in games]
+    lists = []
+    for _ in range(n_rankings):
+        picked = dict.fromkeys(rng.choices(games, weights, k=list_len * 2))
+        lists.append(list(picked)[:list_len])
+    return lists
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['1000x50', '10000x200', '100000x500'])
+    parser.add_argument('--list-len', type=int, default=20)
+    parser.add_argument('--bootstrap', type=int, default=100, help='Muestras de bootstrap')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    header = ('tamaño', 'python', 'empaquetar', 'borda', 'pares', 'copeland', 'schulze', 'bootstrap')
+    print(' | '.join(f'{h:>12}' for h in header) + '   (ms)')
+    for size in args.sizes:
+        n_rankings, n_games = (int(x) for x in size.lower().split('x'))
+        lists = make_lists(n_rankings, n_games, args.list_len, args.seed)
+
+        expected, t_python = timed(lambda: compute_scores(lists))
+        matrix, t_pack = timed(lambda: PositionMatrix(lists))
+        scores, t_borda = timed(matrix.scores)
+        assert scores == expected
+        pairwise, t_pairs = timed(matrix.pairwise)
+        _, t_copeland = timed(lambda: matrix.copeland(pairwise))
+        _, t_schulze = timed(lambda: matrix.schulze(pairwise))
+        _, t_boot = timed(lambda: matrix.bootstrap(args.bootstrap, seed=args.seed))
+
+        row = (size, t_python, t_pack, t_borda, t_pairs, t_copeland, t_schulze, t_boot)
+        print(f'{row[0]:>12} | ' + ' | '.join(f'{t:>12.1f}' for t in row[1:]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark del ranking global de una categoría: cálculo en Python (trae todas
+las tier lists) frente al pipeline de agregación en el servidor y a la tabla
+materializada. Mide bytes BSON transferidos y latencia según crece el número
+de rankings.
+
+Por defecto usa mongomock, que ejecuta las agregaciones en Python: los bytes
+son válidos pero la latencia solo es representativa con --uri contra un
+servidor real.
+
+    python benchmarks/bench_ranking_global.py --rankings 100 1000 10000 --games 200
+"""
+import argparse
+import random
+import statistics
+import time
+
+import bson
+
+from _mongo import get_database
+
+from rankingsafa.scores import aggregation_pipeline, compute_scores
+
+CATEGORY = 1
+
+
+def populate(database, n_rankings, n_games, list_len):
+    rankings = database['rankings']
+    database.drop_collection('rankings')
+    games = list(range(1, n_games + 1))
+    rankings.insert_many([
+        {
+            'code': i,
+            'user': f'user{i}',
+            'category': CATEGORY,
+            'rankingList': random.sample(games, min(list_len, n_games)),
+        }
+        for i in range(n_rankings)
+    ])
+    scores = database['ranking_scores']
+    database.drop_collection('ranking_scores')
+    per_game = compute_scores(d['rankingList'] for d in rankings.find({'category': CATEGORY}))
+    if per_game:
+        scores.insert_many([{'category': CATEGORY, 'code': c, **s} for c, s in per_game.items()])
+
+
+def measure(run, repeat):
+    """
+    ``run`` devuelve los documentos recibidos de Mongo; la latencia incluye
+    también el cálculo posterior en Python. Devuelve (bytes, mediana en ms).
+    """
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        docs = run()
+        timings.append((time.perf_counter() - start) * 1000)
+        size = sum(len(bson.encode(doc)) for doc in docs)
+    return size, statistics.median(timings)
+
+
+def python_mode(rankings):
+    docs = list(rankings.find({'category': CATEGORY}, {'_id': 0, 'rankingList': 1}))
+    compute_scores(d['rankingList'] for d in docs)
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rankings', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--games', type=int, default=200, help='Juegos en la categoría')
+    parser.add_argument('--list-len', type=int, default=20, help='Juegos por tier list')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    database = get_database(args.uri)
+    print(f"{'rankings':>9} | {'modo':<11} | {'bytes':>12} | {'ms':>9}")
+    for n in args.rankings:
+        populate(database, n, args.games, args.list_len)
+        rankings, scores = database['rankings'], database['ranking_scores']
+        modes = {
+            'python': lambda: python_mode(rankings),
+            'agregacion': lambda: list(rankings.aggregate(aggregation_pipeline(CATEGORY))),
+            'tabla': lambda: list(scores.find({'category': CATEGORY, 'votes': {'$gt': 0}},
+                                              {'_id': 0, 'code': 1, 'points': 1, 'positions': 1, 'votes': 1})),
+        }
+        for mode, fetch in modes.items():
+            size, ms = measure(fetch, args.repeat)
+            print(f'{n:>9} | {mode:<11} | {size:>12,} | {ms:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de la búsqueda del catálogo: tiempo de construcción del índice
+invertido y latencia de consultas típicas (palabra frecuente, palabra rara,
+varias palabras y prefijo mientras se escribe) según crece el catálogo.
+
+No necesita Mongo: los juegos se generan en memoria y se pasan directamente
+a SearchIndex.
+
+    python benchmarks/bench_search.py --games 10000 100000 --desc-words 60
+"""
+import argparse
+import random
+import statistics
+import time
+
+import _mongo  # noqa: F401  (configura Django)
+
+from rankingsafa.search import SearchIndex
+
+WORDS = ('aventura acción mundo abierto combate historia personajes misiones exploración jefes '
+         'mazmorras ciudad secretos cooperativo estrategia recursos dragón espada magia nave '
+         'espacio carreras coches fútbol terror zombis supervivencia plataformas puzle ritmo').split()
+RARE = ['quetzalcóatl', 'ñandú', 'xilófono', 'zigurat']
+CATEGORIES = {i: name for i, name in enumerate(
+    ['Acción', 'Aventura', 'RPG', 'Estrategia', 'Deportes', 'Terror', 'Puzle', 'Carreras'], 1)}
+
+QUERIES = {
+    'frecuente': 'aventura',
+    'rara': 'zigurat',
+    'dos palabras': 'espada dragón',
+    'categoría': 'terror',
+    'prefijo': 'exploraci',
+    'sin resultados': 'inexistente',
+}
+
+
+def generate(n_games, desc_words):
+    rnd = random.Random(n_games)
+    for i in range(1, n_games + 1):
+        desc = rnd.choices(WORDS, k=desc_words)
+        if rnd.random() < 0.001:
+            desc.append(rnd.choice(RARE))
+        yield {
+            'code': i,
+            'name': ' '.join(rnd.choices(WORDS, k=3)).title(),
+            'desc': ' '.join(desc),
+            'developer': f'Estudio {rnd.randint(1, 500)}',
+            'publisher': f'Editora {rnd.randint(1, 100)}',
+            'category': rnd.sample(list(CATEGORIES), 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--desc-words', type=int, default=60)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for n in args.games:
+        start = time.perf_counter()
+        index = SearchIndex(generate(n, args.desc_words), CATEGORIES)
+        build = time.perf_counter() - start
+        postings_mb = (index.doc_ids.nbytes + index.weights.nbytes) / 1e6
+        print(f'{n} juegos: índice en {build:.1f}s, {len(index.vocab)} términos, {postings_mb:.1f} MB')
+        for label, query in QUERIES.items():
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                codes, total = index.search(query)
+                timings.append((time.perf_counter() - t0) * 1000)
+            print(f'  {label:<15} {query!r:<18} {total:>7} resultados  {statistics.median(timings):>7.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
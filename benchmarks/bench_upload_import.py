@@ -0,0 +1,93 @@
+"""
+Benchmark de la importación del catálogo: camino antiguo (exists + update/create
+por registro) frente a los upserts por lotes de rankingsafa.importer.
+
+Por defecto usa mongomock como sustituto local de Mongo; con --uri se ejecuta
+contra un servidor real.
+
+    python benchmarks/bench_upload_import.py --games 50000 --batch-size 1000
+"""
+import argparse
+import time
+
+from _mongo import CountingCollection, get_database
+
+from rankingsafa.importer import import_catalog, report_totals, videojuego_doc, categoria_doc
+
+
+def make_catalog(n_games, n_categorias):
+    categorias = [
+        {'id': f'cat_{i:03d}', 'nombre': f'Categoría {i}', 'descripcion': 'Descripción'}
+        for i in range(1, n_categorias + 1)
+    ]
+    videojuegos = [
+        {
+            'id': f'game_{i:03d}',
+            'nombre': f'Juego {i}',
+            'descripcion': 'Descripción del juego ' * 5,
+            'categorias': [f'cat_{(i % n_categorias) + 1:03d}'],
+            'fecha_lanzamiento': '2020-01-01',
+            'plataformas': ['PC'],
+            'precio_actual': 19.99,
+        }
+        for i in range(1, n_games + 1)
+    ]
+    return {'categorias': categorias, 'videojuegos': videojuegos}
+
+
+def legacy_import(data, collections):
+    """Reproduce el bucle original de upload_json: exists() y update()/create()."""
+    for section, to_doc in (('categorias', categoria_doc), ('videojuegos', videojuego_doc)):
+        collection = collections[section]
+        for record in data[section]:
+            doc = to_doc(record)
+            if collection.count_documents({'code': doc['code']}, limit=1):
+                collection.update_many({'code': doc['code']}, {'$set': doc})
+            else:
+                collection.insert_one(doc)
+
+
+def run(label, database, func, drop=True):
+    if drop:
+        for name in ('categorias', 'videojuegos', 'counters', 'import_seen'):
+            database.drop_collection(name)
+    collections = {name: CountingCollection(database[name])
+                   for name in ('categorias', 'videojuegos', 'counters', 'import_seen')}
+    start = time.perf_counter()
+    result = func(collections)
+    elapsed = time.perf_counter() - start
+    trips = sum(c.round_trips for c in collections.values())
+    print(f'{label:<22} {elapsed:>9.3f}s {trips:>10} round trips')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--categorias', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--uri', help='URI de un Mongo real (por defecto mongomock)')
+    args = parser.parse_args()
+
+    database = get_database(args.uri)
+    data = make_catalog(args.games, args.categorias)
+    print(f'{args.games} juegos, {args.categorias} categorías, lotes de {args.batch_size}')
+
+    # Dos pasadas: la primera inserta, la segunda actualiza lo ya existente
+    run('legacy (1ª pasada)', database, lambda c: legacy_import(data, c))
+    run('legacy (2ª pasada)', database, lambda c: legacy_import(data, c), drop=False)
+    report = run('bulk (1ª pasada)', database, lambda c: import_catalog(data, args.batch_size, c))
+    print('  totales:', report_totals(report))
+    report = run('bulk (2ª pasada)', database, lambda c: import_catalog(data, args.batch_size, c), drop=False)
+    print('  totales:', report_totals(report))
+
+    # Catálogo del día siguiente: ~5% de juegos cambiados y el 1% retirado
+    for game in data['videojuegos'][::20]:
+        game['precio_actual'] = round(game['precio_actual'] * 0.8, 2)
+    del data['videojuegos'][-(args.games // 100 or 1):]
+    report = run('bulk (5% cambiados)', database, lambda c: import_catalog(data, args.batch_size, c), drop=False)
+    print('  totales:', report_totals(report))
+
+
+if __name__ == '__main__':
+    main()
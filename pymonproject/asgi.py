@@ -12,5 +12,16 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pymonproject.settings')
+# Con ASGI la portada y el detalle de juego usan las vistas async
+# (ver rankingsafa.async_views)
+os.environ.setdefault('RANKINGSAFA_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
+
+# Los índices en memoria de búsqueda y autocompletado se construyen en
+# segundo plano desde el arranque, no en la primera petición
+from rankingsafa.autocomplete import autocomplete_service  # noqa: E402
+from rankingsafa.search import search_service  # noqa: E402
+
+search_service.warm()
+autocomplete_service.warm()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -132,4 +133,62 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Ficheros subidos (p. ej. catálogos JSON pendientes de importar)
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Hilos del pool que procesa las importaciones en segundo plano
+IMPORT_JOB_WORKERS = 2
+
+# Cálculo del ranking global para el staff (?modo=): 'tabla' (materializado),
+# 'agregacion', 'python' o 'numpy'. El resto de usuarios siempre usa 'tabla'
+RANKING_SCORES_MODE = 'tabla'
+
+# Vida media (días) del ranking con decaimiento. Si se cambia hay que ejecutar
+# rebuild_ranking_scores, los acumulados guardados dependen de ella.
+RANKING_DECAY_HALF_LIFE = 30
+
+# Series de reseña reservadas de golpe por juego y proceso (ver rankingsafa.sequences)
+REVIEW_SERIE_BLOCK = 10
+
+# Segundos entre comprobaciones del sello de versión de las categorías
+# (ver rankingsafa.categories)
+CATEGORY_CHECK_INTERVAL = 5
+
+# Entradas máximas de la caché LRU del ranking global (por proceso)
+RANKING_CACHE_SIZE = 256
+
+# Elementos por página (paginación por clave, ver rankingsafa.pagination)
+HOME_PAGE_SIZE = 24
+CATALOG_PAGE_SIZE = 48
+LIST_PAGE_SIZE = 50
+REVIEWS_PAGE_SIZE = 20
+
+# Búsqueda: resultados por consulta, segundos entre comprobaciones de si
+# hay que reconstruir el índice en memoria y segundos de espera tras una
+# construcción fallida (ver rankingsafa.search)
+SEARCH_RESULTS = 24
+SEARCH_CHECK_INTERVAL = 5
+SEARCH_RETRY_INTERVAL = 60
+
+# Páginas públicas cacheadas por proceso (ver rankingsafa.pagecache)
+PAGE_CACHE_SIZE = 256
+
+# Fragmentos de tarjeta de juego cacheados por proceso (ver rankingsafa.cards)
+CARD_CACHE_SIZE = 10000
+
+# Sugerencias por tipo que devuelve el autocompletado (ver rankingsafa.autocomplete)
+AUTOCOMPLETE_RESULTS = 8
+
+# Filtros de games_list con recuentos cacheados por proceso
+FACET_CACHE_SIZE = 512
+
+# Filas por página de la API JSON: por defecto y máximo que se puede pedir
+# con ?limite= (ver rankingsafa.api)
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Vistas async de las páginas de lectura más visitadas (rankingsafa.async_views).
+# Las activa asgi.py; con WSGI se sirven las síncronas.
+ASYNC_VIEWS = os.environ.get('RANKINGSAFA_ASYNC_VIEWS', '0') == '1'
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'pymonproject.settings')
 
 application = get_wsgi_application()
+
+# Los índices en memoria de búsqueda y autocompletado se construyen en
+# segundo plano desde el arranque, no en la primera petición
+from rankingsafa.autocomplete import autocomplete_service  # noqa: E402
+from rankingsafa.search import search_service  # noqa: E402
+
+search_service.warm()
+autocomplete_service.warm()
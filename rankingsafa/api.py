@@ -0,0 +1,199 @@
+"""
+API JSON de solo lectura: juegos, categorías, reseñas y ranking global.
+
+Las filas se leen con pymongo, proyectadas a los campos que pide el cliente
+(?campos=code,name), y se serializan directamente desde los documentos, sin
+construir un modelo por fila. Los listados se paginan por clave con los
+mismos cursores opacos que las páginas HTML (?after=, ver
+rankingsafa.pagination) y se envían en streaming: las filas se escriben a
+medida que llegan del cursor de Mongo y salen en trozos de CHUNK_SIZE, así
+que la memoria no depende del tamaño de la página y el primer byte no
+espera a la última fila.
+"""
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from .models import Categoria, Review, Videojuego
+from .mongo import get_collection
+from .pagination import decode_cursor, encode_cursor, keyset_filter
+
+# Caracteres acumulados antes de enviar un trozo de la respuesta
+CHUNK_SIZE = 16 * 1024
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _date(value):
+    # Las fechas se guardan como datetime en Mongo
+    return value.date().isoformat() if isinstance(value, datetime.datetime) else value.isoformat()
+
+
+def _datetime(value):
+    return value.isoformat()
+
+
+class Resource:
+    """Colección publicada: campos que se pueden pedir y orden (único) de sus listados."""
+
+    def __init__(self, model, ordering, default_fields, exclude=()):
+        self.model = model
+        self.ordering = tuple(ordering)
+        self.default_fields = tuple(default_fields)
+        self.columns = {}
+        self._convert = {}
+        self._plans = {}
+        for field in model._meta.concrete_fields:
+            # El 'id' automático de Review no se guarda en Mongo
+            if field.auto_created or field.name in exclude:
+                continue
+            self.columns[field.name] = field.column
+            if isinstance(field, models.DateTimeField):
+                self._convert[field.name] = _datetime
+            elif isinstance(field, models.DateField):
+                self._convert[field.name] = _date
+        self._order_fields = [model._meta.get_field(f.lstrip('-')) for f in self.ordering]
+        self.column_ordering = [
+            ('-' if f.startswith('-') else '') + field.column for f, field in zip(self.ordering, self._order_fields)
+        ]
+        self.sort = [(f.lstrip('-'), -1 if f.startswith('-') else 1) for f in self.column_ordering]
+
+    def select(self, raw):
+        """Campos de ?campos= (los de por defecto si no viene); ValueError si alguno no existe."""
+        if not raw:
+            return self.default_fields
+        fields = tuple(dict.fromkeys(f.strip() for f in raw.split(',') if f.strip()))
+        unknown = [f for f in fields if f not in self.columns]
+        if unknown:
+            raise ValueError(f"Campos desconocidos: {', '.join(unknown)}. Disponibles: {', '.join(self.columns)}")
+        return fields or self.default_fields
+
+    def projection(self, fields):
+        """Proyección con los campos pedidos y los del orden (hacen falta para el cursor)."""
+        projection = {'_id': 0}
+        for name in fields:
+            projection[self.columns[name]] = 1
+        for column, _ in self.sort:
+            projection[column] = 1
+        return projection
+
+    def cursor(self, token):
+        """Valores de ?after= listos para Mongo; None si no viene, ValueError si no es válido."""
+        if not token:
+            return None
+        values = decode_cursor(token)
+        if values is None or len(values) != len(self._order_fields):
+            raise ValueError('Cursor no válido.')
+        cleaned = []
+        for field, value in zip(self._order_fields, values):
+            try:
+                value = field.to_python(value)
+            except ValidationError:
+                raise ValueError('Cursor no válido.')
+            if type(value) is datetime.date:
+                value = datetime.datetime.combine(value, datetime.time.min)
+            cleaned.append(value)
+        return cleaned
+
+    def key(self, doc):
+        return [doc.get(column) for column, _ in self.sort]
+
+    def _plan(self, fields):
+        """([(nombre, columna)], [(nombre, conversión)]) de ``fields``, calculado una vez."""
+        plan = self._plans.get(fields)
+        if plan is None:
+            plan = self._plans[fields] = (
+                [(name, self.columns[name]) for name in fields],
+                [(name, self._convert[name]) for name in fields if name in self._convert],
+            )
+        return plan
+
+    def encode(self, doc, fields):
+        """Documento de Mongo -> objeto JSON con ``fields``, en ese orden."""
+        columns, converted = self._plan(fields)
+        row = {name: doc.get(column) for name, column in columns}
+        for name, convert in converted:
+            if row[name] is not None:
+                row[name] = convert(row[name])
+        return _encoder.encode(row)
+
+
+GAMES = Resource(
+    Videojuego, ['code'],
+    ('code', 'name', 'image', 'category', 'platforms', 'developer', 'release_date', 'price', 'short_desc'),
+    exclude=('content_hash',),
+)
+REVIEWS = Resource(Review, ['-reviewDate', '-serie'], ('serie', 'user', 'reviewDate', 'rating', 'comentary'))
+CATEGORIES = Resource(Categoria, ['code'], ('code', 'name', 'desc', 'image'), exclude=('content_hash',))
+
+
+def page_size(raw):
+    """?limite= acotado a API_MAX_PAGE_SIZE; ValueError si no es un número."""
+    if not raw:
+        return getattr(settings, 'API_PAGE_SIZE', 100)
+    return max(1, min(int(raw), getattr(settings, 'API_MAX_PAGE_SIZE', 1000)))
+
+
+def stream_page(resource, collection, query, fields, after=None, size=100):
+    """
+    Trozos de la respuesta de una página: {"items": [...], "count", "next"}.
+    Lee una fila de más para saber si hay página siguiente.
+    """
+    if after is not None:
+        query = {**query, **keyset_filter(resource.column_ordering, after)}
+    cursor = collection.find(query, resource.projection(fields), sort=resource.sort, limit=size + 1)
+
+    parts, length, count, last, has_more = ['{"items":['], 0, 0, None, False
+    try:
+        for doc in cursor:
+            if count == size:
+                has_more = True
+                break
+            row = resource.encode(doc, fields)
+            parts.append(row if not count else ',' + row)
+            length += len(row)
+            count += 1
+            last = doc
+            if length >= CHUNK_SIZE:
+                yield ''.join(parts)
+                parts, length = [], 0
+    finally:
+        cursor.close()
+    next_cursor = encode_cursor(resource.key(last)) if has_more else None
+    parts.append(f'],"count":{count},"next":{_encoder.encode(next_cursor)}}}')
+    yield ''.join(parts)
+
+
+def error_response(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def list_response(request, resource, query):
+    """Página de ``resource`` filtrada por ``query`` según ?campos=, ?after= y ?limite=."""
+    try:
+        fields = resource.select(request.GET.get('campos'))
+        after = resource.cursor(request.GET.get('after'))
+        size = page_size(request.GET.get('limite'))
+    except ValueError as e:
+        return error_response(str(e))
+    collection = get_collection(resource.model)
+    return StreamingHttpResponse(
+        stream_page(resource, collection, query, fields, after, size),
+        content_type='application/json',
+    )
+
+
+def detail_response(request, resource, query):
+    """Un documento de ``resource`` con los campos de ?campos=."""
+    try:
+        fields = resource.select(request.GET.get('campos'))
+    except ValueError as e:
+        return error_response(str(e))
+    doc = get_collection(resource.model).find_one(query, resource.projection(fields))
+    if doc is None:
+        return error_response('No encontrado.', status=404)
+    return HttpResponse(resource.encode(doc, fields), content_type='application/json')
@@ -0,0 +1,72 @@
+"""
+Versiones async de las vistas de lectura más visitadas, para servir con ASGI.
+
+Con ASYNC_VIEWS (lo activa asgi.py) urls.py enruta la portada y el detalle
+de juego a estas vistas. Sus consultas a Mongo no dependen unas de otras,
+así que se lanzan a la vez con asyncio.gather sobre el AsyncMongoClient de
+pymongo (rankingsafa.mongo.get_async_collection): la página espera lo que
+tarda la consulta más lenta y no la suma de todas, y mientras tanto el
+bucle de eventos atiende otras peticiones.
+
+Las plantillas, la caché de páginas y los cursores de paginación son los
+mismos que los de rankingsafa.views. Las escrituras (POST) siguen en las
+vistas síncronas.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404
+from django.shortcuts import render
+
+from . import views
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY, game_from_doc, list_projection
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY, category_registry
+from .forms import ReviewForm
+from .models import Review, Videojuego
+from .mongo import get_async_collection
+from .pagecache import versioned_page
+from .pagination import apaginate, page_cursors
+from .review_stats import review_version_key
+from .versions import aget_versions
+
+
+async def mostrar_inicio(request):
+    # Carga el usuario (y con él la sesión) sin consultas síncronas
+    request.user = await request.auser()
+    after, before = page_cursors(request)
+    # Página de juegos, copia de las categorías y sellos de la caché de tarjetas
+    page, _, card_stamps = await asyncio.gather(
+        apaginate(get_async_collection(Videojuego), Videojuego, {}, ['code'], after, before,
+                  getattr(settings, 'HOME_PAGE_SIZE', 24), list_projection('inicio')),
+        category_registry.arefresh(),
+        aget_versions([CATALOG_VERSION_KEY, CATEGORIES_VERSION_KEY]),
+    )
+    videojuegos = category_registry.attach_tags(page['items'], refresh=False)
+    return render(request, 'inicio.html', {'videojuegos': videojuegos, 'page': page, 'card_stamps': card_stamps})
+
+
+@versioned_page(CATEGORIES_VERSION_KEY, CATALOG_VERSION_KEY, lambda code: review_version_key(code))
+async def game_detail(request, code):
+    if request.method == 'POST':
+        return await sync_to_async(views.game_detail)(request, code)
+
+    # Juego, página de reseñas y copia de las categorías a la vez
+    after, before = page_cursors(request)
+    doc, page, _ = await asyncio.gather(
+        get_async_collection(Videojuego).find_one({'code': code}),
+        apaginate(get_async_collection(Review), Review, {'code': code}, ['-reviewDate', '-serie'], after, before,
+                  getattr(settings, 'REVIEWS_PAGE_SIZE', 20)),
+        category_registry.arefresh(),
+    )
+    if doc is None:
+        raise Http404('No Videojuego matches the given query.')
+    juego = game_from_doc(doc)
+    juego.cat_tags = category_registry.tags_for(juego.category, refresh=False)
+
+    return render(request, 'game_detail.html', {
+        'juego': juego,
+        'reviews': page['items'],
+        'page': page,
+        'form': ReviewForm(),
+    })
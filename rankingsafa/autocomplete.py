@@ -0,0 +1,270 @@
+"""
+Autocompletado por prefijo de nombres de juego, desarrolladores y plataformas.
+
+Cada sugerencia se indexa por el comienzo de cada una de sus palabras
+('hollow knight' y 'knight'), normalizado con search.fold. Las claves viven
+en un array ordenado de NumPy de ancho fijo y un prefijo se resuelve con dos
+searchsorted, sin consultar la base de datos.
+
+Los cambios hechos en este proceso (alta, edición o borrado de un juego) se
+aplican sobre el índice sin reconstruirlo: las claves nuevas van a una lista
+ordenada pequeña y las retiradas se marcan como inactivas hasta que se
+compacta. Los cambios de otros procesos y las importaciones se detectan por el
+sello de versión del catálogo y provocan una reconstrucción completa en
+segundo plano, igual que en la búsqueda.
+"""
+import bisect
+import re
+import threading
+
+import numpy as np
+
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY
+from .models import Videojuego
+from .mongo import get_collection
+from .search import IndexNotReady, SearchService, fold
+from .versions import get_version
+
+KINDS = ('juego', 'desarrollador', 'plataforma')
+
+# Bytes guardados de cada clave; los prefijos más largos se recortan
+KEY_LENGTH = 32
+
+# Claves añadidas o retiradas tras las que se rehacen los arrays principales
+COMPACT_AT = 2000
+
+# Máximo de sugerencias por tipo que se pueden pedir
+MAX_RESULTS = 50
+
+FIELDS = ('code', 'name', 'developer', 'platforms', 'category', 'reviews_count')
+
+_SEPARATORS = re.compile(r'[^a-z0-9]+')
+
+
+def normalize(text):
+    """Texto plegado con las palabras separadas por un único espacio."""
+    return _SEPARATORS.sub(' ', fold(text)).strip()
+
+
+def word_keys(label):
+    """Una clave por cada palabra de ``label``: el texto desde esa palabra."""
+    text = normalize(label)
+    keys = []
+    for match in re.finditer(r'\S+', text):
+        keys.append(text[match.start():][:KEY_LENGTH].encode('ascii'))
+    return keys
+
+
+class PrefixIndex:
+    def __init__(self, docs=()):
+        """``docs``: documentos de 'videojuegos' con al menos los campos de FIELDS."""
+        self._labels = []
+        self._kinds = np.zeros(0, dtype=np.int8)
+        self._scores = np.zeros(0, dtype=np.float64)
+        self._live = np.zeros(0, dtype=bool)
+        self._categories = []
+        self._codes = []
+        self._removed = 0      # entradas retiradas desde la última compactación
+        self._games = {}       # código de juego -> (entrada, entradas de sus grupos)
+        self._groups = {}      # (tipo, texto normalizado) -> entrada
+        self._main = (np.zeros(0, dtype=f'S{KEY_LENGTH}'), np.zeros(0, dtype=np.int32))
+        self._extra = []       # (clave, entrada) ordenadas, pendientes de compactar
+        self._lock = threading.Lock()
+        self._building = True
+        for doc in docs:
+            self._add_game(doc)
+        self._building = False
+        self._compact()
+
+    def __len__(self):
+        return len(self._games)
+
+    # ---------- Altas y bajas ----------
+
+    def _new_entry(self, label, kind, score, code=None, categories=()):
+        entry = len(self._labels)
+        if entry >= len(self._scores):
+            # Crecimiento geométrico de los arrays por entrada
+            size = max(1024, 2 * len(self._scores))
+            self._scores = np.resize(self._scores, size)
+            self._kinds = np.resize(self._kinds, size)
+            self._live = np.resize(self._live, size)
+        self._labels.append(label)
+        self._codes.append(code)
+        self._categories.append(frozenset(categories))
+        self._scores[entry] = score
+        self._kinds[entry] = KINDS.index(kind)
+        self._live[entry] = True
+        if not self._building:
+            for key in word_keys(label):
+                bisect.insort(self._extra, (key, entry))
+        return entry
+
+    def _join_group(self, kind, label):
+        key = (kind, normalize(label))
+        if not key[1]:
+            return None
+        entry = self._groups.get(key)
+        if entry is None:
+            entry = self._groups[key] = self._new_entry(label, kind, 0)
+        # La puntuación de un grupo es su número de juegos
+        self._scores[entry] += 1
+        return entry
+
+    def _retire(self, entry):
+        self._live[entry] = False
+        self._removed += 1
+
+    def _leave_group(self, entry):
+        self._scores[entry] -= 1
+        if self._scores[entry] <= 0:
+            self._retire(entry)
+            kind = KINDS[self._kinds[entry]]
+            self._groups.pop((kind, normalize(self._labels[entry])), None)
+
+    def _add_game(self, doc):
+        entry = self._new_entry(doc.get('name') or '', 'juego', 1 + (doc.get('reviews_count') or 0),
+                                code=doc['code'], categories=doc.get('category') or ())
+        groups = [self._join_group('desarrollador', doc.get('developer'))]
+        groups += [self._join_group('plataforma', p) for p in doc.get('platforms') or []]
+        self._games[doc['code']] = (entry, [g for g in groups if g is not None])
+
+    def _remove_game(self, code):
+        entry, groups = self._games.pop(code, (None, ()))
+        if entry is None:
+            return
+        self._retire(entry)
+        for group in groups:
+            self._leave_group(group)
+
+    def upsert_game(self, doc):
+        with self._lock:
+            self._remove_game(doc['code'])
+            self._add_game(doc)
+            self._maybe_compact()
+
+    def remove_game(self, code):
+        with self._lock:
+            self._remove_game(code)
+            self._maybe_compact()
+
+    def _maybe_compact(self):
+        if len(self._extra) + self._removed >= COMPACT_AT:
+            self._compact()
+
+    def _compact(self):
+        """Rehace los arrays ordenados con las entradas vivas."""
+        pairs = [
+            (key, entry)
+            for entry, label in enumerate(self._labels)
+            if self._live[entry]
+            for key in word_keys(label)
+        ]
+        pairs.sort()
+        keys = np.array([k for k, _ in pairs], dtype=f'S{KEY_LENGTH}')
+        ids = np.array([e for _, e in pairs], dtype=np.int32)
+        # Una sola asignación: una consulta en curso ve los dos arrays antiguos o los dos nuevos
+        self._main = (keys, ids)
+        self._extra = []
+        self._removed = 0
+
+    # ---------- Consultas ----------
+
+    def _candidates(self, prefix):
+        """Entradas cuyas claves empiezan por ``prefix`` (puede haber repetidas)."""
+        keys, ids = self._main
+        low = prefix[:KEY_LENGTH]
+        high = low + b'\xff'
+        start, end = np.searchsorted(keys, [low, high])
+        found = ids[start:end]
+        extra = self._extra
+        if extra:
+            first = bisect.bisect_left(extra, (low,))
+            last = bisect.bisect_left(extra, (high,))
+            if last > first:
+                found = np.concatenate([found, np.array([e for _, e in extra[first:last]], dtype=np.int32)])
+        return found
+
+    def suggest(self, prefix, limit=8, kinds=KINDS, category=None):
+        """
+        {tipo: [sugerencias]} para ``prefix``, las de mayor puntuación primero.
+        ``category`` limita los juegos a los de esa categoría.
+        """
+        text = normalize(prefix)
+        results = {kind: [] for kind in kinds}
+        if not text:
+            return results
+        candidates = self._candidates(text.encode('ascii'))
+        candidates = candidates[self._live[candidates]]
+        found_kinds = self._kinds[candidates]
+        for kind in kinds:
+            found = candidates[found_kinds == KINDS.index(kind)]
+            results[kind] = self._top(found, limit, category if kind == 'juego' else None)
+        return results
+
+    def _top(self, entries, limit, category):
+        scores = -self._scores[entries]
+        # Sin filtro de categoría basta con los mejores; se piden de más
+        # porque una entrada puede casar por varias de sus palabras
+        keep = limit * 4
+        if category is None and len(entries) > keep:
+            best = np.argpartition(scores, keep)[:keep]
+            entries, scores = entries[best], scores[best]
+        out, seen = [], set()
+        for entry in entries[np.argsort(scores, kind='stable')]:
+            if entry in seen or (category is not None and category not in self._categories[entry]):
+                continue
+            seen.add(entry)
+            out.append({'label': self._labels[entry], 'code': self._codes[entry]})
+            if len(out) == limit:
+                break
+        return out
+
+
+def load_prefix_index(collection=None):
+    collection = collection or get_collection(Videojuego)
+    return PrefixIndex(collection.find({}, {'_id': 0, **{f: 1 for f in FIELDS}}))
+
+
+def game_doc(juego):
+    """Campos de un Videojuego que usa el índice, como los daría Mongo."""
+    return {f: getattr(juego, f, None) for f in FIELDS}
+
+
+class AutocompleteService(SearchService):
+    """
+    Índice de prefijos del proceso. Reutiliza la reconstrucción en segundo
+    plano de SearchService y añade la actualización incremental.
+    """
+
+    def __init__(self, loader=load_prefix_index):
+        super().__init__(loader)
+
+    def _current_key(self):
+        return get_version(CATALOG_VERSION_KEY)
+
+    def _apply(self, version, change):
+        try:
+            index = self.index()
+        except IndexNotReady:
+            # El índice que se está construyendo ya leerá el cambio o se
+            # rehará al ver el sello nuevo
+            return
+        change(index)
+        with self._lock:
+            # Si nadie más ha tocado el catálogo, el índice sigue al día
+            if self._key == version - 1:
+                self._key = version
+
+    def game_saved(self, juego, version):
+        """Aplica un alta o edición; ``version`` es lo que devolvió invalidate_catalog."""
+        self._apply(version, lambda index: index.upsert_game(game_doc(juego)))
+
+    def game_deleted(self, code, version):
+        self._apply(version, lambda index: index.remove_game(code))
+
+    def suggest(self, prefix, limit=8, kinds=KINDS, category=None):
+        return self.index().suggest(prefix, limit, kinds, category)
+
+
+autocomplete_service = AutocompleteService()
@@ -0,0 +1,61 @@
+"""
+Cachés en memoria del proceso con tamaño acotado y expulsión LRU.
+
+Cada caché se registra por nombre para que el panel de administración pueda
+mostrar sus aciertos y fallos. Las claves deben incluir el sello de versión
+de los datos (ver rankingsafa.versions): al cambiar el sello las entradas
+antiguas dejan de usarse y acaban saliendo por LRU.
+"""
+import threading
+from collections import OrderedDict
+
+_registry = {}
+
+
+class LRUCache:
+    def __init__(self, name, maxsize=256):
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total * 100, 1) if total else 0,
+        }
+
+
+def cache_stats():
+    """Estadísticas de todas las cachés registradas en este proceso."""
+    return [cache.stats() for cache in _registry.values()]
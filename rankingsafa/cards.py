@@ -0,0 +1,51 @@
+"""
+Tarjetas de juego cacheadas como fragmentos de HTML.
+
+La portada, games_list y categoria_games pintan una tarjeta por juego con
+bucles de estrellas y de etiquetas de categoría. Cada tarjeta se renderiza
+una vez y se guarda por (estilo, código, sello del catálogo, sello de las
+categorías, reviews_count, rating_sum): el sello del catálogo cambia con
+cualquier escritura de un juego, el de las categorías con sus nombres y
+colores, y los dos contadores son la versión de las estadísticas de
+reseñas del propio juego. Un listado es la concatenación de fragmentos.
+"""
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .cache import LRUCache
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY
+from .versions import get_versions
+
+CARD_TEMPLATES = {
+    'inicio': 'game_card_inicio.html',
+    'catalogo': 'game_card_catalogo.html',
+    'categoria': 'game_card_categoria.html',
+}
+
+_card_cache = LRUCache('game_cards', getattr(settings, 'CARD_CACHE_SIZE', 10000))
+
+
+def card_key(style, juego, stamps):
+    # __dict__ y no getattr: en un listado con only() leer un campo diferido
+    # lanzaría una consulta por juego
+    values = juego.__dict__
+    return style, juego.code, *stamps, values.get('reviews_count'), values.get('rating_sum')
+
+
+def render_cards(videojuegos, style, cache=None, stamps=None):
+    """HTML de las tarjetas de ``videojuegos`` con el estilo ``style``."""
+    cache = _card_cache if cache is None else cache
+    if stamps is None:
+        stamps = get_versions([CATALOG_VERSION_KEY, CATEGORIES_VERSION_KEY])
+    template = get_template(CARD_TEMPLATES[style])
+    parts = []
+    for juego in videojuegos:
+        key = card_key(style, juego, stamps)
+        html = cache.get(key)
+        if html is None:
+            html = template.render({'juego': juego})
+            cache.set(key, html)
+        parts.append(html)
+    return mark_safe(''.join(parts))
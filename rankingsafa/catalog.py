@@ -0,0 +1,175 @@
+"""
+Consultas del catálogo que se resuelven en Mongo con pymongo.
+
+El ORM no sabe traducir los lookups de ArrayField (overlap, __in sobre
+arrays) a MQL, así que los filtros de games_list se escriben aquí como
+consultas $in sobre 'category' y 'platforms'. Las consultas find con esos
+filtros (la API) usan los índices multikey de esos campos.
+
+La página de games_list se lee con un find por clave (código) con el
+filtro, que usa los índices. La barra lateral (total y recuentos por
+categoría y por plataforma) son consultas aparte que empiezan por un $match
+con su filtro, también por índice, y se cachean por el filtro del que
+depende cada una y el sello de versión del catálogo (invalidate_catalog lo
+incrementa en cada escritura). Solo los recuentos sin filtro recorren todo
+el catálogo, y esos se comparten entre todos los filtros.
+
+Los listados solo leen los campos que pinta su plantilla (LIST_FIELDS); en
+lugar de la descripción completa usan short_desc, que se guarda recortada
+al escribir el juego.
+"""
+from django.conf import settings
+from django.utils.text import Truncator
+
+from .cache import LRUCache
+from .models import Videojuego
+from .mongo import get_collection, model_from_doc
+from .versions import bump_version, get_version
+
+VERSION_KEY = 'videojuegos'
+
+# Palabras de la descripción recortada de las tarjetas
+SHORT_DESC_WORDS = 20
+
+# Campos que usa cada listado
+LIST_FIELDS = {
+    'inicio': ('code', 'name', 'image', 'category', 'short_desc', 'reviews_count', 'rating_sum'),
+    'games_list': ('code', 'name', 'image', 'category', 'platforms', 'price'),
+    'categoria_games': ('code', 'name', 'image', 'category', 'short_desc'),
+    # El formulario de edición pide la descripción aparte (juego_desc)
+    'juego_list': ('code', 'name', 'image', 'developer', 'publisher', 'release_date', 'platforms',
+                   'category', 'price', 'age_rating', 'duration', 'multiplayer'),
+}
+
+
+def short_description(desc):
+    return Truncator(desc or '').words(SHORT_DESC_WORDS)
+
+
+def list_projection(listing):
+    """Proyección de Mongo con los campos de ``listing``."""
+    return {'_id': 0, **{field: 1 for field in LIST_FIELDS[listing]}}
+
+
+def game_from_doc(doc):
+    """Construye un Videojuego a partir de un documento de 'videojuegos'."""
+    return model_from_doc(Videojuego, doc)
+
+
+def game_query(categories=None, platforms=None):
+    """Filtro de games_list: algún código de ``categories`` y alguna de ``platforms``."""
+    query = {}
+    if categories:
+        query['category'] = {'$in': list(categories)}
+    if platforms:
+        query['platforms'] = {'$in': list(platforms)}
+    return query
+
+
+def canonical_filter(categories=None, platforms=None):
+    """Misma clave para el mismo filtro, da igual el orden o las repeticiones."""
+    return tuple(sorted(set(categories or ()))), tuple(sorted(set(platforms or ())))
+
+
+def counts_pipeline(field, query):
+    """Juegos de ``query`` por cada valor de ``field``; el $match va primero para usar su índice."""
+    return [
+        {'$match': query},
+        {'$unwind': f'${field}'},
+        {'$group': {'_id': f'${field}', 'n': {'$sum': 1}}},
+    ]
+
+
+def group_counts(field, query, collection=None):
+    """{valor de ``field``: juegos de ``query``}."""
+    collection = collection or get_collection(Videojuego)
+    cursor = collection.aggregate(counts_pipeline(field, query))
+    return {d['_id']: d['n'] for d in cursor if d['_id'] not in (None, '')}
+
+
+def _counted(cache, key, compute):
+    if cache is None:
+        return compute()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
+
+
+def facet_counts(categories=None, platforms=None, collection=None, cache=None, stamp=None):
+    """
+    {'total', 'categories': {código: n}, 'platforms': {nombre: n}}. Los
+    recuentos son disyuntivos: los de categoría aplican solo el filtro de
+    plataformas y viceversa, porque dentro de cada grupo las opciones se
+    combinan con OR y marcar otra casilla suma juegos.
+
+    Con ``cache`` cada parte se guarda por ``stamp`` y el filtro del que
+    depende: p. ej. los recuentos de categoría sin filtro de plataformas
+    sirven para cualquier selección de categorías.
+    """
+    collection = collection or get_collection(Videojuego)
+    categories, platforms = canonical_filter(categories, platforms)
+    return {
+        'total': _counted(cache, (stamp, 'total', categories, platforms),
+                          lambda: collection.count_documents(game_query(categories, platforms))),
+        'categories': _counted(cache, (stamp, 'category', platforms),
+                               lambda: group_counts('category', game_query(platforms=platforms), collection)),
+        'platforms': _counted(cache, (stamp, 'platforms', categories),
+                              lambda: group_counts('platforms', game_query(categories=categories), collection)),
+    }
+
+
+def page_filter(categories=None, platforms=None, after=None, before=None):
+    """(filtro, sentido del orden por código) de una página de games_list."""
+    query, direction = game_query(categories, platforms), 1
+    if before is not None:
+        query['code'], direction = {'$lt': before}, -1
+    elif after is not None:
+        query['code'] = {'$gt': after}
+    return query, direction
+
+
+def game_page(categories=None, platforms=None, page_size=48, after=None, before=None, collection=None):
+    """
+    {'games': [documentos], 'has_more'} de la página por clave (código
+    posterior a ``after`` o anterior a ``before``). Trae un juego de más
+    para saber si hay otra página; vuelven siempre en orden de código.
+    """
+    collection = collection or get_collection(Videojuego)
+    query, direction = page_filter(categories, platforms, after, before)
+    games = list(collection.find(query, list_projection('games_list')).sort('code', direction).limit(page_size + 1))
+    has_more = len(games) > page_size
+    games = games[:page_size]
+    if before is not None:
+        games.reverse()
+    return {'games': games, 'has_more': has_more}
+
+
+def faceted_search(categories=None, platforms=None, page_size=48, after=None, before=None, collection=None,
+                   cache=None, stamp=None):
+    """
+    {'games': [documentos], 'has_more', 'total', 'categories': {código: n},
+    'platforms': {nombre: n}}: game_page más facet_counts.
+    """
+    return {
+        **game_page(categories, platforms, page_size, after, before, collection),
+        **facet_counts(categories, platforms, collection, cache, stamp),
+    }
+
+
+_facet_cache = LRUCache('game_facets', getattr(settings, 'FACET_CACHE_SIZE', 512))
+
+
+def cached_faceted_search(categories=None, platforms=None, page_size=48, after=None, before=None):
+    """faceted_search con los recuentos cacheados por versión del catálogo; la página se lee siempre."""
+    return faceted_search(categories, platforms, page_size, after, before, cache=_facet_cache,
+                          stamp=get_version(VERSION_KEY))
+
+
+def invalidate_catalog():
+    """
+    Invalida en todos los procesos lo cacheado a partir de 'videojuegos'.
+    Devuelve la nueva versión del catálogo.
+    """
+    return bump_version(VERSION_KEY)
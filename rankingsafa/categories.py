@@ -0,0 +1,146 @@
+"""
+Registro en memoria de las categorías.
+
+Las categorías cambian muy poco y se consultan en casi todas las páginas
+(nombre y color de las etiquetas de cada juego). Cada proceso guarda una
+copia y solo vuelve a leer 'categorias' cuando cambia su sello de versión;
+el sello se comprueba como mucho cada CATEGORY_CHECK_INTERVAL segundos.
+Las escrituras llaman a invalidate_categories(), que lo incrementa.
+
+La caché de páginas lee el sello antes de renderizar y llama a ensure()
+(aensure() en las vistas async): si el sello es más nuevo que la copia, se
+recarga en ese momento, así una página nunca se guarda con el sello nuevo y
+las categorías de antes.
+
+Las vistas async no pueden usar el ORM: llaman antes a arefresh(), que hace
+la misma comprobación con el driver async, y después leen la copia con
+refresh=False.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Categoria
+from .mongo import get_async_collection, model_from_doc
+from .versions import aget_versions, bump_version, get_version
+
+VERSION_KEY = 'categorias'
+
+# Color determinista por código de categoría
+PALETTE = ['is-primary', 'is-link', 'is-info', 'is-success', 'is-warning', 'is-danger', 'is-dark']
+
+
+class CategoryRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked = 0.0
+        self._categorias = []
+        self.name_map = {}
+        self.color_map = {}
+        self._tags = {}
+
+    def _refresh(self):
+        interval = getattr(settings, 'CATEGORY_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        if self._version is not None and now - self._checked < interval:
+            return
+        with self._lock:
+            if self._version is not None and now - self._checked < interval:
+                return
+            version = get_version(VERSION_KEY)
+            if version != self._version:
+                self._load(version, self._read())
+            self._checked = now
+
+    def _read(self):
+        return list(Categoria.objects.all())
+
+    def ensure(self, version):
+        """Recarga ya la copia si ``version`` (un sello recién leído) es más nuevo."""
+        if self._version is not None and version <= self._version:
+            return
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._load(version, self._read())
+                self._checked = time.monotonic()
+
+    async def _aread(self):
+        docs = await get_async_collection(Categoria).find({}).to_list()
+        return [model_from_doc(Categoria, doc) for doc in docs]
+
+    async def aensure(self, version):
+        """ensure() con el driver async."""
+        if self._version is not None and version <= self._version:
+            return
+        categorias = await self._aread()
+        with self._lock:
+            if self._version is None or version > self._version:
+                self._load(version, categorias)
+                self._checked = time.monotonic()
+
+    def _load(self, version, categorias):
+        self._categorias = categorias
+        self.name_map = {c.code: c.name for c in categorias}
+        self.color_map = {c.code: PALETTE[c.code % len(PALETTE)] for c in categorias}
+        self._tags = {}
+        self._version = version
+
+    async def arefresh(self):
+        """_refresh con el driver async, para las vistas async."""
+        interval = getattr(settings, 'CATEGORY_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        if self._version is not None and now - self._checked < interval:
+            return
+        (version,) = await aget_versions([VERSION_KEY])
+        categorias = None
+        if version != self._version:
+            categorias = await self._aread()
+        with self._lock:
+            if categorias is not None and version != self._version:
+                self._load(version, categorias)
+            self._checked = now
+
+    def reset(self):
+        """Fuerza una comprobación del sello en la siguiente lectura."""
+        self._version = None
+
+    def all(self, refresh=True):
+        if refresh:
+            self._refresh()
+        return self._categorias
+
+    def maps(self):
+        """(nombre por código, color por código)."""
+        self._refresh()
+        return self.name_map, self.color_map
+
+    def tags_for(self, codes, refresh=True):
+        """Etiquetas {'name', 'color'} de una lista de categorías, calculadas una vez por combinación."""
+        if refresh:
+            self._refresh()
+        key = tuple(codes or ())
+        tags = self._tags.get(key)
+        if tags is None:
+            tags = [
+                {'name': self.name_map.get(c, f'Cat. {c}'), 'color': self.color_map.get(c, 'is-dark')}
+                for c in key
+            ]
+            self._tags[key] = tags
+        return tags
+
+    def attach_tags(self, videojuegos, refresh=True):
+        """Pone ``cat_tags`` a cada juego y devuelve los juegos."""
+        for v in videojuegos:
+            v.cat_tags = self.tags_for(getattr(v, 'category', None), refresh)
+        return videojuegos
+
+
+category_registry = CategoryRegistry()
+
+
+def invalidate_categories():
+    """Invalida la copia de las categorías en todos los procesos."""
+    bump_version(VERSION_KEY)
+    category_registry.reset()
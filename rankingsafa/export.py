@@ -0,0 +1,157 @@
+"""
+Exportación de categorías, videojuegos, reseñas y tier lists en NDJSON
+comprimido con gzip.
+
+Cada línea es un registro en el formato de importación (el mismo que lee
+rankingsafa.importer) con la sección en "seccion", así que un volcado se
+puede volver a cargar con upload_json o import_catalog. Los documentos se
+leen con pymongo en lotes de BATCH_SIZE, proyectados a los campos que se
+exportan, y se comprimen a medida que salen del cursor: ni la vista ni el
+comando tienen en memoria más que un lote.
+
+Las reseñas y las tier lists se pueden exportar de forma incremental desde
+una fecha (reviewDate, rankDate). Editar una tier list actualiza su fecha;
+editar una reseña no, y los borrados no aparecen en ningún volcado
+incremental.
+"""
+import datetime
+import json
+import zlib
+
+from .models import Categoria, Ranking, Review, Videojuego
+from .mongo import get_collection
+
+# Documentos por lote del cursor de Mongo
+BATCH_SIZE = 1000
+
+# Bytes sin comprimir acumulados antes de pasar por zlib
+CHUNK_SIZE = 64 * 1024
+
+SECTION_ORDER = ('categorias', 'videojuegos', 'reviews', 'rankings')
+
+# Campo de fecha de las exportaciones incrementales
+DATE_FIELDS = {'reviews': 'reviewDate', 'rankings': 'rankDate'}
+
+
+def _date(value):
+    # Las fechas se guardan como datetime en Mongo
+    if value is None:
+        return None
+    return (value.date() if isinstance(value, datetime.datetime) else value).isoformat()
+
+
+def _id(prefix, code):
+    return f'{prefix}_{code:03d}'
+
+
+def categoria_record(doc):
+    return {
+        'id': _id('cat', doc['code']),
+        'nombre': doc.get('name'),
+        'descripcion': doc.get('desc'),
+        'imagen_url': doc.get('image'),
+    }
+
+
+def videojuego_record(doc):
+    return {
+        'id': _id('game', doc['code']),
+        'nombre': doc.get('name'),
+        'desarrollador': doc.get('developer'),
+        'publisher': doc.get('publisher'),
+        'categorias': [_id('cat', c) for c in doc.get('category') or []],
+        'descripcion': doc.get('desc'),
+        'fecha_lanzamiento': _date(doc.get('release_date')),
+        'plataformas': doc.get('platforms') or [],
+        'imagen_url': doc.get('image'),
+        'precio_actual': doc.get('price'),
+        'clasificacion_edad': doc.get('age_rating'),
+        'duracion_aproximada': doc.get('duration'),
+        'multijugador': bool(doc.get('multiplayer')),
+    }
+
+
+def review_record(doc):
+    return {
+        'juego': _id('game', doc['code']),
+        'serie': doc.get('serie'),
+        'usuario': doc.get('user'),
+        'fecha': _date(doc.get('reviewDate')),
+        'puntuacion': doc.get('rating'),
+        'comentario': doc.get('comentary'),
+    }
+
+
+def ranking_record(doc):
+    return {
+        'id': _id('rank', doc['code']),
+        'usuario': doc.get('user'),
+        'categoria': _id('cat', doc['category']),
+        'fecha': _date(doc.get('rankDate')),
+        'juegos': [_id('game', c) for c in doc.get('rankingList') or []],
+    }
+
+
+# Sección: (modelo, campos leídos de Mongo, conversión a registro)
+SECTIONS = {
+    'categorias': (Categoria, ('code', 'name', 'desc', 'image'), categoria_record),
+    'videojuegos': (Videojuego, ('code', 'name', 'developer', 'publisher', 'category', 'desc', 'release_date',
+                                 'platforms', 'image', 'price', 'age_rating', 'duration', 'multiplayer'),
+                    videojuego_record),
+    'reviews': (Review, ('code', 'serie', 'user', 'reviewDate', 'rating', 'comentary'), review_record),
+    'rankings': (Ranking, ('code', 'user', 'category', 'rankDate', 'rankingList'), ranking_record),
+}
+
+
+def export_query(section, since=None):
+    """Filtro de Mongo de una sección; con ``since`` (date) solo lo posterior, si tiene fecha."""
+    field = DATE_FIELDS.get(section)
+    if since is None or field is None:
+        return {}
+    return {field: {'$gte': datetime.datetime.combine(since, datetime.time.min)}}
+
+
+def iter_records(sections, since=None, batch_size=BATCH_SIZE, collections=None):
+    """(sección, registro) de las secciones pedidas, en el orden de SECTION_ORDER."""
+    collections = collections or {}
+    for section in SECTION_ORDER:
+        if section not in sections:
+            continue
+        model, fields, to_record = SECTIONS[section]
+        collection = collections.get(section) or get_collection(model)
+        cursor = collection.find(export_query(section, since), {'_id': 0, **{f: 1 for f in fields}},
+                                 batch_size=batch_size)
+        try:
+            for doc in cursor:
+                yield section, to_record(doc)
+        finally:
+            cursor.close()
+
+
+def ndjson_lines(records, counts=None):
+    """Líneas NDJSON (bytes) de los registros; ``counts`` acumula registros por sección."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    for section, record in records:
+        if counts is not None:
+            counts[section] = counts.get(section, 0) + 1
+        yield (encoder.encode({'seccion': section, **record}) + '\n').encode('utf-8')
+
+
+def gzip_chunks(lines, level=6):
+    """Comprime las líneas en formato gzip y devuelve los trozos a medida que salen."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    pending, size = [], 0
+    for line in lines:
+        pending.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            chunk = compressor.compress(b''.join(pending))
+            pending, size = [], 0
+            if chunk:
+                yield chunk
+    yield compressor.compress(b''.join(pending)) + compressor.flush()
+
+
+def export_chunks(sections, since=None, counts=None, collections=None):
+    """Trozos gzip del volcado NDJSON de ``sections``."""
+    return gzip_chunks(ndjson_lines(iter_records(sections, since, collections=collections), counts))
@@ -36,7 +36,7 @@ class LoginForm(AuthenticationForm):
 
 class UploadJSONForm(forms.Form):
     json_file = forms.FileField(
-        label="Selecciona un archivo JSON",
+        label="Selecciona un archivo JSON o NDJSON",
         widget=forms.FileInput(attrs={'class': 'file-input'})
     )
 
@@ -0,0 +1,601 @@
+"""
+Importación del catálogo (categorías, videojuegos, reseñas y tier lists) en
+MongoDB.
+
+En lugar de un exists() + update()/create() por registro, los registros se
+agrupan en lotes y cada lote se escribe con un único bulk_write desordenado
+de upserts por ``code``. Cada documento guarda una huella de su contenido
+(``content_hash``) y los registros que no han cambiado no se reescriben.
+Las claves de los registros del fichero se apuntan, con el id de la
+importación, en una colección auxiliar ('import_seen'): los ausentes son
+los documentos de la sección menos los vistos. Así los documentos sin
+cambios no se tocan.
+
+El fichero se puede leer en streaming (import_catalog_stream): los arrays
+'categorias' y 'videojuegos' se recorren elemento a elemento y solo se
+mantiene en memoria el lote en curso, sea cual sea el tamaño del fichero.
+También se aceptan ficheros NDJSON (un registro por línea con su
+"seccion", el formato de rankingsafa.export), comprimidos o no con gzip.
+Tras importar reseñas o tier lists hay que recalcular lo que se deriva de
+ellas (rebuild_derived).
+"""
+import codecs
+import datetime
+import gzip
+import hashlib
+import json
+import logging
+import uuid
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .catalog import short_description
+from .models import Categoria, Ranking, Review, Videojuego
+from .mongo import get_collection
+from .review_stats import EMPTY_STATS, rebuild_review_stats
+from .scores import rebuild_scores
+from .sequences import COUNTERS_COLLECTION, collection_max, discard_block, raise_to
+
+logger = logging.getLogger(__name__)
+
+# Registros por lote (un round trip a Mongo por lote)
+BATCH_SIZE = 1000
+
+# Bytes leídos del fichero en cada lectura del modo streaming
+READ_SIZE = 64 * 1024
+
+
+class InvalidRecord(ValueError):
+    """Registro del catálogo que no supera la validación."""
+
+
+class CatalogFormatError(ValueError):
+    """El fichero no tiene la estructura JSON esperada del catálogo."""
+
+
+# ---------- Validación y normalización de registros ----------
+
+def _parse_code(raw_id, prefix):
+    """Extrae el código numérico de ids tipo 'cat_003' o 'game_013'."""
+    if not isinstance(raw_id, str):
+        raise InvalidRecord(f'id no válido: {raw_id!r}')
+    head, sep, tail = raw_id.strip().partition('_')
+    if head != prefix or not sep or not tail.isdigit():
+        raise InvalidRecord(f'id no válido: {raw_id!r}')
+    return int(tail)
+
+
+def _text(data, key, required=False):
+    value = data.get(key)
+    if value is None:
+        value = ''
+    if not isinstance(value, str):
+        raise InvalidRecord(f'{key}: se esperaba texto')
+    value = value.strip()
+    if required and not value:
+        raise InvalidRecord(f'{key}: campo obligatorio')
+    return value
+
+
+def _number(data, key, cast, default):
+    value = data.get(key)
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        raise InvalidRecord(f'{key}: se esperaba un número')
+    try:
+        value = cast(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f'{key}: se esperaba un número')
+    if value < 0:
+        raise InvalidRecord(f'{key}: no puede ser negativo')
+    return value
+
+
+def _flag(data, key):
+    value = data.get(key, False)
+    if isinstance(value, str):
+        return value.strip().lower() in ('true', '1', 'si', 'sí', 'yes')
+    return bool(value)
+
+
+def _as_datetime(value):
+    """Mongo no tiene tipo fecha: los DateField se guardan como datetime."""
+    if not value:
+        return None
+    try:
+        date = datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise InvalidRecord(f'fecha no válida: {value!r}')
+    return datetime.datetime.combine(date, datetime.datetime.min.time())
+
+
+def categoria_doc(cat_data):
+    """Valida una categoría del JSON y la convierte en documento de 'categorias'."""
+    if not isinstance(cat_data, dict):
+        raise InvalidRecord('la categoría no es un objeto')
+
+    return {
+        'code': _parse_code(cat_data.get('id'), 'cat'),
+        'name': _text(cat_data, 'nombre', required=True),
+        'desc': _text(cat_data, 'descripcion'),
+        'image': _text(cat_data, 'imagen_url') or _text(cat_data, 'image'),
+    }
+
+
+def videojuego_doc(game_data):
+    """Valida un videojuego del JSON y lo convierte en documento de 'videojuegos'."""
+    if not isinstance(game_data, dict):
+        raise InvalidRecord('el videojuego no es un objeto')
+
+    # Las referencias a categorías mal formadas se ignoran, como siempre
+    category_codes = []
+    for cat_id in game_data.get('categorias') or []:
+        try:
+            cat_code = _parse_code(cat_id, 'cat')
+        except InvalidRecord:
+            continue
+        if cat_code not in category_codes:
+            category_codes.append(cat_code)
+
+    platforms = game_data.get('plataformas') or []
+    if not isinstance(platforms, list):
+        raise InvalidRecord('plataformas: se esperaba una lista')
+
+    desc = _text(game_data, 'descripcion')
+    return {
+        'code': _parse_code(game_data.get('id'), 'game'),
+        'name': _text(game_data, 'nombre', required=True),
+        'desc': desc,
+        'short_desc': short_description(desc),
+        'category': category_codes,
+        'image': _text(game_data, 'imagen_url'),
+        'developer': _text(game_data, 'desarrollador'),
+        'publisher': _text(game_data, 'publisher'),
+        'release_date': _as_datetime(game_data.get('fecha_lanzamiento')),
+        'platforms': [p.strip() for p in platforms if isinstance(p, str) and p.strip()],
+        'price': _number(game_data, 'precio_actual', float, 0.0),
+        'age_rating': _text(game_data, 'clasificacion_edad'),
+        'duration': _number(game_data, 'duracion_aproximada', int, 0),
+        'multiplayer': _flag(game_data, 'multijugador'),
+    }
+
+
+def review_doc(review_data):
+    """Valida una reseña del JSON y la convierte en documento de 'reviews'."""
+    if not isinstance(review_data, dict):
+        raise InvalidRecord('la reseña no es un objeto')
+
+    rating = _number(review_data, 'puntuacion', int, 0)
+    if rating > 5:
+        raise InvalidRecord('puntuacion: debe estar entre 0 y 5')
+    serie = _number(review_data, 'serie', int, None)
+    if serie is None:
+        raise InvalidRecord('serie: campo obligatorio')
+    review_date = _as_datetime(review_data.get('fecha'))
+    if review_date is None:
+        raise InvalidRecord('fecha: campo obligatorio')
+    return {
+        'code': _parse_code(review_data.get('juego'), 'game'),
+        'serie': serie,
+        'user': _text(review_data, 'usuario', required=True),
+        'reviewDate': review_date,
+        'rating': rating,
+        'comentary': _text(review_data, 'comentario'),
+    }
+
+
+def ranking_doc(ranking_data):
+    """Valida una tier list del JSON y la convierte en documento de 'rankings'."""
+    if not isinstance(ranking_data, dict):
+        raise InvalidRecord('la tier list no es un objeto')
+
+    games = ranking_data.get('juegos') or []
+    if not isinstance(games, list):
+        raise InvalidRecord('juegos: se esperaba una lista')
+    # El orden es la tier list: un juego mal formado invalida el registro
+    ranking_list = [_parse_code(game_id, 'game') for game_id in games]
+    rank_date = _as_datetime(ranking_data.get('fecha'))
+    if rank_date is None:
+        raise InvalidRecord('fecha: campo obligatorio')
+    return {
+        'code': _parse_code(ranking_data.get('id'), 'rank'),
+        'user': _text(ranking_data, 'usuario', required=True),
+        'category': _parse_code(ranking_data.get('categoria'), 'cat'),
+        'rankDate': rank_date,
+        'rankingList': ranking_list,
+    }
+
+
+# Secciones del catálogo: modelo destino y normalizador de cada registro
+SECTIONS = {
+    'categorias': (Categoria, categoria_doc),
+    'videojuegos': (Videojuego, videojuego_doc),
+    'reviews': (Review, review_doc),
+    'rankings': (Ranking, ranking_doc),
+}
+
+# Campos que identifican un documento de cada sección (por defecto 'code')
+KEYS = {
+    'reviews': ('code', 'serie'),
+}
+
+# Colección auxiliar con las claves vistas en cada importación
+SEEN_COLLECTION = 'import_seen'
+
+# Campos que la importación solo escribe en los documentos nuevos
+ON_INSERT = {
+    'videojuegos': EMPTY_STATS,
+}
+
+
+# ---------- Lectura en streaming ----------
+
+class _JSONStream:
+    """
+    Lector incremental sobre un fichero JSON. Mantiene en memoria solo el
+    texto pendiente de consumir (a lo sumo un valor más una lectura).
+    """
+
+    def __init__(self, fileobj, read_size=READ_SIZE):
+        self._file = fileobj
+        self._read_size = read_size
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._json = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        """Lee el siguiente bloque del fichero. Devuelve False al llegar al final."""
+        if self._eof:
+            return False
+        chunk = self._file.read(self._read_size)
+        if isinstance(chunk, bytes):
+            text = self._decoder.decode(chunk, final=not chunk)
+        else:
+            text = chunk
+        if not chunk:
+            self._eof = True
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return bool(chunk)
+
+    def peek(self):
+        """Devuelve el siguiente carácter significativo sin consumirlo ('' al final)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise CatalogFormatError(f'Se esperaba {char!r} y se encontró {found or "fin de fichero"!r}')
+        self._pos += 1
+
+    def value(self):
+        """Decodifica el siguiente valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                obj, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError as e:
+                # El valor puede estar partido entre dos lecturas
+                if self._fill():
+                    continue
+                raise CatalogFormatError(f'JSON no válido: {e}')
+            # Un número al final del búfer podría continuar en la siguiente lectura
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+
+def iter_catalog(fileobj, read_size=READ_SIZE):
+    """
+    Recorre un fichero de catálogo sin cargarlo entero. Produce tuplas
+    (sección, registro) para cada elemento de las secciones conocidas;
+    el resto de claves de primer nivel se ignoran.
+    """
+    stream = _JSONStream(fileobj, read_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+
+    while True:
+        key = stream.value()
+        if not isinstance(key, str):
+            raise CatalogFormatError('Las claves de primer nivel deben ser texto')
+        stream.expect(':')
+
+        if key in SECTIONS and stream.peek() == '[':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield key, stream.value()
+                    if stream.peek() == ',':
+                        stream.expect(',')
+                    else:
+                        stream.expect(']')
+                        break
+        else:
+            stream.value()
+
+        if stream.peek() == ',':
+            stream.expect(',')
+        else:
+            stream.expect('}')
+            return
+
+
+def iter_ndjson(fileobj):
+    """(sección, registro) de un fichero NDJSON con la sección en "seccion"."""
+    for number, line in enumerate(fileobj, 1):
+        if number == 1 and isinstance(line, bytes):
+            line = line.removeprefix(codecs.BOM_UTF8)
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise CatalogFormatError(f'Línea {number}: JSON no válido: {e}')
+        if not isinstance(record, dict):
+            raise CatalogFormatError(f'Línea {number}: se esperaba un objeto')
+        section = record.pop('seccion', None)
+        if section in SECTIONS:
+            yield section, record
+
+
+def catalog_records(fileobj, name='', read_size=READ_SIZE):
+    """
+    (sección, registro) de un fichero de catálogo. Por el nombre se sabe si
+    es NDJSON (.ndjson, .jsonl) y si viene comprimido (.gz); si no, se lee
+    como un objeto JSON con las secciones.
+    """
+    name = name.lower()
+    if name.endswith('.gz'):
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode='rb')
+        name = name[:-3]
+    if name.endswith(('.ndjson', '.jsonl')):
+        return iter_ndjson(fileobj)
+    return iter_catalog(fileobj, read_size)
+
+
+# ---------- Escritura por lotes ----------
+
+def content_hash(doc):
+    """Huella estable del contenido normalizado de un documento."""
+    payload = {k: v for k, v in doc.items() if k != 'content_hash'}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str, ensure_ascii=False)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def _empty_counts():
+    return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+
+
+def new_run():
+    """Id de una importación, con el que se apuntan las claves vistas en el fichero."""
+    return uuid.uuid4().hex
+
+
+def upsert_batch(collection, docs, on_insert=None, key=('code',), on_written=None):
+    """
+    Escribe un lote de documentos con upserts desordenados por los campos
+    de ``key``.
+
+    Cada documento lleva su ``content_hash``; antes de escribir se leen en
+    una sola consulta las huellas guardadas del lote y solo se envían los
+    documentos nuevos o modificados. ``on_insert`` son campos que solo se
+    escriben al crear el documento. ``on_written(docs)`` recibe los
+    documentos del lote que quedan en Mongo (sin cambios o escritos sin
+    error). Devuelve los contadores del lote: insertados, actualizados, sin
+    cambios y fallidos.
+    """
+    counts = _empty_counts()
+    if not docs:
+        return counts
+
+    for doc in docs:
+        doc['content_hash'] = content_hash(doc)
+    # Con clave compuesta se piden todas las combinaciones de los valores
+    # del lote (por índice) y se descartan en Python las que no están
+    stored = {
+        tuple(d.get(field) for field in key): d.get('content_hash')
+        for d in collection.find({field: {'$in': list({doc[field] for doc in docs})} for field in key},
+                                 {'_id': 0, 'content_hash': 1, **{field: 1 for field in key}})
+    }
+    changed, unchanged = [], []
+    for doc in docs:
+        same = stored.get(tuple(doc[field] for field in key), '') == doc['content_hash']
+        (unchanged if same else changed).append(doc)
+    counts['unchanged'] = len(unchanged)
+
+    failed = set()
+    if changed:
+        update = {'$setOnInsert': on_insert} if on_insert else {}
+        operations = [
+            UpdateOne({field: doc[field] for field in key}, {'$set': doc, **update}, upsert=True)
+            for doc in changed
+        ]
+        try:
+            result = collection.bulk_write(operations, ordered=False)
+            counts['inserted'] = result.upserted_count
+            counts['updated'] = result.matched_count
+        except BulkWriteError as e:
+            # Con ordered=False Mongo aplica el resto del lote aunque fallen algunos
+            details = e.details
+            failed = {error['index'] for error in details.get('writeErrors', [])}
+            counts['inserted'] = details.get('nUpserted', 0)
+            counts['updated'] = details.get('nMatched', 0)
+            counts['failed'] = len(failed)
+    if on_written:
+        on_written(unchanged + [doc for i, doc in enumerate(changed) if i not in failed])
+    return counts
+
+
+def mark_seen(section, docs, run, key=('code',), collection=None):
+    """
+    Apunta en la colección auxiliar 'import_seen' las claves de ``docs``
+    vistas en la importación ``run``. El _id incluye importación, sección y
+    clave, así una clave repetida en el fichero cuenta una sola vez.
+    """
+    collection = collection or get_collection(SEEN_COLLECTION)
+    ids = {f'{run}:{section}:' + ':'.join(str(doc[field]) for field in key) for doc in docs}
+    if not ids:
+        return
+    try:
+        collection.insert_many([{'_id': _id, 'run': run, 'section': section} for _id in ids], ordered=False)
+    except BulkWriteError as e:
+        if any(error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+            raise
+
+
+def count_missing(section, run, collection=None, seen=None):
+    """Documentos de la sección que existen en Mongo pero no venían en el fichero de la importación ``run``."""
+    collection = collection or get_collection(SECTIONS[section][0])
+    seen = seen or get_collection(SEEN_COLLECTION)
+    return collection.count_documents({}) - seen.count_documents({'run': run, 'section': section})
+
+
+def clear_seen(run, collection=None):
+    """Borra las claves apuntadas de la importación ``run``."""
+    collection = collection or get_collection(SEEN_COLLECTION)
+    collection.delete_many({'run': run})
+
+
+def raise_sequences(section, docs, counters=None, collection=None):
+    """
+    Los códigos vienen del fichero: la secuencia de la sección (o la de
+    series de cada juego, en las reseñas) no debe volver a entregarlos al
+    crear desde la web. Si la secuencia aún no existe se siembra con el
+    máximo de ``collection`` (puede haber valores guardados mayores que los
+    del fichero).
+    """
+    collection = collection or get_collection(SECTIONS[section][0])
+    if section == 'reviews':
+        top = {}
+        for doc in docs:
+            top[doc['code']] = max(top.get(doc['code'], 0), doc['serie'])
+        for game_code, serie in top.items():
+            raise_to(f'reviews:{game_code}', serie, counters,
+                     lambda game_code=game_code: collection_max(collection, 'serie', {'code': game_code}))
+            discard_block(f'reviews:{game_code}')
+    else:
+        raise_to(section, max(doc['code'] for doc in docs), counters, lambda: collection_max(collection, 'code'))
+        discard_block(section)
+
+
+def rebuild_derived(sections):
+    """
+    Recalcula las estadísticas de reseñas de los juegos y las puntuaciones
+    de los rankings si se han importado reseñas o tier lists.
+    """
+    if 'reviews' in sections:
+        rebuild_review_stats()
+    if 'rankings' in sections:
+        rebuild_scores()
+
+
+def import_records(records, batch_size=BATCH_SIZE, collections=None, on_batch=None, track_missing=True, run=None):
+    """
+    Valida y escribe un iterable de tuplas (sección, registro) en lotes de
+    ``batch_size`` por sección. Los registros no válidos cuentan como
+    fallidos en su lote. ``collections`` permite inyectar colecciones
+    (p. ej. en los benchmarks), por sección, 'counters' e 'import_seen'; por
+    defecto se usan las de los modelos.
+    ``on_batch(sección, contadores)`` se llama tras escribir cada lote.
+
+    ``run`` es el id con el que se apuntan las claves vistas (uno nuevo si no
+    se pasa; import_catalog usa el mismo en todos sus procesos).
+
+    Devuelve {sección: [lotes], ..., 'missing': {...}}, donde 'missing' cuenta por sección los documentos que ya no vienen en el
+    fichero (solo se calcula si ``track_missing`` y la sección aparece; después
+    se borran las claves apuntadas).
+    """
+    collections = collections or {}
+    run = run or new_run()
+    report = {section: [] for section in SECTIONS}
+    report['missing'] = {}
+    pending = {section: [] for section in SECTIONS}
+    invalid = {section: 0 for section in SECTIONS}
+    present = set()
+    seen = collections.get(SEEN_COLLECTION) or get_collection(SEEN_COLLECTION)
+
+    def collection_for(section):
+        return collections.get(section) or get_collection(SECTIONS[section][0])
+
+    def flush(section):
+        if not pending[section] and not invalid[section]:
+            return
+        key = KEYS.get(section, ('code',))
+        counts = upsert_batch(collection_for(section), pending[section], ON_INSERT.get(section), key,
+                              lambda docs: mark_seen(section, docs, run, key, seen))
+        if pending[section]:
+            raise_sequences(section, pending[section], collections.get(COUNTERS_COLLECTION), collection_for(section))
+        counts['failed'] += invalid[section]
+        report[section].append(counts)
+        if on_batch:
+            on_batch(section, counts)
+        pending[section] = []
+        invalid[section] = 0
+
+    for section, record in records:
+        present.add(section)
+        to_doc = SECTIONS[section][1]
+        try:
+            doc = to_doc(record)
+        except InvalidRecord as e:
+            invalid[section] += 1
+            logger.warning('Registro de %s descartado: %s', section, e)
+        else:
+            pending[section].append(doc)
+        if len(pending[section]) + invalid[section] >= batch_size:
+            flush(section)
+
+    for section in SECTIONS:
+        flush(section)
+        if track_missing and section in present:
+            report['missing'][section] = count_missing(section, run, collection_for(section), seen)
+    if track_missing:
+        clear_seen(run, seen)
+    return report
+
+
+def import_catalog(data, batch_size=BATCH_SIZE, collections=None):
+    """Importa un catálogo ya cargado en memoria (dict con las secciones)."""
+    records = (
+        (section, record)
+        for section in SECTIONS
+        for record in data.get(section) or []
+    )
+    return import_records(records, batch_size, collections)
+
+
+def import_catalog_stream(fileobj, batch_size=BATCH_SIZE, collections=None, on_batch=None, name=''):
+    """
+    Importa un catálogo leyéndolo en streaming desde un fichero abierto.
+    ``name`` es el nombre del fichero original (ver catalog_records).
+    """
+    return import_records(catalog_records(fileobj, name), batch_size, collections, on_batch)
+
+
+def report_totals(report):
+    """
+    Resumen de diferencias de un informe de importación: nuevos (inserted),
+    modificados (updated), sin cambios, fallidos y ausentes del fichero.
+    """
+    totals = _empty_counts()
+    for section in SECTIONS:
+        for batch in report.get(section, []):
+            for key in totals:
+                totals[key] += batch[key]
+    totals['missing'] = sum(report.get('missing', {}).values())
+    return totals
@@ -0,0 +1,235 @@
+"""
+Índices de las colecciones de Mongo.
+
+Los modelos de Mongo son managed=False y MongoRouter no les deja migrar, así
+que Django nunca crea sus índices. La especificación se declara junto a los
+modelos, en Meta.indexes y Meta.constraints (únicos), y se completa aquí con:
+
+- un índice único por la clave primaria declarada y por cada campo
+  unique=True;
+- los de las colecciones sin modelo (ranking_scores, ranking_buckets e
+  import_seen).
+
+sync_indexes compara la especificación con lo que hay en Mongo y crea o
+rehace lo necesario (comando sync_mongo_indexes); los índices que no están
+en la especificación, como los que un operador crea a mano, solo se borran
+si se pide (--drop-unknown). check_query_plans ejecuta
+explain sobre las consultas de las vistas y señala las que recorren la
+colección entera (comando check_query_plans).
+"""
+from collections import namedtuple
+from datetime import datetime
+
+from bson import json_util
+from django.apps import apps
+from django.db import models
+from pymongo import ASCENDING, DESCENDING
+
+from .catalog import LIST_FIELDS, counts_pipeline, game_query, page_filter
+from .importer import SEEN_COLLECTION
+from .models import Categoria, ImportJob, Ranking, Review, Videojuego
+from .mongo import get_collection
+from .scores import BUCKETS_COLLECTION, SCORES_COLLECTION
+
+MongoIndex = namedtuple('MongoIndex', 'name keys unique')
+
+# Colecciones sin modelo
+EXTRA_INDEXES = {
+    SCORES_COLLECTION: [
+        MongoIndex('ranking_scores_key', (('category', ASCENDING), ('code', ASCENDING)), True),
+    ],
+    BUCKETS_COLLECTION: [
+        MongoIndex('ranking_buckets_key', (('category', ASCENDING), ('kind', ASCENDING),
+                                           ('start', ASCENDING), ('code', ASCENDING)), True),
+    ],
+    SEEN_COLLECTION: [
+        MongoIndex('import_seen_run', (('run', ASCENDING), ('section', ASCENDING)), False),
+    ],
+}
+
+
+def _keys(model, fields):
+    keys = []
+    for name in fields:
+        direction = DESCENDING if name.startswith('-') else ASCENDING
+        keys.append((model._meta.get_field(name.lstrip('-')).column, direction))
+    return tuple(keys)
+
+
+def model_indexes(model):
+    """Índices de Mongo de un modelo no gestionado."""
+    table = model._meta.db_table
+    found = []
+    for field in model._meta.concrete_fields:
+        # El 'id' automático de Review y Ranking no se guarda en Mongo
+        if (field.primary_key or field.unique) and not field.auto_created and field.column != '_id':
+            found.append(MongoIndex(f'{table}_{field.column}', ((field.column, ASCENDING),), True))
+    for constraint in model._meta.constraints:
+        if isinstance(constraint, models.UniqueConstraint) and constraint.fields:
+            found.append(MongoIndex(constraint.name, _keys(model, constraint.fields), True))
+    for index in model._meta.indexes:
+        found.append(MongoIndex(index.name, _keys(model, index.fields), False))
+    return found
+
+
+def index_spec():
+    """{colección: [MongoIndex]} de todos los modelos de Mongo y de EXTRA_INDEXES."""
+    spec = {}
+    for model in apps.get_app_config('rankingsafa').get_models():
+        if model._meta.managed is False:
+            spec[model._meta.db_table] = model_indexes(model)
+    for name, wanted in EXTRA_INDEXES.items():
+        spec.setdefault(name, []).extend(wanted)
+    return spec
+
+
+def index_changes(collection, wanted, drop=False):
+    """
+    (nombres a borrar, MongoIndex a crear) para dejar ``collection`` como
+    ``wanted``. Un índice con el nombre de uno de la especificación pero
+    otra definición se borra y se vuelve a crear; los que no están en la
+    especificación solo se borran con ``drop``.
+    """
+    by_name = {index.name: index for index in wanted}
+    to_drop, kept = [], set()
+    for name, info in collection.index_information().items():
+        if name == '_id_':
+            continue
+        index = by_name.get(name)
+        if index is None:
+            if drop:
+                to_drop.append(name)
+        elif tuple((f, int(d)) for f, d in info['key']) == index.keys and bool(info.get('unique')) == index.unique:
+            kept.add(name)
+        else:
+            to_drop.append(name)
+    return to_drop, [index for index in wanted if index.name not in kept]
+
+
+def sync_indexes(database=None, drop=False, dry_run=False, only=None):
+    """
+    Ajusta los índices de Mongo a index_spec(). Devuelve las acciones como
+    (colección, 'crear' | 'borrar', nombre). ``only`` limita las colecciones;
+    con ``drop`` se borran también los índices que no están en la especificación.
+    """
+    actions = []
+    for name, wanted in index_spec().items():
+        if only and name not in only:
+            continue
+        collection = database[name] if database is not None else get_collection(name)
+        to_drop, to_create = index_changes(collection, wanted, drop)
+        # Primero se borra: un índice con las mismas claves y otro nombre impediría crear el nuevo
+        for index_name in to_drop:
+            actions.append((name, 'borrar', index_name))
+            if not dry_run:
+                collection.drop_index(index_name)
+        for index in to_create:
+            actions.append((name, 'crear', index.name))
+            if not dry_run:
+                collection.create_index(list(index.keys), name=index.name, unique=index.unique)
+    return actions
+
+
+# ---------- Planes de consulta ----------
+
+class RawQuery:
+    """Consulta pymongo (find o aggregate) a la que se le puede pedir explain."""
+
+    def __init__(self, collection, filter=None, sort=None, limit=0, pipeline=None):
+        self.collection = collection
+        self.filter = filter or {}
+        self.sort = sort
+        self.limit = limit
+        self.pipeline = pipeline
+
+    def __str__(self):
+        return f'{self.collection}: {self.pipeline if self.pipeline is not None else self.filter}'
+
+    def explain(self):
+        collection = get_collection(self.collection)
+        if self.pipeline is not None:
+            return collection.database.command(
+                'explain', {'aggregate': self.collection, 'pipeline': self.pipeline, 'cursor': {}},
+                verbosity='queryPlanner',
+            )
+        cursor = collection.find(self.filter)
+        if self.sort:
+            cursor = cursor.sort(self.sort)
+        return cursor.limit(self.limit).explain()
+
+
+# Consultas que recorren la colección a sabiendas, con el motivo. Se
+# muestran en check_query_plans pero no lo hacen fallar. Ahora no hay
+# ninguna: los recuentos sin filtro de games_list sí recorren el catálogo,
+# pero no están en view_queries (una vez por versión, ver catalog.facet_counts).
+EXPECTED_COLLSCAN = {}
+
+
+def view_queries():
+    """
+    (vista, consulta) con las consultas que hacen las vistas y los módulos
+    que usan, con valores de ejemplo. Las del ORM son los mismos QuerySet;
+    las de pymongo, RawQuery con el mismo filtro o la misma agregación.
+    """
+    return [
+        ('mostrar_inicio', Videojuego.objects.only(*LIST_FIELDS['inicio']).filter(code__gt=0).order_by('code')[:25]),
+        ('juego_list', Videojuego.objects.only(*LIST_FIELDS['juego_list']).filter(code__lt=1000).order_by('-code')[:51]),
+        ('buscar', Videojuego.objects.filter(code__in=[1, 2, 3]).only(*LIST_FIELDS['inicio'])),
+        ('game_detail', Videojuego.objects.filter(pk=1)),
+        ('categoria_games', Videojuego.objects.filter(category=1).only(*LIST_FIELDS['categoria_games'])),
+        # games_list: página por clave y recuentos de la barra lateral, tal cual
+        ('games_list', RawQuery('videojuegos', page_filter([1, 2], ['PC'], after=0)[0], [('code', 1)], 49)),
+        ('games_list', RawQuery('videojuegos', pipeline=counts_pipeline('category', game_query(platforms=['PC'])))),
+        ('games_list', RawQuery('videojuegos', pipeline=counts_pipeline('platforms', game_query(categories=[1, 2])))),
+        ('game_detail', Review.objects.filter(code=1).order_by('-reviewDate', '-serie')[:21]),
+        ('game_detail', Review.objects.filter(code=1, user='usuario')),
+        ('review_edit', Review.objects.filter(code=1, serie=1)),
+        ('categoria_update', Categoria.objects.filter(pk=1)),
+        ('ranking_categoria_global', Ranking.objects.filter(category=1)),
+        ('ranking_categoria_global', RawQuery(SCORES_COLLECTION, {'category': 1, 'votes': {'$gt': 0}})),
+        ('ranking_categoria_global', RawQuery(BUCKETS_COLLECTION, {'category': 1, 'kind': 'year', 'start': datetime(2025, 1, 1)})),
+        ('ranking_crear', Ranking.objects.filter(user='usuario', category=1)),
+        # rankingsafa.api: find con orden y cursor (?after=)
+        ('api_juegos', RawQuery('videojuegos', {'category': {'$in': [1]}, 'code': {'$gt': 100}}, [('code', 1)], 101)),
+        ('api_reviews', RawQuery('reviews', {'code': 1, '$or': [
+            {'reviewDate': {'$lt': datetime(2025, 1, 1)}},
+            {'reviewDate': datetime(2025, 1, 1), 'serie': {'$lt': 10}},
+        ]}, [('reviewDate', -1), ('serie', -1)], 101)),
+        ('export_ndjson', RawQuery('reviews', {'reviewDate': {'$gte': datetime(2025, 1, 1)}})),
+        ('export_ndjson', RawQuery('rankings', {'rankDate': {'$gte': datetime(2025, 1, 1)}})),
+        ('import_job_list', ImportJob.objects.order_by('-created')[:50]),
+        ('import_job_detail', ImportJob.objects.filter(pk='x')),
+    ]
+
+
+def plan_stages(plan):
+    """Todas las etapas ('stage') de un explain, a cualquier profundidad."""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+def explain(query):
+    """Explain de un QuerySet o de un RawQuery, como diccionario."""
+    if isinstance(query, RawQuery):
+        return query.explain()
+    # El backend de Mongo devuelve el explain serializado con json_util
+    return json_util.loads(query.explain())
+
+
+def check_query_plans(queries=None):
+    """
+    ([(vista, consulta, etapas)] de las consultas que hacen COLLSCAN,
+    [(vista, consulta, etapas)] de las que lo hacen y están en EXPECTED_COLLSCAN).
+    """
+    failures, expected = [], []
+    for view, query in queries if queries is not None else view_queries():
+        stages = list(plan_stages(explain(query)))
+        if 'COLLSCAN' in stages:
+            (expected if view in EXPECTED_COLLSCAN else failures).append((view, query, stages))
+    return failures, expected
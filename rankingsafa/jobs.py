@@ -0,0 +1,121 @@
+"""
+Importaciones del catálogo en segundo plano.
+
+La petición solo guarda el fichero subido y registra un ImportJob; la
+importación corre en un pool de hilos del proceso y va anotando su progreso
+(registros procesados, errores y registros/segundo) en 'import_jobs'. Al
+terminar se guarda el resumen de diferencias con el catálogo existente.
+
+Los hilos mueren con el proceso: un reinicio o un despliegue deja trabajos
+'en_curso' que ya no avanzan y trabajos 'pendiente' que nadie va a ejecutar.
+Al desplegar, antes de arrancar los servidores, hay que ejecutar
+
+    python manage.py recover_import_jobs
+
+que marca los interrumpidos como fallidos (y borra su fichero) y ejecuta
+los pendientes (ver recover_jobs).
+"""
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .catalog import invalidate_catalog
+from .categories import invalidate_categories
+from .importer import import_catalog_stream, rebuild_derived, report_totals
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMPORT_JOB_WORKERS', 2),
+    thread_name_prefix='import-job',
+)
+
+
+def submit_import(uploaded_file, username):
+    """Guarda el fichero subido, crea su ImportJob y lo encola. No bloquea."""
+    code = uuid.uuid4().hex
+    path = default_storage.save(f'imports/{code}.json', uploaded_file)
+    job = ImportJob.objects.create(
+        code=code,
+        user=username,
+        filename=uploaded_file.name,
+        path=path,
+    )
+    _executor.submit(run_import, code)
+    return job
+
+
+def run_import(code):
+    """Ejecuta un ImportJob y actualiza su progreso tras cada lote."""
+    close_old_connections()
+    jobs = ImportJob.objects.filter(pk=code)
+    job = jobs.first()
+    if job is None:
+        return
+
+    # Solo un proceso puede pasar el trabajo de pendiente a en curso
+    started = timezone.now()
+    if not jobs.filter(status='pendiente').update(status='en_curso', started=started):
+        return
+    t0 = time.perf_counter()
+    progress = {'processed': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    sections = set()
+
+    def on_batch(section, counts):
+        sections.add(section)
+        for key in ('inserted', 'updated', 'unchanged', 'failed'):
+            progress[key] += counts[key]
+            progress['processed'] += counts[key]
+        elapsed = time.perf_counter() - t0
+        jobs.update(throughput=round(progress['processed'] / elapsed, 1) if elapsed else 0, **progress)
+
+    try:
+        with default_storage.open(job.path, 'rb') as json_file:
+            report = import_catalog_stream(json_file, on_batch=on_batch, name=job.filename)
+        jobs.update(status='completado', finished=timezone.now(), missing=report_totals(report)['missing'])
+    except Exception as e:
+        logger.exception('Fallo en la importación %s', code)
+        jobs.update(status='fallido', finished=timezone.now(), error=str(e))
+    finally:
+        # También una importación fallida puede haber escrito juegos y categorías
+        try:
+            rebuild_derived(sections)
+        except Exception:
+            logger.exception('Fallo al recalcular las estadísticas tras la importación %s', code)
+        invalidate_categories()
+        invalidate_catalog()
+        default_storage.delete(job.path)
+        close_old_connections()
+
+
+def recover_jobs(run_pending=True):
+    """
+    Recupera los trabajos que dejó a medias un reinicio: los 'en_curso' pasan
+    a 'fallido' y se borra su fichero; los 'pendiente' se ejecutan aquí, uno
+    detrás de otro, si ``run_pending``. Solo es seguro sin servidores
+    ejecutando importaciones. Devuelve (interrumpidos, pendientes).
+    """
+    interrupted = list(ImportJob.objects.filter(status='en_curso'))
+    for job in interrupted:
+        ImportJob.objects.filter(pk=job.pk, status='en_curso').update(
+            status='fallido', finished=timezone.now(), error='Interrumpida por un reinicio del servidor.',
+        )
+        if default_storage.exists(job.path):
+            default_storage.delete(job.path)
+    if interrupted:
+        # Puede haber escrito parte del catálogo antes de interrumpirse
+        invalidate_categories()
+        invalidate_catalog()
+
+    pending = list(ImportJob.objects.filter(status='pendiente').order_by('created').values_list('pk', flat=True))
+    if run_pending:
+        for code in pending:
+            run_import(code)
+    return len(interrupted), len(pending)
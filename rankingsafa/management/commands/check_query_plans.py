@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from rankingsafa.indexes import EXPECTED_COLLSCAN, RawQuery, check_query_plans, view_queries
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta explain sobre las consultas de las vistas y falla si alguna '
+        'recorre la colección entera (COLLSCAN), salvo las excepciones documentadas '
+        'en rankingsafa.indexes.EXPECTED_COLLSCAN. Lanzar tras sync_mongo_indexes.'
+    )
+
+    def handle(self, *args, **options):
+        queries = view_queries()
+        failures, expected = check_query_plans(queries)
+        for view, query, stages in expected:
+            self.stdout.write(self.style.WARNING(
+                f'{view} ({self.target(query)}): {" > ".join(stages)}. Excepción: {EXPECTED_COLLSCAN[view]}'
+            ))
+        for view, query, stages in failures:
+            self.stderr.write(f'{view} ({self.target(query)}): {" > ".join(stages)}')
+        if failures:
+            raise CommandError(f'{len(failures)} de {len(queries)} consultas hacen COLLSCAN.')
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(queries)} consultas, ninguna hace COLLSCAN salvo {len(expected)} excepciones documentadas.'
+        ))
+
+    @staticmethod
+    def target(query):
+        # str() de un QuerySet lo ejecutaría; basta con la colección
+        return query if isinstance(query, RawQuery) else query.model._meta.db_table
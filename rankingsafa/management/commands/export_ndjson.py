@@ -0,0 +1,65 @@
+import datetime
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from rankingsafa.export import SECTION_ORDER, export_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca categorías, videojuegos, reseñas y tier lists en NDJSON con gzip '
+        '(formato de importación de upload_json e import_catalog). Con --since o '
+        '--state-file las reseñas y tier lists se exportan de forma incremental.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('sections', nargs='*',
+                            help=f"Secciones a exportar: {', '.join(SECTION_ORDER)} (por defecto, todas)")
+        parser.add_argument('--output', help='Fichero de salida (por defecto export-AAAAMMDD.ndjson.gz)')
+        parser.add_argument('--since', type=datetime.date.fromisoformat,
+                            help='Solo reseñas y tier lists con fecha desde este día (AAAA-MM-DD)')
+        parser.add_argument('--state-file',
+                            help='Guarda el día de esta exportación y lo usa como --since en la siguiente')
+
+    def handle(self, *args, **options):
+        unknown = set(options['sections']) - set(SECTION_ORDER)
+        if unknown:
+            raise CommandError(f"Secciones desconocidas: {', '.join(sorted(unknown))}")
+        today = timezone.localdate()
+        since = options['since']
+        state_file = options['state_file']
+        if since is None and state_file and os.path.exists(state_file):
+            with open(state_file) as f:
+                try:
+                    since = datetime.date.fromisoformat(json.load(f)['since'])
+                except (KeyError, TypeError, ValueError):
+                    raise CommandError(f'El fichero de estado {state_file} no es válido.')
+
+        sections = options['sections'] or SECTION_ORDER
+        output = options['output'] or f'export-{today:%Y%m%d}.ndjson.gz'
+        counts = {}
+        start = time.perf_counter()
+        # Se escribe en un temporal: un volcado a medias nunca ocupa el nombre final
+        tmp_path = output + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for chunk in export_chunks(sections, since, counts):
+                f.write(chunk)
+        os.replace(tmp_path, output)
+
+        # La siguiente exportación vuelve a incluir el día de hoy: lo que se
+        # escriba después de esta no se pierde y al importar se repite sin duplicar
+        if state_file:
+            with open(state_file + '.tmp', 'w') as f:
+                json.dump({'since': today.isoformat()}, f)
+            os.replace(state_file + '.tmp', state_file)
+
+        elapsed = time.perf_counter() - start
+        summary = ', '.join(f'{counts.get(s, 0)} {s}' for s in SECTION_ORDER if s in sections)
+        mode = f'desde {since}' if since else 'completo'
+        self.stdout.write(self.style.SUCCESS(
+            f'Volcado {mode} en {output} ({os.path.getsize(output) / 1e6:.1f} MB, {elapsed:.1f}s): {summary}.'
+        ))
@@ -0,0 +1,188 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Este módulo también se importa en los procesos hijo (arranque 'spawn') antes
+# de configurar Django, por eso lo que toca modelos se importa dentro de las
+# funciones.
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _import_chunk(section, records, batch_size, run):
+    """Importa un trozo del catálogo en un proceso del pool."""
+    from rankingsafa.importer import import_records, report_totals
+
+    # Los ausentes se cuentan en el proceso principal al terminar todos los trozos
+    report = import_records(((section, r) for r in records), batch_size, track_missing=False, run=run)
+    return report_totals(report)
+
+
+def _iter_chunks(path, chunk_size):
+    """Divide el catálogo en trozos numerados de una sola sección."""
+    from rankingsafa.importer import catalog_records
+
+    index = 0
+    section, records = None, []
+    with open(path, 'rb') as json_file:
+        for record_section, record in catalog_records(json_file, path):
+            if records and (record_section != section or len(records) >= chunk_size):
+                yield index, section, records
+                index += 1
+                records = []
+            section = record_section
+            records.append(record)
+    if records:
+        yield index, section, records
+
+
+class Checkpoint:
+    """
+    Trozos ya importados de un fichero, guardados junto a él para poder
+    reanudar una ejecución interrumpida. Solo vale para el mismo fichero
+    (tamaño y fecha de modificación) y el mismo tamaño de trozo. Guarda
+    también el id de la importación: al reanudar, las claves de los trozos
+    ya hechos siguen apuntadas como vistas.
+    """
+
+    def __init__(self, path, source, chunk_size, run):
+        stat = os.stat(source)
+        self.path = path
+        self.identity = {
+            'source': os.path.abspath(source),
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'chunk_size': chunk_size,
+        }
+        self.run = run
+        self.done = set()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get('identity') != self.identity:
+            raise CommandError(
+                f'El checkpoint {self.path} no corresponde a este fichero o tamaño de trozo. '
+                'Usa --restart para empezar de cero.'
+            )
+        self.done = set(data.get('done', []))
+        self.run = data.get('run') or self.run
+        return True
+
+    def save(self):
+        # Escritura atómica: un fallo a mitad no deja un checkpoint corrupto
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'identity': self.identity, 'run': self.run, 'done': sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        from rankingsafa.importer import clear_seen
+
+        if os.path.exists(self.path):
+            # Las claves apuntadas de una ejecución que se descarta sobran
+            with open(self.path) as f:
+                run = json.load(f).get('run')
+            if run:
+                clear_seen(run)
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa un catálogo JSON o NDJSON (mismo formato que upload_json y '
+        'export_ndjson) repartiendo el trabajo en un pool de procesos. Guarda '
+        'un checkpoint por trozo para reanudar si la ejecución se interrumpe.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichero JSON del catálogo, o NDJSON (.ndjson, .ndjson.gz)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos del pool (por defecto, uno por núcleo)')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Registros por trozo enviado a cada proceso')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Registros por bulk_write dentro de cada trozo')
+        parser.add_argument('--checkpoint', help='Ruta del checkpoint (por defecto <path>.checkpoint)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignora el checkpoint existente y empieza de cero')
+
+    def handle(self, *args, **options):
+        from rankingsafa.catalog import invalidate_catalog
+        from rankingsafa.categories import invalidate_categories
+        from rankingsafa.importer import count_missing, new_run, rebuild_derived
+
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No existe el fichero {path}')
+
+        checkpoint = Checkpoint(options['checkpoint'] or path + '.checkpoint', path, options['chunk_size'], new_run())
+        if options['restart']:
+            checkpoint.delete()
+        elif checkpoint.load():
+            self.stdout.write(f'Reanudando: {len(checkpoint.done)} trozos ya importados.')
+
+        totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+        sections = set()
+        processed = 0
+        start = time.perf_counter()
+
+        # Como mucho dos trozos en cola por proceso para acotar la memoria
+        max_pending = options['workers'] * 2
+        pending = {}
+
+        def collect(futures):
+            nonlocal processed
+            for future in futures:
+                index = pending.pop(future)
+                counts = future.result()
+                for key in totals:
+                    totals[key] += counts[key]
+                processed += sum(counts[key] for key in totals)
+                checkpoint.done.add(index)
+                checkpoint.save()
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'Trozo {index}: {processed} registros, {processed / elapsed:.0f} registros/s'
+                )
+
+        with ProcessPoolExecutor(
+            max_workers=options['workers'],
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        ) as pool:
+            for index, section, records in _iter_chunks(path, options['chunk_size']):
+                sections.add(section)
+                if index in checkpoint.done:
+                    continue
+                future = pool.submit(_import_chunk, section, records, options['batch_size'], checkpoint.run)
+                pending[future] = index
+                if len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+            collect(list(pending))
+
+        elapsed = time.perf_counter() - start
+        rate = processed / elapsed if elapsed else 0
+        missing = sum(count_missing(section, checkpoint.run) for section in sections)
+        rebuild_derived(sections)
+        if 'categorias' in sections:
+            invalidate_categories()
+        if 'videojuegos' in sections or 'reviews' in sections:
+            invalidate_catalog()
+        checkpoint.delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"Importación completada en {elapsed:.1f}s ({rate:.0f} registros/s): "
+            f"{totals['inserted']} nuevos, {totals['updated']} modificados, "
+            f"{totals['unchanged']} sin cambios, {totals['failed']} con errores, "
+            f"{missing} ausentes del fichero."
+        ))
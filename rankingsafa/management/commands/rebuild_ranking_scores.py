@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from rankingsafa.scores import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la tabla materializada 'ranking_scores' y las cubetas por periodo "
+        "'ranking_buckets' a partir de los Ranking. Úsalo para poblarlas la primera vez, "
+        "repararlas tras cambios hechos fuera de la web o tras cambiar RANKING_DECAY_HALF_LIFE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--category', type=int, help='Solo esta categoría (por defecto, todas)')
+
+    def handle(self, *args, **options):
+        total = rebuild_scores(options['category'])
+        self.stdout.write(self.style.SUCCESS(f'{total} puntuaciones recalculadas.'))
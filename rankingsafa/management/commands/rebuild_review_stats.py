@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from rankingsafa.catalog import invalidate_catalog
+from rankingsafa.review_stats import rebuild_review_stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula las estadísticas de reseñas guardadas en cada videojuego "
+        "(reviews_count, rating_sum, rating_hist) a partir de 'reviews'."
+    )
+
+    def handle(self, *args, **options):
+        total = rebuild_review_stats()
+        invalidate_catalog()
+        self.stdout.write(self.style.SUCCESS(f'Estadísticas recalculadas ({total} juegos con reseñas).'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from pymongo import UpdateOne
+
+from rankingsafa.catalog import short_description
+from rankingsafa.models import Videojuego
+from rankingsafa.mongo import get_collection
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la descripción recortada (short_desc) que usan los listados. "
+        "Úsalo para juegos guardados antes de que existiera o tras cambiar SHORT_DESC_WORDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        collection = get_collection(Videojuego)
+        batch, total = [], 0
+        for doc in collection.find({}, {'_id': 0, 'code': 1, 'desc': 1}):
+            batch.append(UpdateOne({'code': doc['code']}, {'$set': {'short_desc': short_description(doc.get('desc'))}}))
+            if len(batch) >= options['batch_size']:
+                collection.bulk_write(batch, ordered=False)
+                total += len(batch)
+                batch = []
+        if batch:
+            collection.bulk_write(batch, ordered=False)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'{total} descripciones recortadas.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from rankingsafa.jobs import recover_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Recupera las importaciones que dejó a medias un reinicio: marca como '
+        'fallidas las que estaban en curso y ejecuta las pendientes. Ejecutar al '
+        'desplegar, antes de arrancar los servidores.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-run', action='store_true',
+                            help='Solo marca las interrumpidas; las pendientes se dejan en la cola')
+
+    def handle(self, *args, **options):
+        interrupted, pending = recover_jobs(run_pending=not options['no_run'])
+        action = 'se quedan pendientes' if options['no_run'] else 'ejecutadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{interrupted} importaciones interrumpidas marcadas como fallidas; {pending} pendientes {action}.'
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from rankingsafa.indexes import sync_indexes
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea o rehace los índices de las colecciones de Mongo para que coincidan con '
+        'la especificación (Meta.indexes de los modelos y rankingsafa.indexes). Los '
+        'que no están en ella solo se borran con --drop-unknown.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Muestra los cambios sin aplicarlos')
+        parser.add_argument('--drop-unknown', action='store_true',
+                            help='Borra también los índices que no están en la especificación '
+                                 '(por ejemplo, los creados a mano)')
+        parser.add_argument('collections', nargs='*', help='Colecciones a sincronizar (por defecto, todas)')
+
+    def handle(self, *args, **options):
+        actions = sync_indexes(drop=options['drop_unknown'], dry_run=options['dry_run'],
+                               only=options['collections'] or None)
+        for collection, action, name in actions:
+            self.stdout.write(f'{collection}: {action} {name}')
+        verb = 'Cambios pendientes' if options['dry_run'] else 'Índices sincronizados'
+        self.stdout.write(self.style.SUCCESS(f'{verb}: {len(actions)}.'))
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rankingsafa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('code', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('user', models.CharField(max_length=300)),
+                ('filename', models.CharField(max_length=300)),
+                ('path', models.CharField(max_length=500)),
+                ('status', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completado', 'Completado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('processed', models.IntegerField(default=0)),
+                ('inserted', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('throughput', models.FloatField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'import_jobs',
+                'managed': False,
+            },
+        ),
+    ]
@@ -25,20 +25,41 @@ class Videojuego(models.Model):
     age_rating = models.CharField(max_length=10, null=True, blank=True)
     duration = models.IntegerField(null=True, blank=True)
     multiplayer = models.BooleanField(default=False)
+    # Huella del contenido importado; None si se editó fuera de la importación
+    content_hash = models.CharField(max_length=40, null=True, blank=True, editable=False)
+    # Descripción recortada para las tarjetas, calculada al escribir desc
+    short_desc = models.TextField(null=True, blank=True, editable=False)
+    # Estadísticas de reseñas, mantenidas por rankingsafa.review_stats
+    reviews_count = models.IntegerField(default=0, editable=False)
+    rating_sum = models.IntegerField(default=0, editable=False)
+    rating_hist = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         db_table = 'videojuegos'
         managed = False
+        # Índices de Mongo (los crea sync_mongo_indexes, ver rankingsafa.indexes)
+        indexes = [
+            models.Index(fields=['category'], name='videojuegos_category'),
+            models.Index(fields=['platforms'], name='videojuegos_platforms'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def avg_rating(self):
+        if not self.reviews_count:
+            return 0
+        return round((self.rating_sum or 0) / self.reviews_count, 1)
+
 
 class Categoria(models.Model):
     code = models.IntegerField(primary_key=True)
     name = models.CharField(max_length=300, unique=True)
     desc = models.TextField()
     image = models.URLField(max_length=500, null=True, blank=True)
+    # Huella del contenido importado; None si se editó fuera de la importación
+    content_hash = models.CharField(max_length=40, null=True, blank=True, editable=False)
 
     class Meta:
         db_table = 'categorias'
@@ -58,6 +79,16 @@ class Review(models.Model):
     class Meta:
         db_table = 'reviews'
         managed = False
+        constraints = [
+            models.UniqueConstraint(fields=['code', 'serie'], name='reviews_code_serie'),
+        ]
+        indexes = [
+            models.Index(fields=['code', 'user'], name='reviews_code_user'),
+            # Reseñas de un juego paginadas de la más reciente a la más antigua
+            models.Index(fields=['code', '-reviewDate', '-serie'], name='reviews_code_date'),
+            # Exportaciones incrementales (rankingsafa.export)
+            models.Index(fields=['reviewDate'], name='reviews_date'),
+        ]
 
     def __str__(self):
         return self.user + " " + str(self.rating)
@@ -72,10 +103,54 @@ class Ranking(models.Model):
     class Meta:
         db_table = 'rankings'
         managed = False
+        indexes = [
+            models.Index(fields=['user', 'category'], name='rankings_user_category'),
+            models.Index(fields=['category'], name='rankings_category'),
+            models.Index(fields=['rankDate'], name='rankings_date'),
+        ]
 
     def __str__(self):
         return self.user + " " + str(self.rankDate)
 
+class ImportJob(models.Model):
+    STATUS = (
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completado', 'Completado'),
+        ('fallido', 'Fallido'),
+    )
+
+    code = models.CharField(max_length=32, primary_key=True)
+    user = models.CharField(max_length=300)
+    filename = models.CharField(max_length=300)
+    path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS, default='pendiente')
+    created = models.DateTimeField(default=timezone.now)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    processed = models.IntegerField(default=0)
+    inserted = models.IntegerField(default=0)
+    updated = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    missing = models.IntegerField(default=0)
+    throughput = models.FloatField(default=0)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'import_jobs'
+        managed = False
+        indexes = [
+            models.Index(fields=['-created'], name='import_jobs_created'),
+        ]
+
+    def __str__(self):
+        return self.filename + " " + self.status
+
+    @property
+    def is_active(self):
+        return self.status in ('pendiente', 'en_curso')
+
 class UserManager(BaseUserManager):
     def create_user(self, mail, username, role, password=None):
         if not mail or not username or not role:
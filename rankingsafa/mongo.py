@@ -0,0 +1,63 @@
+import asyncio
+import datetime
+import weakref
+
+from django.conf import settings
+from django.db import connections, models, router
+from pymongo import AsyncMongoClient
+
+# Alias de la base de datos Mongo en settings.DATABASES
+MONGO_ALIAS = 'mongodb'
+
+# Un AsyncMongoClient por bucle de eventos: cada cliente queda ligado al
+# bucle en el que hace su primera operación
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_collection(model_or_name):
+    """
+    Devuelve la colección pymongo asociada a un modelo no gestionado
+    (usa su db_table) o a un nombre de colección suelto.
+    """
+    if isinstance(model_or_name, str):
+        return connections[MONGO_ALIAS].get_collection(model_or_name)
+    connection = connections[router.db_for_write(model_or_name)]
+    return connection.get_collection(model_or_name._meta.db_table)
+
+
+def _async_db_name(model_or_name):
+    return model_or_name if isinstance(model_or_name, str) else model_or_name._meta.db_table
+
+
+def get_async_collection(model_or_name):
+    """
+    Como get_collection, pero con el AsyncMongoClient de pymongo para las
+    vistas async (el ORM no se puede usar desde el bucle de eventos). Usa
+    la misma configuración que la conexión 'mongodb'.
+    """
+    loop = asyncio.get_running_loop()
+    conf = settings.DATABASES[MONGO_ALIAS]
+    client = _async_clients.get(loop)
+    if client is None:
+        options = dict(conf.get('OPTIONS') or {})
+        if conf.get('USER'):
+            options.setdefault('username', conf['USER'])
+        if conf.get('PASSWORD'):
+            options.setdefault('password', conf['PASSWORD'])
+        client = _async_clients[loop] = AsyncMongoClient(conf.get('HOST') or None, conf.get('PORT') or None, **options)
+    return client[conf['NAME']][_async_db_name(model_or_name)]
+
+
+def model_from_doc(model, doc):
+    """Instancia de ``model`` a partir de un documento leído con pymongo."""
+    fields = model._meta.concrete_fields
+    values = []
+    for field in fields:
+        value = doc.get(field.column)
+        # Las fechas se guardan como datetime en Mongo
+        if (isinstance(field, models.DateField) and not isinstance(field, models.DateTimeField)
+                and isinstance(value, datetime.datetime)):
+            value = value.date()
+        values.append(value)
+    return model.from_db(MONGO_ALIAS, [f.attname for f in fields], values)
+
@@ -0,0 +1,153 @@
+"""
+Caché de páginas públicas con sellos de versión y ETag.
+
+versioned_page guarda el HTML de una vista por URL, estado del usuario
+(anónimo o usuario, staff y rol) y los sellos de versión de lo que pinta.
+Cada vista que escribe ya incrementa su sello ('videojuegos', 'categorias',
+'rankings:<categoría>', 'reviews:<juego>'), así que una escritura invalida
+las páginas de todos los procesos sin borrar nada: la clave simplemente
+cambia.
+
+Las respuestas llevan un ETag fuerte (hash del contenido) y
+Cache-Control: private, no-cache, de modo que el navegador revalida cada
+vez y, si la página no ha cambiado, recibe un 304 sin que se vuelva a
+consultar Mongo ni a renderizar la plantilla.
+
+No se cachean las peticiones con mensajes pendientes (la plantilla los
+consumiría) ni las respuestas que no son un 200 o que ponen cookies. Las
+páginas con formularios llevan el token CSRF, que depende del secreto de
+cada navegador: la primera vez que una vista lo usa se anota y a partir de
+entonces el secreto entra en la clave.
+
+Las vistas que dependen del sello 'categorias' pintan las etiquetas con la
+copia en memoria de rankingsafa.categories, que solo comprueba el sello de
+vez en cuando: antes de renderizar se le pasa el sello leído para la clave
+(ensure) y, si es más nuevo, recarga la copia.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .cache import LRUCache
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY, category_registry
+from .versions import aget_versions, get_versions
+
+_page_cache = LRUCache('pages', getattr(settings, 'PAGE_CACHE_SIZE', 256))
+
+# Vistas cuya plantilla usa el token CSRF
+_csrf_views = set()
+
+
+def user_state(request):
+    """Lo que del usuario cambia el HTML de una página pública."""
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    return user.pk, user.username, user.is_staff, getattr(user, 'role', None)
+
+
+def _finish(request, entry):
+    etag, content, content_type = entry
+    response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def _lookup(request, name, stamps, vary):
+    """
+    (clave, usa CSRF, respuesta cacheada o None). Con clave None la página
+    se renderiza sin guardarla.
+    """
+    key = (name, request.get_full_path(), user_state(request), stamps, vary(request) if vary else None)
+    csrf = name in _csrf_views
+    if csrf:
+        secret = request.META.get('CSRF_COOKIE')
+        if secret is None:
+            # Navegador sin cookie: hay que renderizar para dársela
+            return None, csrf, None
+        key += (secret,)
+    entry = _page_cache.get(key)
+    if entry is None:
+        return key, csrf, None
+    if csrf:
+        # Renueva la cookie igual que al renderizar
+        get_token(request)
+    return key, csrf, _finish(request, entry)
+
+
+def _store(request, name, key, csrf, response):
+    if key is None or response.status_code != 200 or response.streaming or response.cookies:
+        return response
+    if not csrf and request.META.get('CSRF_COOKIE_NEEDS_UPDATE'):
+        _csrf_views.add(name)
+        key += (request.META['CSRF_COOKIE'],)
+    content = response.content
+    entry = (f'"{hashlib.sha1(content).hexdigest()}"', content, response['Content-Type'])
+    _page_cache.set(key, entry)
+    return _finish(request, entry)
+
+
+def _categories_stamp(keys, stamps):
+    """Sello de las categorías leído para la clave, o None si la vista no depende de él."""
+    for key, stamp in zip(keys, stamps):
+        if key == CATEGORIES_VERSION_KEY:
+            return stamp
+    return None
+
+
+def versioned_page(*keys, vary=None):
+    """
+    Cachea una vista GET. ``keys`` son claves de versión o funciones que
+    reciben los argumentos de la URL y devuelven una; ``vary(request)``
+    añade a la clave lo que no salga de la URL (p. ej. la fecha).
+    Sirve también para vistas async: los sellos se leen con el driver async.
+    """
+    def decorator(view):
+        name = f'{view.__module__}.{view.__qualname__}'
+
+        def stamp_keys(kwargs):
+            return [k(**kwargs) if callable(k) else k for k in keys]
+
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                # Carga el usuario (y con él la sesión) sin consultas síncronas
+                request.user = await request.auser()
+                if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                    return await view(request, *args, **kwargs)
+                names = stamp_keys(kwargs)
+                stamps = await aget_versions(names)
+                key, csrf, cached = _lookup(request, name, stamps, vary)
+                if cached is not None:
+                    return cached
+                categories = _categories_stamp(names, stamps)
+                if categories is not None:
+                    await category_registry.aensure(categories)
+                return _store(request, name, key, csrf, await view(request, *args, **kwargs))
+
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+                return view(request, *args, **kwargs)
+            names = stamp_keys(kwargs)
+            stamps = get_versions(names)
+            key, csrf, cached = _lookup(request, name, stamps, vary)
+            if cached is not None:
+                return cached
+            categories = _categories_stamp(names, stamps)
+            if categories is not None:
+                category_registry.ensure(categories)
+            return _store(request, name, key, csrf, view(request, *args, **kwargs))
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,177 @@
+"""
+Paginación por clave (keyset) para los listados.
+
+En lugar de OFFSET, cada página pide los elementos posteriores (o
+anteriores) a los valores de orden del último (o primer) elemento de la
+página vista, que viajan en la URL como un cursor opaco (?after=/?before=).
+Con un índice sobre los campos de orden cada página cuesta lo mismo, esté
+al principio o al final del listado.
+"""
+import base64
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from .mongo import model_from_doc
+
+
+def encode_cursor(values):
+    """Valores de orden -> cadena segura para URL."""
+    data = [
+        {'d': v.isoformat()} if isinstance(v, (datetime.date, datetime.datetime)) else v
+        for v in values
+    ]
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverso de encode_cursor; None si el cursor no es válido."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(data, list):
+        return None
+    values = []
+    for v in data:
+        if isinstance(v, dict):
+            try:
+                value = datetime.datetime.fromisoformat(v['d'])
+            except (KeyError, TypeError, ValueError):
+                return None
+            # Las fechas sin hora vuelven como date
+            values.append(value.date() if 'T' not in v['d'] else value)
+        else:
+            values.append(v)
+    return values
+
+
+def page_cursors(request):
+    """(after, before) decodificados de la petición."""
+    return decode_cursor(request.GET.get('after')), decode_cursor(request.GET.get('before'))
+
+
+def page_query(request):
+    """Parámetros de la petición sin los cursores, para los enlaces de página."""
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    return params.urlencode()
+
+
+def build_page(rows, has_more, after, before, key):
+    """
+    Página a partir de las filas ya leídas (en orden de presentación).
+    ``has_more`` indica si quedaban filas más allá en el sentido de lectura.
+    """
+    if before is not None:
+        next_cursor = encode_cursor(key(rows[-1])) if rows else None
+        prev_cursor = encode_cursor(key(rows[0])) if rows and has_more else None
+    else:
+        next_cursor = encode_cursor(key(rows[-1])) if rows and has_more else None
+        prev_cursor = encode_cursor(key(rows[0])) if rows and after is not None else None
+    return {'items': rows, 'next': next_cursor, 'prev': prev_cursor}
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else f'-{field}'
+
+
+def keyset_q(ordering, values):
+    """Q de los elementos estrictamente posteriores a ``values`` según ``ordering``."""
+    q = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        cond = Q(**{f'{name}__{lookup}': values[i]})
+        for prev_field, prev_value in zip(ordering[:i], values[:i]):
+            cond &= Q(**{prev_field.lstrip('-'): prev_value})
+        q |= cond
+    return q
+
+
+def keyset_filter(ordering, values):
+    """Como keyset_q, pero como filtro de pymongo sobre columnas de Mongo."""
+    clauses = []
+    for i, field in enumerate(ordering):
+        cond = {prev.lstrip('-'): value for prev, value in zip(ordering[:i], values[:i])}
+        cond[field.lstrip('-')] = {'$lt' if field.startswith('-') else '$gt': values[i]}
+        clauses.append(cond)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+
+def _clean_cursor(model, fields, values):
+    """Valores del cursor convertidos al tipo de cada campo; None si no encajan."""
+    if values is None or len(values) != len(fields):
+        return None
+    try:
+        return [model._meta.get_field(f).to_python(v) for f, v in zip(fields, values)]
+    except ValidationError:
+        return None
+
+
+def _mongo_values(values):
+    # Mongo no tiene tipo fecha: los DateField se comparan como datetime
+    return [
+        datetime.datetime.combine(v, datetime.time.min) if type(v) is datetime.date else v
+        for v in values
+    ]
+
+
+async def apaginate(collection, model, query, ordering, after=None, before=None, size=24, projection=None):
+    """
+    paginate para las vistas async: lee la página de ``collection``
+    (AsyncMongoClient) con ``query`` y devuelve las filas como instancias de
+    ``model``, con los mismos cursores que paginate.
+    """
+    fields = [f.lstrip('-') for f in ordering]
+    after = _clean_cursor(model, fields, after)
+    before = _clean_cursor(model, fields, before)
+
+    def sort(order):
+        return [(f.lstrip('-'), -1 if f.startswith('-') else 1) for f in order]
+
+    if before is not None:
+        reverse = [_flip(f) for f in ordering]
+        cursor = collection.find({**query, **keyset_filter(reverse, _mongo_values(before))}, projection,
+                                 sort=sort(reverse), limit=size + 1)
+        docs = await cursor.to_list()
+        has_more = len(docs) > size
+        docs = docs[:size][::-1]
+    else:
+        if after is not None:
+            query = {**query, **keyset_filter(ordering, _mongo_values(after))}
+        docs = await collection.find(query, projection, sort=sort(ordering), limit=size + 1).to_list()
+        has_more = len(docs) > size
+        docs = docs[:size]
+    rows = [model_from_doc(model, doc) for doc in docs]
+    return build_page(rows, has_more, after, before, lambda obj: [getattr(obj, f) for f in fields])
+
+
+def paginate(queryset, ordering, after=None, before=None, size=24):
+    """
+    Página de ``queryset`` ordenada por ``ordering`` (campos que identifican
+    cada fila de forma única, con '-' para descendente).
+    Devuelve {'items', 'next', 'prev'} con los cursores de las páginas vecinas.
+    """
+    fields = [f.lstrip('-') for f in ordering]
+    after = _clean_cursor(queryset.model, fields, after)
+    before = _clean_cursor(queryset.model, fields, before)
+    if before is not None:
+        reverse = [_flip(f) for f in ordering]
+        rows = list(queryset.filter(keyset_q(reverse, before)).order_by(*reverse)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size][::-1]
+    else:
+        if after is not None:
+            queryset = queryset.filter(keyset_q(ordering, after))
+        rows = list(queryset.order_by(*ordering)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+    return build_page(rows, has_more, after, before, lambda obj: [getattr(obj, f) for f in fields])
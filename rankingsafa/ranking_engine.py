@@ -0,0 +1,152 @@
+"""
+Motor vectorizado (NumPy) para agregar las tier lists de una categoría.
+
+Las listas se empaquetan en una matriz de posiciones R x L (una fila por
+ranking, una columna por posición, -1 como relleno) y los recuentos se hacen
+en bloque con bincount en lugar de ir juego a juego en Python. Sobre esa
+matriz se ofrecen también métodos de consenso más costosos: Copeland y
+Schulze (matrices de preferencias por pares) e intervalos de confianza por
+bootstrap de la puntuación media.
+"""
+import warnings
+
+import numpy as np
+
+# Rankings procesados a la vez al construir la matriz de pares
+PAIRWISE_CHUNK = 20000
+
+METHODS = ('borda', 'copeland', 'schulze')
+
+
+class PositionMatrix:
+    """Tier lists de una categoría empaquetadas como matriz de índices de juego."""
+
+    def __init__(self, ranking_lists):
+        lists = [list(l or []) for l in ranking_lists]
+        self.lengths = np.fromiter((len(l) for l in lists), dtype=np.int64, count=len(lists))
+        flat = np.fromiter((c for l in lists for c in l), dtype=np.int64, count=int(self.lengths.sum()))
+
+        # Códigos de juego -> columnas 0..G-1
+        self.codes, game_idx = np.unique(flat, return_inverse=True)
+        n_rankings = len(lists)
+        width = int(self.lengths.max()) if n_rankings else 0
+
+        rows = np.repeat(np.arange(n_rankings), self.lengths)
+        offsets = np.repeat(np.cumsum(self.lengths) - self.lengths, self.lengths)
+        cols = np.arange(flat.size) - offsets
+
+        self.matrix = np.full((n_rankings, width), -1, dtype=np.int32)
+        self.matrix[rows, cols] = game_idx
+
+        # Vista plana de las celdas ocupadas, reutilizada por todos los cálculos
+        self._rows = rows
+        self._games = game_idx
+        self._points = (self.lengths[rows] - cols).astype(np.float64)
+        self._positions = (cols + 1).astype(np.float64)
+
+    @property
+    def n_games(self):
+        return self.codes.size
+
+    @property
+    def n_rankings(self):
+        return self.matrix.shape[0]
+
+    # ---------- Borda ----------
+
+    def totals(self, weights=None):
+        """Suma de puntos, suma de posiciones y votos por juego (arrays de G)."""
+        w = None if weights is None else weights[self._rows]
+        n = self.n_games
+        votes = np.bincount(self._games, weights=w, minlength=n)
+        points = np.bincount(self._games, weights=self._points if w is None else self._points * w, minlength=n)
+        positions = np.bincount(self._games, weights=self._positions if w is None else self._positions * w, minlength=n)
+        return points, positions, votes
+
+    def scores(self):
+        """{juego: {'points', 'positions', 'votes'}}, el mismo formato que rankingsafa.scores."""
+        points, positions, votes = self.totals()
+        return {
+            int(code): {'points': int(p), 'positions': int(q), 'votes': int(v)}
+            for code, p, q, v in zip(self.codes, points, positions, votes)
+        }
+
+    def mean_scores(self):
+        """Puntuación Borda media por juego (la que muestra el ranking global)."""
+        points, _, votes = self.totals()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return points / votes
+
+    # ---------- Métodos por pares ----------
+
+    def pairwise(self):
+        """
+        Matriz G x G donde d[i, j] es el número de rankings que ponen i por
+        delante de j. Solo se comparan juegos presentes en la misma lista.
+        """
+        n = self.n_games
+        counts = np.zeros(n * n, dtype=np.int64)
+        width = self.matrix.shape[1]
+        for start in range(0, self.n_rankings, PAIRWISE_CHUNK):
+            block = self.matrix[start:start + PAIRWISE_CHUNK]
+            for k in range(width - 1):
+                winners = block[:, k:k + 1]
+                losers = block[:, k + 1:]
+                mask = (winners >= 0) & (losers >= 0)
+                pairs = (np.broadcast_to(winners, losers.shape)[mask].astype(np.int64) * n
+                         + losers[mask])
+                counts += np.bincount(pairs, minlength=n * n)
+        return counts.reshape(n, n)
+
+    def copeland(self, pairwise=None):
+        """Victorias menos derrotas por pares de cada juego."""
+        d = self.pairwise() if pairwise is None else pairwise
+        return (d > d.T).sum(axis=1) - (d < d.T).sum(axis=1)
+
+    def schulze(self, pairwise=None):
+        """
+        Número de juegos a los que vence cada uno según el método de Schulze
+        (caminos más fuertes calculados con Floyd-Warshall vectorizado).
+        """
+        d = self.pairwise() if pairwise is None else pairwise
+        p = np.where(d > d.T, d, 0)
+        for k in range(self.n_games):
+            p = np.maximum(p, np.minimum(p[:, k:k + 1], p[k:k + 1, :]))
+        np.fill_diagonal(p, 0)
+        return (p > p.T).sum(axis=1)
+
+    def order(self, method='borda'):
+        """Códigos de juego ordenados de mejor a peor según ``method``."""
+        if method == 'borda':
+            key = np.nan_to_num(self.mean_scores(), nan=-np.inf)
+        elif method == 'copeland':
+            key = self.copeland()
+        elif method == 'schulze':
+            key = self.schulze()
+        else:
+            raise ValueError(f'Método de consenso desconocido: {method}')
+        # Desempate por puntuación Borda media
+        borda = np.nan_to_num(self.mean_scores(), nan=-np.inf)
+        return [int(c) for c in self.codes[np.lexsort((-borda, -key))]]
+
+    # ---------- Bootstrap ----------
+
+    def bootstrap(self, samples=200, confidence=0.95, seed=None):
+        """
+        Intervalo de confianza de la puntuación Borda media remuestreando los
+        rankings con reemplazo. Devuelve {juego: (inferior, superior)}.
+        """
+        rng = np.random.default_rng(seed)
+        r = self.n_rankings
+        means = np.empty((samples, self.n_games))
+        for s in range(samples):
+            weights = np.bincount(rng.integers(0, r, r), minlength=r).astype(np.float64)
+            points, _, votes = self.totals(weights)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                means[s] = points / votes
+        alpha = (1 - confidence) / 2 * 100
+        with warnings.catch_warnings():
+            # Un juego que no sale en ninguna muestra da un intervalo NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanpercentile(means, [alpha, 100 - alpha], axis=0)
+        return {int(c): (float(lo), float(hi)) for c, lo, hi in zip(self.codes, low, high)}
@@ -0,0 +1,96 @@
+"""
+Estadísticas de reseñas desnormalizadas en cada videojuego.
+
+Cada documento de 'videojuegos' guarda reviews_count, rating_sum y
+rating_hist ({'0'..'5': reseñas con esa nota}). Crear, editar o borrar una
+reseña aplica un único $inc sobre el juego, así la portada no tiene que
+agregar 'reviews'. rebuild_review_stats las recalcula desde cero.
+
+Las ediciones y los borrados (update_review, delete_review) toman la nota
+anterior del propio documento que modifican (find_one_and_update/delete):
+dos ediciones a la vez no pueden restar dos veces la misma nota.
+
+Las vistas que escriben una reseña incrementan además el sello
+'reviews:<juego>', del que depende la caché de la página del juego.
+"""
+from pymongo import ReturnDocument, UpdateOne
+
+from .models import Review, Videojuego
+from .mongo import get_collection
+
+EMPTY_STATS = {'reviews_count': 0, 'rating_sum': 0, 'rating_hist': {}}
+
+
+def stats_delta(old_rating=None, new_rating=None):
+    """$inc que pasa de una reseña con ``old_rating`` a una con ``new_rating`` (None = no existe)."""
+    delta = {}
+    for rating, sign in ((old_rating, -1), (new_rating, 1)):
+        if rating is None:
+            continue
+        delta['reviews_count'] = delta.get('reviews_count', 0) + sign
+        delta['rating_sum'] = delta.get('rating_sum', 0) + sign * rating
+        key = f'rating_hist.{rating}'
+        delta[key] = delta.get(key, 0) + sign
+    return {k: v for k, v in delta.items() if v}
+
+
+def review_version_key(game_code):
+    """Sello de las reseñas de un juego; lo incrementa cada vista que escribe una."""
+    return f'reviews:{game_code}'
+
+
+def apply_review_change(game_code, old_rating=None, new_rating=None, collection=None):
+    """Actualiza de forma atómica las estadísticas del juego tras escribir una reseña."""
+    delta = stats_delta(old_rating, new_rating)
+    if not delta:
+        return
+    collection = collection or get_collection(Videojuego)
+    collection.update_one({'code': game_code}, {'$inc': delta})
+
+
+def update_review(game_code, serie, fields, collection=None, games=None):
+    """
+    Aplica ``fields`` a una reseña y ajusta las estadísticas del juego con
+    la nota que tenía justo antes. Devuelve el documento anterior (None si
+    la reseña ya no existe).
+    """
+    collection = collection or get_collection(Review)
+    before = collection.find_one_and_update(
+        {'code': game_code, 'serie': serie}, {'$set': fields},
+        projection={'_id': 0, 'rating': 1}, return_document=ReturnDocument.BEFORE,
+    )
+    if before is not None:
+        apply_review_change(game_code, before.get('rating'), fields.get('rating', before.get('rating')), games)
+    return before
+
+
+def delete_review(game_code, serie, collection=None, games=None):
+    """Borra una reseña y descuenta su nota del juego. Devuelve el documento borrado o None."""
+    collection = collection or get_collection(Review)
+    deleted = collection.find_one_and_delete({'code': game_code, 'serie': serie}, projection={'_id': 0, 'rating': 1})
+    if deleted is not None:
+        apply_review_change(game_code, old_rating=deleted.get('rating'), collection=games)
+    return deleted
+
+
+def rebuild_review_stats(collection=None, reviews=None):
+    """Recalcula las estadísticas de todos los juegos a partir de 'reviews'. Devuelve los juegos con reseñas."""
+    collection = collection or get_collection(Videojuego)
+    reviews = reviews or get_collection(Review)
+
+    stats = {}
+    for doc in reviews.aggregate([
+        {'$group': {'_id': {'code': '$code', 'rating': '$rating'}, 'n': {'$sum': 1}}},
+    ]):
+        code, rating = doc['_id']['code'], doc['_id']['rating']
+        s = stats.setdefault(code, {'reviews_count': 0, 'rating_sum': 0, 'rating_hist': {}})
+        s['reviews_count'] += doc['n']
+        s['rating_sum'] += doc['n'] * (rating or 0)
+        s['rating_hist'][str(rating or 0)] = doc['n']
+
+    collection.update_many({}, {'$set': EMPTY_STATS})
+    if stats:
+        collection.bulk_write([
+            UpdateOne({'code': code}, {'$set': s}) for code, s in stats.items()
+        ], ordered=False)
+    return len(stats)
@@ -0,0 +1,418 @@
+"""
+Puntuaciones globales de los rankings por categoría.
+
+La colección 'ranking_scores' guarda por (categoría, juego) la suma de puntos,
+la suma de posiciones y el número de votos de todas las tier lists. Al crear,
+editar o borrar una tier list solo se aplica la diferencia entre la lista
+antigua y la nueva, de modo que el ranking global de una categoría es una
+única lectura por índice en lugar de recorrer todos sus Ranking.
+
+Para comparar se mantienen otros dos modos de cálculo sobre 'rankings': un
+pipeline de agregación que puntúa en el servidor, el cálculo en Python y el
+motor vectorizado de ranking_engine, que además ofrece Copeland y Schulze.
+
+Las vistas por periodo salen de 'ranking_buckets', que guarda los mismos
+acumulados por día y por año según la fecha (rankDate) de cada tier list,
+y en cada cubeta un documento con code None que cuenta sus tier lists. La
+vista con decaimiento exponencial usa acumulados ponderados por
+e^(λ·días desde DECAY_EPOCH) en la propia tabla: al dividir por la suma de
+pesos el factor e^(-λ·hoy) se cancela, así que no hay que recalcular nada
+con el paso del tiempo.
+"""
+import math
+from datetime import date, datetime, time, timedelta
+from operator import attrgetter
+
+from django.conf import settings
+from django.utils import timezone
+from pymongo import ReturnDocument, UpdateOne
+
+from .models import Ranking
+from .mongo import get_collection
+from .versions import bump_version
+
+SCORES_COLLECTION = 'ranking_scores'
+BUCKETS_COLLECTION = 'ranking_buckets'
+
+# Origen de los pesos de decaimiento. Con una vida media de 30 días los pesos
+# siguen siendo representables en float64 durante décadas.
+DECAY_EPOCH = date(2020, 1, 1)
+
+# Ventanas del ranking global: todo el histórico, últimos 30 días, año en
+# curso y decaimiento exponencial
+WINDOWS = ('all', '30d', 'year', 'decay')
+
+
+def ranking_version_key(category):
+    """Sello de versión de los rankings de una categoría (ver rankingsafa.versions)."""
+    return f'rankings:{category}'
+
+
+def rank_day(value):
+    """rankDate como date (Mongo lo devuelve como datetime); hoy si falta."""
+    if value is None:
+        return timezone.localdate()
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def decay_weight(day):
+    """Peso de una tier list de ``day``, se duplica cada RANKING_DECAY_HALF_LIFE días."""
+    half_life = getattr(settings, 'RANKING_DECAY_HALF_LIFE', 30)
+    return math.exp(math.log(2) / half_life * (day - DECAY_EPOCH).days)
+
+
+def bucket_starts(day):
+    """Cubetas (tipo, inicio) en las que cuenta una tier list de ``day``."""
+    return [('day', datetime.combine(day, time.min)), ('year', datetime(day.year, 1, 1))]
+
+
+def list_contributions(ranking_list, sign=1, into=None, weight=None):
+    """
+    Acumula en ``into`` lo que aporta una lista a cada juego: n - idx puntos,
+    idx + 1 de posición y un voto (multiplicado por ``sign``). Con ``weight``
+    también acumula los mismos valores ponderados para el decaimiento.
+    """
+    into = {} if into is None else into
+    total_games = len(ranking_list)
+    for idx, game_code in enumerate(ranking_list):
+        acc = into.setdefault(game_code, {'points': 0, 'positions': 0, 'votes': 0})
+        acc['points'] += sign * (total_games - idx)
+        acc['positions'] += sign * (idx + 1)
+        acc['votes'] += sign
+        if weight is not None:
+            acc['decay_points'] = acc.get('decay_points', 0) + sign * weight * (total_games - idx)
+            acc['decay_positions'] = acc.get('decay_positions', 0) + sign * weight * (idx + 1)
+            acc['decay_votes'] = acc.get('decay_votes', 0) + sign * weight
+    return into
+
+
+def ranking_deltas(old_list, new_list, old_weight=None, new_weight=None):
+    """Diferencia por juego entre la aportación de la lista antigua y la nueva."""
+    deltas = list_contributions(old_list or [], sign=-1, weight=old_weight)
+    list_contributions(new_list or [], sign=1, into=deltas, weight=new_weight)
+    return {code: d for code, d in deltas.items() if any(d.values())}
+
+
+def bucket_deltas(old_list, old_day, new_list, new_day):
+    """Como ranking_deltas, pero separado por cubeta: {(tipo, inicio): {juego: delta}}."""
+    per_bucket = {}
+    for ranking_list, day, sign in ((old_list, old_day, -1), (new_list, new_day, 1)):
+        if not ranking_list:
+            continue
+        for bucket in bucket_starts(day):
+            list_contributions(ranking_list, sign, into=per_bucket.setdefault(bucket, {}))
+    return {
+        bucket: {code: d for code, d in deltas.items() if any(d.values())}
+        for bucket, deltas in per_bucket.items()
+    }
+
+
+def bucket_list_counts(old_list, old_day, new_list, new_day):
+    """Cambio del número de tier lists (con juegos) de cada cubeta: {(tipo, inicio): n}."""
+    counts = {}
+    for ranking_list, day, sign in ((old_list, old_day, -1), (new_list, new_day, 1)):
+        if ranking_list:
+            for bucket in bucket_starts(day):
+                counts[bucket] = counts.get(bucket, 0) + sign
+    return {bucket: n for bucket, n in counts.items() if n}
+
+
+def apply_ranking_change(category, old_list, new_list, old_date=None, new_date=None,
+                         collection=None, buckets=None):
+    """
+    Actualiza la tabla de puntuaciones y las cubetas por periodo con el cambio
+    de una tier list. ``old_date`` y ``new_date`` son su rankDate antes y después.
+    """
+    old_day, new_day = rank_day(old_date), rank_day(new_date)
+    deltas = ranking_deltas(old_list, new_list, decay_weight(old_day), decay_weight(new_day))
+    if not deltas:
+        return
+    collection = collection or get_collection(SCORES_COLLECTION)
+    collection.bulk_write([
+        UpdateOne({'category': category, 'code': code}, {'$inc': delta}, upsert=True)
+        for code, delta in deltas.items()
+    ], ordered=False)
+    # Los juegos que se quedan sin votos desaparecen de la tabla
+    if any(d['votes'] < 0 for d in deltas.values()):
+        collection.delete_many({'category': category, 'votes': {'$lte': 0}})
+
+    buckets = buckets or get_collection(BUCKETS_COLLECTION)
+    per_bucket = bucket_deltas(old_list, old_day, new_list, new_day)
+    ops = [
+        UpdateOne({'category': category, 'kind': kind, 'start': start, 'code': code},
+                  {'$inc': delta}, upsert=True)
+        for (kind, start), bucket in per_bucket.items()
+        for code, delta in bucket.items()
+    ]
+    list_counts = bucket_list_counts(old_list, old_day, new_list, new_day)
+    ops.extend(
+        UpdateOne({'category': category, 'kind': kind, 'start': start, 'code': None}, {'$inc': {'lists': n}},
+                  upsert=True)
+        for (kind, start), n in list_counts.items()
+    )
+    if ops:
+        buckets.bulk_write(ops, ordered=False)
+    if any(d['votes'] < 0 for bucket in per_bucket.values() for d in bucket.values()):
+        buckets.delete_many({'category': category, 'votes': {'$lte': 0}})
+    if any(n < 0 for n in list_counts.values()):
+        buckets.delete_many({'category': category, 'code': None, 'lists': {'$lte': 0}})
+
+
+def update_ranking(category, user, ranking_list, collection=None, scores=None, buckets=None):
+    """
+    Sustituye la tier list de ``user`` en ``category`` (con fecha de hoy) y
+    aplica a las puntuaciones la diferencia con la lista que había justo
+    antes. Devuelve el documento anterior, o None si el usuario no tenía
+    tier list (no se crea).
+    """
+    collection = collection or get_collection(Ranking)
+    today = timezone.localdate()
+    before = collection.find_one_and_update(
+        {'user': user, 'category': category},
+        {'$set': {'rankingList': ranking_list, 'rankDate': datetime.combine(today, time.min)}},
+        projection={'_id': 0, 'rankingList': 1, 'rankDate': 1}, return_document=ReturnDocument.BEFORE,
+    )
+    if before is not None:
+        apply_ranking_change(category, before.get('rankingList'), ranking_list, before.get('rankDate'), today,
+                             scores, buckets)
+    return before
+
+
+def delete_rankings(category, user, collection=None, scores=None, buckets=None):
+    """
+    Borra las tier lists de ``user`` en ``category`` y descuenta cada una de
+    las puntuaciones. Devuelve cuántas se han borrado.
+    """
+    collection = collection or get_collection(Ranking)
+    deleted = 0
+    while True:
+        doc = collection.find_one_and_delete({'user': user, 'category': category},
+                                             projection={'_id': 0, 'rankingList': 1, 'rankDate': 1})
+        if doc is None:
+            return deleted
+        apply_ranking_change(category, doc.get('rankingList'), [], doc.get('rankDate'), collection=scores,
+                             buckets=buckets)
+        deleted += 1
+
+
+def category_scores(category, collection=None):
+    """{juego: {'points', 'positions', 'votes'}} de una categoría desde la tabla."""
+    collection = collection or get_collection(SCORES_COLLECTION)
+    cursor = collection.find(
+        {'category': category, 'votes': {'$gt': 0}},
+        {'_id': 0, 'code': 1, 'points': 1, 'positions': 1, 'votes': 1},
+    )
+    return {doc.pop('code'): doc for doc in cursor}
+
+
+def compute_scores(ranking_lists):
+    """Cálculo completo en Python a partir de las listas (mismo formato que category_scores)."""
+    scores = {}
+    for ranking_list in ranking_lists:
+        list_contributions(ranking_list or [], into=scores)
+    return scores
+
+
+def python_scores(category, collection=None):
+    """Modo 'python': trae todas las tier lists de la categoría y puntúa en Django."""
+    collection = collection or get_collection(Ranking)
+    cursor = collection.find({'category': category}, {'_id': 0, 'rankingList': 1})
+    return compute_scores(doc.get('rankingList') for doc in cursor)
+
+
+def aggregation_pipeline(category):
+    """
+    Pipeline que puntúa en el servidor: desenrolla rankingList con su índice,
+    da n - idx puntos a cada posición y agrupa por juego.
+    """
+    return [
+        {'$match': {'category': category}},
+        {'$project': {
+            '_id': 0,
+            'rankingList': 1,
+            'n': {'$size': {'$ifNull': ['$rankingList', []]}},
+        }},
+        {'$unwind': {'path': '$rankingList', 'includeArrayIndex': 'idx'}},
+        {'$group': {
+            '_id': '$rankingList',
+            'points': {'$sum': {'$subtract': ['$n', '$idx']}},
+            'positions': {'$sum': {'$add': ['$idx', 1]}},
+            'votes': {'$sum': 1},
+        }},
+        {'$addFields': {'score': {'$divide': ['$points', '$votes']}}},
+        {'$sort': {'score': -1}},
+    ]
+
+
+def aggregate_scores(category, collection=None):
+    """Modo 'agregacion': solo vuelven a Python las puntuaciones finales por juego."""
+    collection = collection or get_collection(Ranking)
+    return {
+        doc['_id']: {'points': doc['points'], 'positions': doc['positions'], 'votes': doc['votes']}
+        for doc in collection.aggregate(aggregation_pipeline(category))
+    }
+
+
+def category_matrix(category, collection=None):
+    """Tier lists de la categoría empaquetadas para el motor vectorizado."""
+    from .ranking_engine import PositionMatrix
+
+    collection = collection or get_collection(Ranking)
+    cursor = collection.find({'category': category}, {'_id': 0, 'rankingList': 1})
+    return PositionMatrix(doc.get('rankingList') for doc in cursor)
+
+
+def numpy_scores(category, collection=None):
+    """Modo 'numpy': mismas listas que el modo 'python', puntuadas en bloque con NumPy."""
+    return category_matrix(category, collection).scores()
+
+
+# Formas de obtener las puntuaciones de una categoría (ver ranking_categoria_global)
+SCORE_MODES = {
+    'tabla': category_scores,
+    'agregacion': aggregate_scores,
+    'python': python_scores,
+    'numpy': numpy_scores,
+}
+
+
+def window_scores(category, window, today=None, collection=None, buckets=None):
+    """
+    Puntuaciones de una ventana distinta de 'all', en el mismo formato que
+    category_scores. Leen cubetas o acumulados ya calculados, nunca 'rankings'.
+    """
+    today = today or timezone.localdate()
+    if window == 'decay':
+        collection = collection or get_collection(SCORES_COLLECTION)
+        cursor = collection.find(
+            {'category': category, 'votes': {'$gt': 0}, 'decay_votes': {'$gt': 0}},
+            {'_id': 0, 'code': 1, 'votes': 1, 'decay_points': 1, 'decay_positions': 1, 'decay_votes': 1},
+        )
+        # Medias ponderadas reescaladas a los votos reales para que rank_games
+        # pueda seguir dividiendo por 'votes'
+        return {
+            doc['code']: {
+                'points': doc['decay_points'] / doc['decay_votes'] * doc['votes'],
+                'positions': doc['decay_positions'] / doc['decay_votes'] * doc['votes'],
+                'votes': doc['votes'],
+            }
+            for doc in cursor
+        }
+
+    buckets = buckets or get_collection(BUCKETS_COLLECTION)
+    if window == 'year':
+        cursor = buckets.find(
+            {'category': category, 'kind': 'year', 'start': datetime(today.year, 1, 1), 'votes': {'$gt': 0}},
+            {'_id': 0, 'code': 1, 'points': 1, 'positions': 1, 'votes': 1},
+        )
+        return {doc.pop('code'): doc for doc in cursor}
+    if window == '30d':
+        since = datetime.combine(today - timedelta(days=29), time.min)
+        cursor = buckets.aggregate([
+            {'$match': {'category': category, 'kind': 'day', 'start': {'$gte': since}}},
+            {'$group': {
+                '_id': '$code',
+                'points': {'$sum': '$points'},
+                'positions': {'$sum': '$positions'},
+                'votes': {'$sum': '$votes'},
+            }},
+            {'$match': {'votes': {'$gt': 0}}},
+        ])
+        return {
+            doc['_id']: {'points': doc['points'], 'positions': doc['positions'], 'votes': doc['votes']}
+            for doc in cursor
+        }
+    raise ValueError(f'Ventana desconocida: {window}')
+
+
+def window_lists(category, window, today=None, buckets=None):
+    """Número de tier lists (con juegos) de la categoría en una ventana '30d' o 'year'."""
+    today = today or timezone.localdate()
+    buckets = buckets or get_collection(BUCKETS_COLLECTION)
+    if window == 'year':
+        doc = buckets.find_one({'category': category, 'kind': 'year', 'start': datetime(today.year, 1, 1),
+                                'code': None}, {'_id': 0, 'lists': 1})
+        return doc['lists'] if doc else 0
+    if window == '30d':
+        since = datetime.combine(today - timedelta(days=29), time.min)
+        cursor = buckets.aggregate([
+            {'$match': {'category': category, 'kind': 'day', 'start': {'$gte': since}, 'code': None}},
+            {'$group': {'_id': None, 'lists': {'$sum': '$lists'}}},
+        ])
+        return next((doc['lists'] for doc in cursor), 0)
+    raise ValueError(f'Ventana sin recuento propio: {window}')
+
+
+def rank_games(videojuegos, scores, code=attrgetter('code')):
+    """
+    Filas del ranking global ordenadas por puntuación media. ``code`` saca el
+    código de cada juego (modelos o documentos de Mongo).
+    """
+    game_rankings = []
+    for juego in videojuegos:
+        score = scores.get(code(juego))
+        if not score or score['votes'] <= 0:
+            continue
+        game_rankings.append({
+            'juego': juego,
+            'score': round(score['points'] / score['votes'], 2),
+            'avg_position': round(score['positions'] / score['votes'], 1),
+            'votes': score['votes'],
+        })
+    game_rankings.sort(key=lambda x: x['score'], reverse=True)
+    return game_rankings
+
+
+def rebuild_scores(category=None, collection=None, buckets=None, rankings=None):
+    """
+    Recalcula desde cero la tabla y las cubetas de una categoría (o de todas)
+    a partir de los Ranking.
+    """
+    collection = collection or get_collection(SCORES_COLLECTION)
+    buckets = buckets or get_collection(BUCKETS_COLLECTION)
+    rankings = rankings or get_collection(Ranking)
+    cursor = rankings.find({} if category is None else {'category': category},
+                           {'_id': 0, 'category': 1, 'rankingList': 1, 'rankDate': 1})
+
+    per_category = {}
+    per_bucket = {}
+    list_counts = {}
+    for ranking in cursor:
+        ranking_list = ranking.get('rankingList') or []
+        day = rank_day(ranking.get('rankDate'))
+        list_contributions(ranking_list, into=per_category.setdefault(ranking['category'], {}),
+                           weight=decay_weight(day))
+        for kind, start in bucket_starts(day):
+            list_contributions(ranking_list, into=per_bucket.setdefault((ranking['category'], kind, start), {}))
+            if ranking_list:
+                bucket = (ranking['category'], kind, start)
+                list_counts[bucket] = list_counts.get(bucket, 0) + 1
+
+    buckets.delete_many({} if category is None else {'category': category})
+    bucket_docs = [
+        {'category': cat, 'kind': kind, 'start': start, 'code': code, **score}
+        for (cat, kind, start), scores in per_bucket.items()
+        for code, score in scores.items()
+    ]
+    bucket_docs.extend(
+        {'category': cat, 'kind': kind, 'start': start, 'code': None, 'lists': n}
+        for (cat, kind, start), n in list_counts.items()
+    )
+    if bucket_docs:
+        buckets.insert_many(bucket_docs, ordered=False)
+
+    # También se invalidan las categorías que se quedan sin tier lists
+    touched = set(per_category) | set(collection.distinct('category') if category is None else [category])
+    collection.delete_many({} if category is None else {'category': category})
+    docs = [
+        {'category': cat, 'code': code, **score}
+        for cat, scores in per_category.items()
+        for code, score in scores.items()
+    ]
+    if docs:
+        collection.insert_many(docs, ordered=False)
+    for cat in touched:
+        bump_version(ranking_version_key(cat))
+    return len(docs)
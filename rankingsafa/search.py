@@ -0,0 +1,266 @@
+"""
+Búsqueda de texto del catálogo con un índice invertido en memoria.
+
+Se indexan name, desc, developer, publisher y los nombres de las categorías
+de cada juego, con más peso cuanto más significativo es el campo. El texto
+se normaliza sin tildes ni mayúsculas y con un recorte sencillo de plurales,
+así 'acción' encuentra 'ACCION' y 'aventuras' encuentra 'aventura'.
+
+El índice se guarda en arrays de NumPy (formato CSR: por cada término, los
+juegos en los que aparece y su peso) para que 100k juegos ocupen poco y una
+consulta sea un puñado de operaciones vectorizadas. Cada proceso lo
+construye en segundo plano (al arrancar, ver pymonproject/wsgi.py, o en la
+primera consulta) y lo reconstruye cuando cambian los sellos de versión del
+catálogo o de las categorías; mientras tanto sigue respondiendo con el
+anterior. Las consultas nunca esperan a una construcción: sin índice lanzan
+IndexNotReady.
+"""
+import bisect
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections
+
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY, category_registry
+from .models import Videojuego
+from .mongo import get_collection
+from .versions import get_version
+
+logger = logging.getLogger(__name__)
+
+# Peso de cada campo en la relevancia
+FIELD_WEIGHTS = {
+    'name': 5.0,
+    'categories': 3.0,
+    'developer': 2.0,
+    'publisher': 2.0,
+    'desc': 1.0,
+}
+
+STOPWORDS = frozenset(
+    'a al con de del el en es la las lo los o para por que se su sus un una uno unos unas y e u '
+    'the of and'.split()
+)
+
+# Términos del vocabulario que puede abarcar el prefijo de la última palabra
+PREFIX_EXPANSION = 50
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Minúsculas y sin tildes ni diéresis (la ñ queda como n)."""
+    text = unicodedata.normalize('NFKD', text or '')
+    return text.encode('ascii', 'ignore').decode('ascii').lower()
+
+
+def stem(token):
+    """Recorte de plurales: 'juegos' -> 'juego', 'acciones' -> 'accion'."""
+    if len(token) > 4 and token.endswith('es') and token[-3] in 'nlrdzj':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text, stems=None):
+    """
+    Palabras normalizadas de ``text``. ``stems`` es una caché de recortes
+    que solo se usa al construir el índice; las consultas recortan cada vez.
+    """
+    out = []
+    for raw in _TOKEN.findall(fold(text)):
+        # Cada palabra distinta se recorta una sola vez ('' = palabra vacía)
+        token = stems.get(raw) if stems is not None else None
+        if token is None:
+            token = '' if raw in STOPWORDS else stem(raw)
+            if stems is not None:
+                stems[raw] = token
+        if token:
+            out.append(token)
+    return out
+
+
+class IndexNotReady(Exception):
+    """El índice del proceso aún se está construyendo."""
+
+
+class SearchIndex:
+    def __init__(self, docs, category_names):
+        """``docs``: documentos de 'videojuegos'; ``category_names``: {código: nombre}."""
+        vocab = {}
+        stems = {}
+        codes, terms, doc_ids, weights = [], [], [], []
+        for doc_id, doc in enumerate(docs):
+            codes.append(doc['code'])
+            counts = Counter()
+            fields = {
+                'name': doc.get('name'),
+                'categories': ' '.join(category_names.get(c, '') for c in doc.get('category') or []),
+                'developer': doc.get('developer'),
+                'publisher': doc.get('publisher'),
+                'desc': doc.get('desc'),
+            }
+            for field, text in fields.items():
+                weight = FIELD_WEIGHTS[field]
+                for token, tf in Counter(tokenize(text, stems)).items():
+                    counts[token] += weight * tf
+            for token, tf in counts.items():
+                terms.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(doc_id)
+                weights.append(tf)
+
+        self.codes = np.array(codes, dtype=np.int64)
+        terms = np.array(terms, dtype=np.int32)
+        order = np.argsort(terms, kind='stable')
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)[order]
+        # Saturación logarítmica: repetir una palabra ayuda poco
+        self.weights = (1 + np.log(np.array(weights, dtype=np.float32)))[order]
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocab)), out=self.offsets[1:])
+        self.vocab = vocab
+        self.sorted_terms = sorted(vocab)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def _postings(self, term_id):
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.doc_ids[start:end], self.weights[start:end]
+
+    def _term_ids(self, token, prefix):
+        """Términos que casan con ``token`` (y, si es el último, los que empiezan por él)."""
+        ids = [self.vocab[token]] if token in self.vocab else []
+        if prefix and len(token) >= 3:
+            start = bisect.bisect_left(self.sorted_terms, token)
+            for term in self.sorted_terms[start:start + PREFIX_EXPANSION]:
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    ids.append(self.vocab[term])
+        return ids
+
+    def search(self, query, limit=24):
+        """(códigos ordenados por relevancia, total de coincidencias). Todas las palabras deben aparecer."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or not len(self):
+            return [], 0
+        n = len(self)
+        scores = np.zeros(n, dtype=np.float32)
+        hits = np.zeros(n, dtype=np.int16)
+        for i, token in enumerate(tokens):
+            term_scores = np.zeros(n, dtype=np.float32)
+            for term_id in self._term_ids(token, prefix=i == len(tokens) - 1):
+                docs, weights = self._postings(term_id)
+                idf = math.log(1 + n / len(docs))
+                # Dentro de un término cada juego aparece una sola vez
+                term_scores[docs] = np.maximum(term_scores[docs], weights * idf)
+            matched = term_scores > 0
+            if not matched.any():
+                return [], 0
+            scores += term_scores
+            hits += matched
+        candidates = np.flatnonzero(hits == len(tokens))
+        total = len(candidates)
+        if total > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [int(c) for c in self.codes[candidates]], total
+
+
+def load_index(collection=None):
+    """Construye el índice leyendo solo los campos que se indexan."""
+    collection = collection or get_collection(Videojuego)
+    name_map, _ = category_registry.maps()
+    cursor = collection.find({}, {'_id': 0, 'code': 1, 'name': 1, 'desc': 1, 'developer': 1,
+                                  'publisher': 1, 'category': 1})
+    return SearchIndex(cursor, name_map)
+
+
+class SearchService:
+    """
+    Índice de búsqueda del proceso. Se construye y se reconstruye siempre en
+    un hilo aparte; tras un fallo no se reintenta hasta pasados
+    SEARCH_RETRY_INTERVAL segundos.
+    """
+
+    def __init__(self, loader=load_index):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._index = None
+        self._key = None
+        self._checked = -math.inf
+        self._failed = -math.inf
+        self._building = False
+
+    def _current_key(self):
+        return get_version(CATALOG_VERSION_KEY), get_version(CATEGORIES_VERSION_KEY)
+
+    def _rebuild(self, key=None):
+        try:
+            start = time.perf_counter()
+            if key is None:
+                key = self._current_key()
+            index = self._loader()
+            self._index, self._key = index, key
+            logger.info('Índice de %s: %d juegos en %.1fs', type(self).__name__, len(index),
+                        time.perf_counter() - start)
+        except Exception:
+            self._failed = time.monotonic()
+            logger.exception('Fallo al construir el índice de %s', type(self).__name__)
+        finally:
+            self._building = False
+
+    def _rebuild_in_thread(self, key=None):
+        try:
+            self._rebuild(key)
+        finally:
+            # El hilo abre su propia conexión; se cierra al terminar
+            close_old_connections()
+
+    def _refresh(self, now):
+        """Lanza la (re)construcción si hace falta. Se llama con el lock."""
+        self._checked = now
+        if self._building or now - self._failed < getattr(settings, 'SEARCH_RETRY_INTERVAL', 60):
+            return
+        key = None
+        if self._index is not None:
+            # Ya hay índice: solo se rehace si han cambiado los sellos. Sin
+            # índice los lee el propio hilo, así no se espera aquí a Mongo
+            key = self._current_key()
+            if key == self._key:
+                return
+        self._building = True
+        threading.Thread(target=self._rebuild_in_thread, args=(key,), name='search-index', daemon=True).start()
+
+    def warm(self):
+        """Empieza a construir el índice en segundo plano (al arrancar el proceso). No bloquea."""
+        with self._lock:
+            self._refresh(time.monotonic())
+
+    def index(self):
+        """Índice actual; IndexNotReady mientras se construye el primero."""
+        interval = getattr(settings, 'SEARCH_CHECK_INTERVAL', 5)
+        now = time.monotonic()
+        if now - self._checked >= interval:
+            with self._lock:
+                if now - self._checked >= interval:
+                    self._refresh(now)
+        index = self._index
+        if index is None:
+            raise IndexNotReady()
+        return index
+
+    def search(self, query, limit=24):
+        return self.index().search(query, limit)
+
+
+search_service = SearchService()
@@ -0,0 +1,144 @@
+"""
+Secuencias atómicas para los códigos de juegos, categorías y rankings y la
+serie de las reseñas de cada juego.
+
+El último valor entregado de cada secuencia vive en la colección 'counters'
+y se reserva con un find_one_and_update + $inc, así dos peticiones nunca
+reciben el mismo código. Una secuencia puede reservar bloques de varios
+valores y repartirlos desde memoria; los valores que no llegan a usarse
+(al reiniciar el proceso) se pierden, solo dejan huecos.
+
+La primera vez que se usa una secuencia se siembra con el máximo existente
+($max, idempotente aunque lo hagan varios procesos a la vez), también
+cuando quien la crea es una importación (raise_to con ``seed``). Cuando una
+importación sube una secuencia, el bloque en memoria de ese proceso se
+descarta (discard_block); si otro proceso entrega un valor de su bloque que
+la importación ya ha escrito, el índice único lo rechaza y
+create_with_serie reintenta con un bloque nuevo.
+"""
+import threading
+import weakref
+
+from django.conf import settings
+from django.db import IntegrityError
+from pymongo import ReturnDocument
+
+from .cache import LRUCache
+from .models import Categoria, Ranking, Review, Videojuego
+from .mongo import get_collection
+
+COUNTERS_COLLECTION = 'counters'
+
+# Secuencias con bloque en memoria en este proceso, por nombre
+_live = weakref.WeakValueDictionary()
+
+
+def raise_to(name, value, collection=None, seed=None):
+    """
+    Garantiza que la secuencia ``name`` no vuelva a entregar valores <= ``value``.
+    Si la secuencia aún no existe y se pasa ``seed``, se crea con el mayor
+    entre ``seed()`` (el máximo guardado) y ``value``.
+    """
+    collection = collection or get_collection(COUNTERS_COLLECTION)
+    result = collection.update_one({'_id': name}, {'$max': {'value': value}}, upsert=seed is None)
+    if seed is not None and not result.matched_count:
+        collection.update_one({'_id': name}, {'$max': {'value': max(seed() or 0, value)}}, upsert=True)
+
+
+def discard_block(name):
+    """Olvida el bloque en memoria de la secuencia ``name`` en este proceso (tras raise_to)."""
+    sequence = _live.get(name)
+    if sequence is not None:
+        sequence.discard()
+
+
+def allocate(name, seed, count=1, collection=None):
+    """
+    Reserva ``count`` valores consecutivos de la secuencia y devuelve el
+    primero. ``seed()`` da el máximo actual si la secuencia aún no existe.
+    """
+    collection = collection or get_collection(COUNTERS_COLLECTION)
+    for _ in range(2):
+        doc = collection.find_one_and_update(
+            {'_id': name},
+            {'$inc': {'value': count}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is not None:
+            return doc['value'] - count + 1
+        raise_to(name, 0, collection, seed)
+    raise RuntimeError(f'No se pudo reservar la secuencia {name}')
+
+
+class Sequence:
+    """Secuencia con nombre que reserva ``block`` valores por viaje a Mongo."""
+
+    def __init__(self, name, seed, block=1, collection=None):
+        self.name = name
+        self.seed = seed
+        self.block = block
+        self.collection = collection
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+        _live[name] = self
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next = allocate(self.name, self.seed, self.block, self.collection)
+                self._end = self._next + self.block
+            value = self._next
+            self._next += 1
+            return value
+
+    def discard(self):
+        """Olvida lo que queda del bloque; el siguiente valor se reserva en Mongo."""
+        with self._lock:
+            self._next = self._end = 0
+
+
+def _max_value(queryset, field):
+    return queryset.order_by(f'-{field}').values_list(field, flat=True).first()
+
+
+def collection_max(collection, field, query=None):
+    """Mayor valor de ``field`` en una colección pymongo (None si no hay documentos)."""
+    doc = collection.find_one(query or {}, {field: 1}, sort=[(field, -1)])
+    return doc.get(field) if doc else None
+
+
+game_sequence = Sequence('videojuegos', lambda: _max_value(Videojuego.objects.all(), 'code'))
+category_sequence = Sequence('categorias', lambda: _max_value(Categoria.objects.all(), 'code'))
+ranking_sequence = Sequence('rankings', lambda: _max_value(Ranking.objects.all(), 'code'))
+
+# Una secuencia de serie por juego; solo se guardan en memoria las de los
+# juegos con reseñas recientes
+_review_sequences = LRUCache('review_series', 1024)
+_review_lock = threading.Lock()
+
+
+def _review_sequence(game_code):
+    with _review_lock:
+        sequence = _review_sequences.get(game_code)
+        if sequence is None:
+            sequence = Sequence(
+                f'reviews:{game_code}',
+                lambda: _max_value(Review.objects.filter(code=game_code), 'serie'),
+                block=getattr(settings, 'REVIEW_SERIE_BLOCK', 10),
+            )
+            _review_sequences.set(game_code, sequence)
+    return sequence
+
+
+def create_with_serie(game_code, create):
+    """
+    Llama a ``create(serie)`` con la siguiente serie de ``game_code``. Si la
+    serie ya existe (una importación en otro proceso la ha escrito después
+    de reservar el bloque), descarta el bloque y reintenta una vez.
+    """
+    sequence = _review_sequence(game_code)
+    try:
+        return create(sequence.next())
+    except IntegrityError:
+        sequence.discard()
+        return create(sequence.next())
@@ -0,0 +1,14 @@
+from django import template
+
+from rankingsafa.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def game_cards(context, videojuegos, style):
+    """
+    {% game_cards videojuegos 'inicio' %}: tarjetas de un listado desde la caché
+    de fragmentos. Si la vista ya leyó los sellos (card_stamps) no se vuelven a pedir.
+    """
+    return render_cards(videojuegos, style, stamps=context.get('card_stamps'))
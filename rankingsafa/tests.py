@@ -1,3 +1,699 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import mongomock
+from django.db import IntegrityError
+from django.db.models import Q
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from pymongo import UpdateMany
+
+from .importer import (
+    CatalogFormatError, InvalidRecord, import_catalog_stream, iter_catalog, iter_ndjson, report_totals,
+    videojuego_doc,
+)
+from .export import export_chunks
+from .indexes import sync_indexes
+from .pagination import build_page, decode_cursor, encode_cursor, keyset_filter, keyset_q
+from .autocomplete import PrefixIndex
+from .cache import LRUCache
+from .catalog import counts_pipeline, faceted_search
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY, CategoryRegistry
+from .pagecache import versioned_page
+from .ranking_engine import PositionMatrix
+from .search import IndexNotReady, SearchIndex, SearchService, tokenize
+from .review_stats import delete_review, rebuild_review_stats, stats_delta, update_review
+from .scores import (
+    BUCKETS_COLLECTION, SCORES_COLLECTION, apply_ranking_change, compute_scores, delete_rankings, rebuild_scores,
+    update_ranking, window_lists, window_scores,
+)
+from .sequences import Sequence, allocate, collection_max, create_with_serie
+from .views import _ranking_params
+
+
+class MockCollection:
+    """
+    Colección de mongomock con el bulk_write de upserts que usa la
+    importación (mongomock no entiende las operaciones de pymongo >= 4.9).
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, requests, ordered=True):
+        result = mongomock.results.BulkWriteResult({'nMatched': 0, 'nModified': 0, 'nUpserted': 0}, True)
+        for op in requests:
+            update = self._collection.update_many if isinstance(op, UpdateMany) else self._collection.update_one
+            r = update(op._filter, op._doc, upsert=op._upsert)
+            result.bulk_api_result['nMatched'] += r.matched_count
+            result.bulk_api_result['nModified'] += r.modified_count
+            result.bulk_api_result['nUpserted'] += 1 if r.upserted_id is not None else 0
+        return result
+
+
+def mock_database():
+    database = mongomock.MongoClient().db
+    return {name: MockCollection(database[name])
+            for name in ('categorias', 'videojuegos', 'reviews', 'rankings', 'counters', 'versions', 'import_seen',
+                         'ranking_scores', 'ranking_buckets')}
+
+
+CATALOG = {
+    'categorias': [{'id': 'cat_001', 'nombre': 'Rol ñ'}, {'id': 'cat_002', 'nombre': 'Acción'}],
+    'otra_clave': {'ignorada': [1, 2, 3]},
+    'videojuegos': [
+        {'id': f'game_{i:03d}', 'nombre': f'Juego {i}', 'categorias': ['cat_001'], 'precio_actual': i * 1.25}
+        for i in range(1, 30)
+    ],
+}
+
+
+class IterCatalogTests(SimpleTestCase):
+    def test_chunk_boundaries(self):
+        data = json.dumps(CATALOG, ensure_ascii=False, indent=1).encode('utf-8')
+        expected = [(s, r) for s in ('categorias', 'videojuegos') for r in CATALOG[s]]
+        # Lecturas de 1 byte parten caracteres UTF-8, cadenas y números
+        for read_size in (1, 2, 3, 7, 64, len(data)):
+            with self.subTest(read_size=read_size):
+                self.assertEqual(list(iter_catalog(io.BytesIO(data), read_size)), expected)
+
+    def test_bom_and_text_files(self):
+        data = json.dumps(CATALOG)
+        self.assertEqual(len(list(iter_catalog(io.BytesIO(b'\xef\xbb\xbf' + data.encode())))), 31)
+        self.assertEqual(len(list(iter_catalog(io.StringIO(data), 5))), 31)
+
+    def test_empty(self):
+        self.assertEqual(list(iter_catalog(io.BytesIO(b' {} '))), [])
+        self.assertEqual(list(iter_catalog(io.BytesIO(b'{"categorias": []}'))), [])
+
+    def test_format_errors(self):
+        for data in (b'', b'[]', b'{"categorias": [{"id": 1}', b'{"categorias": [1 2]}', b'{1: []}',
+                     b'{"categorias": [] "videojuegos": []}'):
+            with self.subTest(data=data), self.assertRaises(CatalogFormatError):
+                list(iter_catalog(io.BytesIO(data), 4))
+
+
+class RecordValidationTests(SimpleTestCase):
+    def test_videojuego_doc(self):
+        doc = videojuego_doc({'id': 'game_013', 'nombre': ' Zelda ', 'categorias': ['cat_002', 'x', 'cat_002'],
+                              'plataformas': ['PC', ' ', 3], 'precio_actual': '9.5', 'multijugador': 'sí',
+                              'fecha_lanzamiento': '2020-02-29'})
+        self.assertEqual((doc['code'], doc['name'], doc['category']), (13, 'Zelda', [2]))
+        self.assertEqual((doc['platforms'], doc['price'], doc['multiplayer']), (['PC'], 9.5, True))
+        self.assertEqual(doc['release_date'].isoformat(), '2020-02-29T00:00:00')
+
+    def test_invalid_records(self):
+        for record in ('x', {'id': 'cat_001', 'nombre': 'X'}, {'id': 'game_1', 'nombre': ''},
+                       {'id': 'game_1', 'nombre': 'X', 'precio_actual': -1},
+                       {'id': 'game_1', 'nombre': 'X', 'fecha_lanzamiento': '2020-13-01'}):
+            with self.subTest(record=record), self.assertRaises(InvalidRecord):
+                videojuego_doc(record)
+
+
+class ImportStreamTests(SimpleTestCase):
+    def test_import_counts_and_reimport(self):
+        collections = mock_database()
+        catalog = {**CATALOG, 'videojuegos': CATALOG['videojuegos'] + [{'id': 'game_x', 'nombre': 'Mal'}]}
+        data = json.dumps(catalog).encode('utf-8')
+
+        with self.assertLogs('rankingsafa.importer', 'WARNING'):
+            report = import_catalog_stream(io.BytesIO(data), batch_size=10, collections=collections)
+        totals = report_totals(report)
+        self.assertEqual((totals['inserted'], totals['failed'], totals['missing']), (31, 1, 0))
+        self.assertEqual(collections['videojuegos'].count_documents({}), 29)
+        self.assertEqual(collections['counters'].find_one({'_id': 'videojuegos'})['value'], 29)
+
+        with self.assertLogs('rankingsafa.importer', 'WARNING'):
+            report = import_catalog_stream(io.BytesIO(data), batch_size=10, collections=collections)
+        totals = report_totals(report)
+        self.assertEqual((totals['inserted'], totals['updated'], totals['unchanged']), (0, 0, 31))
+        # Las claves vistas se borran al terminar
+        self.assertEqual(collections['import_seen'].count_documents({}), 0)
+
+    def test_unchanged_documents_are_not_written(self):
+        collections = mock_database()
+        data = json.dumps(CATALOG).encode('utf-8')
+        import_catalog_stream(io.BytesIO(data), batch_size=10, collections=collections)
+        writes = []
+        collections['videojuegos'].bulk_write = lambda requests, ordered=True: writes.append(requests)
+        totals = report_totals(import_catalog_stream(io.BytesIO(data), batch_size=10, collections=collections))
+        self.assertEqual(writes, [])
+        self.assertEqual((totals['unchanged'], totals['missing']), (31, 0))
+
+    def test_missing_counts_documents_not_in_file(self):
+        collections = mock_database()
+        collections['videojuegos'].insert_one({'code': 500, 'name': 'Creado en la web'})
+        catalog = {'videojuegos': CATALOG['videojuegos'][:5]}
+        data = json.dumps(catalog).encode('utf-8')
+        for expected in ({'inserted': 5, 'updated': 0, 'unchanged': 0}, {'inserted': 0, 'updated': 0, 'unchanged': 5}):
+            totals = report_totals(import_catalog_stream(io.BytesIO(data), batch_size=2, collections=collections))
+            self.assertEqual({k: totals[k] for k in expected}, expected)
+            self.assertEqual(totals['missing'], 1)
+
+        catalog['videojuegos'][0] = {**catalog['videojuegos'][0], 'nombre': 'Cambiado'}
+        totals = report_totals(import_catalog_stream(io.BytesIO(json.dumps(catalog).encode('utf-8')), batch_size=2,
+                                                     collections=collections))
+        self.assertEqual((totals['updated'], totals['unchanged'], totals['missing']), (1, 4, 1))
+
+
+class ReviewStatsTests(SimpleTestCase):
+    def setUp(self):
+        database = mock_database()
+        self.games, self.reviews = database['videojuegos'], database['reviews']
+        self.games.insert_one({'code': 1, 'reviews_count': 0, 'rating_sum': 0, 'rating_hist': {}})
+        for serie, rating in ((1, 3), (2, 5), (3, 3)):
+            self.reviews.insert_one({'code': 1, 'serie': serie, 'rating': rating})
+        rebuild_review_stats(self.games, self.reviews)
+
+    def stats(self):
+        return self.games.find_one({'code': 1}, {'_id': 0, 'reviews_count': 1, 'rating_sum': 1, 'rating_hist': 1})
+
+    def test_stats_delta(self):
+        self.assertEqual(stats_delta(new_rating=4), {'reviews_count': 1, 'rating_sum': 4, 'rating_hist.4': 1})
+        self.assertEqual(stats_delta(old_rating=2), {'reviews_count': -1, 'rating_sum': -2, 'rating_hist.2': -1})
+        self.assertEqual(stats_delta(1, 4), {'rating_sum': 3, 'rating_hist.1': -1, 'rating_hist.4': 1})
+        self.assertEqual(stats_delta(3, 3), {})
+        self.assertEqual(stats_delta(), {})
+
+    def test_rebuild(self):
+        self.assertEqual(self.stats(), {'reviews_count': 3, 'rating_sum': 11, 'rating_hist': {'3': 2, '5': 1}})
+
+    def test_concurrent_edits_use_stored_rating(self):
+        # Dos ediciones que leyeron la nota 3: la segunda parte de la nota que dejó la primera
+        update_review(1, 1, {'rating': 4}, self.reviews, self.games)
+        update_review(1, 1, {'rating': 4, 'comentary': 'otra'}, self.reviews, self.games)
+        self.assertEqual(self.stats(), {'reviews_count': 3, 'rating_sum': 12, 'rating_hist': {'3': 1, '4': 1, '5': 1}})
+        self.assertIsNone(update_review(1, 99, {'rating': 1}, self.reviews, self.games))
+
+    def test_delete_only_counts_once(self):
+        self.assertEqual(delete_review(1, 2, self.reviews, self.games), {'rating': 5})
+        self.assertIsNone(delete_review(1, 2, self.reviews, self.games))
+        self.assertEqual(self.stats(), {'reviews_count': 2, 'rating_sum': 6, 'rating_hist': {'3': 2, '5': 0}})
+
+
+def score_table(collection):
+    """Contenido de ranking_scores o ranking_buckets sin _id, con los float a 9 cifras significativas."""
+    return sorted((
+        sorted((k, float(f'{v:.9g}') if isinstance(v, float) else v) for k, v in doc.items() if k != '_id')
+        for doc in collection.find()
+    ), key=repr)
+
+
+class RankingScoresTests(SimpleTestCase):
+    def setUp(self):
+        database = mock_database()
+        self.rankings = database['rankings']
+        self.scores, self.buckets = database[SCORES_COLLECTION], database[BUCKETS_COLLECTION]
+        self.today = datetime.date.today()
+        for user, ranking_list, days_ago in (('ana', [1, 2, 3], 0), ('luis', [3, 1], 10), ('eva', [2, 4], 400)):
+            day = self.today - datetime.timedelta(days=days_ago)
+            self.rankings.insert_one({'user': user, 'category': 5, 'rankingList': ranking_list,
+                                      'rankDate': datetime.datetime.combine(day, datetime.time.min)})
+            apply_ranking_change(5, [], ranking_list, new_date=day, collection=self.scores, buckets=self.buckets)
+
+    def assertMatchesRebuild(self):
+        database = mock_database()
+        with mock.patch('rankingsafa.scores.bump_version'):
+            rebuild_scores(5, database[SCORES_COLLECTION], database[BUCKETS_COLLECTION], self.rankings)
+        self.assertEqual(score_table(self.scores), score_table(database[SCORES_COLLECTION]))
+        self.assertEqual(score_table(self.buckets), score_table(database[BUCKETS_COLLECTION]))
+
+    def test_incremental_matches_rebuild(self):
+        self.assertMatchesRebuild()
+        update_ranking(5, 'luis', [4, 3, 1], self.rankings, self.scores, self.buckets)
+        self.assertMatchesRebuild()
+        self.assertEqual(delete_rankings(5, 'eva', self.rankings, self.scores, self.buckets), 1)
+        self.assertMatchesRebuild()
+
+    def test_concurrent_saves_and_deletes_do_not_drift(self):
+        # Dos peticiones leyeron la misma lista antigua de 'ana' y guardan a la vez
+        for ranking_list in ([3, 2, 1], [2, 1]):
+            self.assertIsNotNone(update_ranking(5, 'ana', ranking_list, self.rankings, self.scores, self.buckets))
+        self.assertMatchesRebuild()
+        # Y dos borrados de la misma tier list: solo uno la descuenta
+        self.assertEqual(delete_rankings(5, 'ana', self.rankings, self.scores, self.buckets), 1)
+        self.assertEqual(delete_rankings(5, 'ana', self.rankings, self.scores, self.buckets), 0)
+        self.assertIsNone(update_ranking(5, 'ana', [1], self.rankings, self.scores, self.buckets))
+        self.assertMatchesRebuild()
+
+    def test_windows(self):
+        self.assertEqual(window_scores(5, '30d', self.today, buckets=self.buckets), compute_scores([[1, 2, 3], [3, 1]]))
+        if (self.today - datetime.timedelta(days=10)).year == self.today.year:
+            expected = compute_scores([[1, 2, 3], [3, 1]])
+        else:
+            expected = compute_scores([[1, 2, 3]])
+        self.assertEqual(window_scores(5, 'year', self.today, buckets=self.buckets), expected)
+        decay = window_scores(5, 'decay', self.today, collection=self.scores)
+        # Mismos votos; el juego 4 solo aparece en la lista antigua y pesa casi nada
+        self.assertEqual({code: s['votes'] for code, s in decay.items()}, {1: 2, 2: 2, 3: 2, 4: 1})
+        self.assertAlmostEqual(decay[4]['points'], 1.0)
+        self.assertGreater(decay[2]['points'] / decay[2]['votes'], 1.9)
+
+    def test_window_list_counts(self):
+        last_year = self.today.year != (self.today - datetime.timedelta(days=10)).year
+        self.assertEqual(window_lists(5, '30d', self.today, self.buckets), 2)
+        self.assertEqual(window_lists(5, 'year', self.today, self.buckets), 1 if last_year else 2)
+        update_ranking(5, 'eva', [4], self.rankings, self.scores, self.buckets)
+        delete_rankings(5, 'ana', self.rankings, self.scores, self.buckets)
+        self.assertEqual(window_lists(5, '30d', self.today, self.buckets), 2)
+        self.assertEqual(window_lists(5, 'year', self.today, self.buckets), 1 if last_year else 2)
+        delete_rankings(5, 'luis', self.rankings, self.scores, self.buckets)
+        self.assertEqual(window_lists(5, '30d', self.today, self.buckets), 1)
+        self.assertMatchesRebuild()
+
+
+class RankingEngineTests(SimpleTestCase):
+    # Tres votantes A > B > C y dos B > C > A: Borda prefiere B, por pares gana A
+    LISTS = [[1, 2, 3]] * 3 + [[2, 3, 1]] * 2
+
+    def test_scores_match_python(self):
+        lists = self.LISTS + [[4, 1], [], [3]]
+        self.assertEqual(PositionMatrix(lists).scores(), compute_scores(lists))
+
+    def test_pairwise_and_methods(self):
+        matrix = PositionMatrix(self.LISTS)
+        self.assertEqual(matrix.pairwise().tolist(), [[0, 3, 3], [2, 0, 5], [2, 0, 0]])
+        self.assertEqual(matrix.order('borda'), [2, 1, 3])
+        self.assertEqual(matrix.order('copeland'), [1, 2, 3])
+        self.assertEqual(matrix.order('schulze'), [1, 2, 3])
+        self.assertEqual(PositionMatrix([]).order('schulze'), [])
+        with self.assertRaises(ValueError):
+            matrix.order('kemeny')
+
+    def test_bootstrap(self):
+        intervals = PositionMatrix([[1, 2]] * 4).bootstrap(samples=20, seed=1)
+        self.assertEqual(intervals, {1: (2.0, 2.0), 2: (1.0, 1.0)})
+        low, high = PositionMatrix(self.LISTS).bootstrap(samples=200, seed=1)[1]
+        self.assertLessEqual(low, 2.2)
+        self.assertGreaterEqual(high, 2.2)
+
+    def test_pairwise_methods_are_staff_only(self):
+        request = RequestFactory().get('/', {'metodo': 'schulze', 'modo': 'python'})
+        request.user = AnonymousUser()
+        self.assertEqual(_ranking_params(request), ('tabla', 'all', 'borda'))
+        request.user = SimpleNamespace(is_staff=True)
+        self.assertEqual(_ranking_params(request), ('python', 'all', 'schulze'))
+        request = RequestFactory().get('/', {'metodo': 'schulze', 'ventana': '30d'})
+        request.user = SimpleNamespace(is_staff=True)
+        self.assertEqual(_ranking_params(request), ('tabla', '30d', 'borda'))
+
+
+class SequenceTests(SimpleTestCase):
+    def setUp(self):
+        self.database = mock_database()
+        self.counters, self.games = self.database['counters'], self.database['videojuegos']
+
+    def test_allocate_seeds_and_reserves_blocks(self):
+        self.games.insert_one({'code': 7})
+        seed = lambda: collection_max(self.games, 'code')
+        self.assertEqual(allocate('videojuegos', seed, collection=self.counters), 8)
+        self.assertEqual(allocate('videojuegos', seed, count=3, collection=self.counters), 9)
+        self.assertEqual(allocate('videojuegos', seed, collection=self.counters), 12)
+
+    def test_import_without_counter_seeds_from_stored_max(self):
+        # Juego creado desde la web con un código mayor que los del fichero
+        self.games.insert_one({'code': 500, 'name': 'Creado en la web'})
+        data = json.dumps({'videojuegos': CATALOG['videojuegos'][:5]}).encode('utf-8')
+        import_catalog_stream(io.BytesIO(data), collections=self.database)
+        self.assertEqual(self.counters.find_one({'_id': 'videojuegos'})['value'], 500)
+        self.assertEqual(allocate('videojuegos', lambda: 0, collection=self.counters), 501)
+
+    def test_import_discards_block_in_memory(self):
+        self.database['reviews'].insert_one({'code': 1, 'serie': 1, 'rating': 3})
+        sequence = Sequence('reviews:1', lambda: collection_max(self.database['reviews'], 'serie', {'code': 1}),
+                            block=10, collection=self.counters)
+        self.assertEqual(sequence.next(), 2)
+        # La importación escribe series dentro del bloque ya reservado (3..11)
+        records = [{'juego': 'game_001', 'serie': serie, 'usuario': 'u', 'puntuacion': 4, 'fecha': '2024-01-01'}
+                   for serie in (3, 15)]
+        data = '\n'.join(json.dumps({'seccion': 'reviews', **r}) for r in records).encode('utf-8')
+        import_catalog_stream(io.BytesIO(data), collections=self.database, name='reseñas.ndjson')
+        self.assertEqual(sequence.next(), 16)
+
+    def test_create_with_serie_retries_on_duplicate(self):
+        reviews = self.database['reviews']
+        reviews.create_index([('code', 1), ('serie', 1)], unique=True)
+        sequence = Sequence('reviews:1', lambda: 0, block=10, collection=self.counters)
+        self.assertEqual(sequence.next(), 1)
+        # Otro proceso importa la serie 2 después de reservar el bloque
+        reviews.insert_one({'code': 1, 'serie': 2})
+        self.counters.update_one({'_id': 'reviews:1'}, {'$max': {'value': 2}})
+
+        def create(serie):
+            if reviews.count_documents({'code': 1, 'serie': serie}):
+                raise IntegrityError
+            reviews.insert_one({'code': 1, 'serie': serie})
+            return serie
+
+        with mock.patch('rankingsafa.sequences._review_sequence', return_value=sequence):
+            self.assertEqual(create_with_serie(1, create), 11)
+
+
+class CatalogTests(SimpleTestCase):
+    def setUp(self):
+        self.games = mongomock.MongoClient().db.videojuegos
+        self.games.insert_many([
+            {'code': i, 'name': f'Juego {i}', 'category': [i % 3 + 1],
+             'platforms': ['PC'] if i % 2 else ['PS5', 'PC']}
+            for i in range(1, 21)
+        ])
+
+    def test_pages_and_disjunctive_counts(self):
+        result = faceted_search([1, 2], ['PS5'], 4, collection=self.games)
+        query = {'category': {'$in': [1, 2]}, 'platforms': 'PS5'}
+        expected = [d['code'] for d in self.games.find(query, sort=[('code', 1)])]
+        self.assertEqual([g['code'] for g in result['games']], expected[:4])
+        self.assertTrue(result['has_more'])
+        self.assertEqual(result['total'], len(expected))
+        # Categorías: solo con el filtro de plataformas; plataformas: solo con el de categorías
+        self.assertEqual(result['categories'], {1: 3, 2: 3, 3: 4})
+        self.assertEqual(result['platforms'], {'PC': 13, 'PS5': 6})
+        after = faceted_search([1, 2], ['PS5'], 4, after=expected[3], collection=self.games)
+        self.assertEqual([g['code'] for g in after['games']], expected[4:8])
+        before = faceted_search([1, 2], ['PS5'], 4, before=expected[4], collection=self.games)
+        self.assertEqual([g['code'] for g in before['games']], expected[:4])
+
+    def test_counts_are_cached_per_filter_they_depend_on(self):
+        cache = LRUCache('test_facets', 16)
+        faceted_search([1], [], 4, collection=self.games, cache=cache, stamp=1)
+        with mock.patch.object(self.games, 'aggregate', side_effect=AssertionError) as aggregate:
+            # Los recuentos de categoría sin filtro de plataformas son los mismos
+            result = faceted_search([1], [], 4, after=9, collection=self.games, cache=cache, stamp=1)
+            self.assertEqual(result['categories'], {1: 6, 2: 7, 3: 7})
+            with self.assertRaises(AssertionError):
+                faceted_search([2], [], 4, collection=self.games, cache=cache, stamp=1)
+            self.assertEqual(aggregate.call_count, 1)
+
+    def test_counts_match_first(self):
+        self.assertEqual(counts_pipeline('category', {'platforms': {'$in': ['PC']}})[0],
+                         {'$match': {'platforms': {'$in': ['PC']}}})
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        values = [3, 'Zelda ñ', None, 1.5, datetime.date(2024, 2, 29), datetime.datetime(2024, 1, 2, 3, 4, 5)]
+        token = encode_cursor(values)
+        self.assertRegex(token, r'^[A-Za-z0-9_-]+$')
+        self.assertEqual(decode_cursor(token), values)
+
+    def test_invalid_tokens(self):
+        for token in ('', None, 'no es base64!', encode_cursor([1])[:-2] + '**', 'eyJhIjoxfQ',
+                      encode_cursor([{'x': 1}]), encode_cursor([{'d': 'ayer'}])):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+
+    def test_keyset_q(self):
+        self.assertEqual(str(keyset_q(['code'], [5])), str(Q(code__gt=5)))
+        self.assertEqual(
+            str(keyset_q(['-reviewDate', '-serie'], ['d', 7])),
+            str(Q(reviewDate__lt='d') | (Q(serie__lt=7) & Q(reviewDate='d'))),
+        )
+
+    def test_build_page(self):
+        key = lambda row: [row]
+        first = build_page([1, 2, 3], True, None, None, key)
+        self.assertEqual((decode_cursor(first['next']), first['prev']), ([3], None))
+        middle = build_page([4, 5, 6], True, [3], None, key)
+        self.assertEqual((decode_cursor(middle['next']), decode_cursor(middle['prev'])), ([6], [4]))
+        last = build_page([7], False, [6], None, key)
+        self.assertEqual((last['next'], decode_cursor(last['prev'])), (None, [7]))
+        # Volviendo atrás desde la segunda página: no hay más filas antes
+        back = build_page([1, 2, 3], False, None, [4], key)
+        self.assertEqual((decode_cursor(back['next']), back['prev']), ([3], None))
+        self.assertEqual(build_page([], False, [9], None, key), {'items': [], 'next': None, 'prev': None})
+
+
+def wait_built(service):
+    deadline = time.monotonic() + 5
+    while service._building and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+GAMES = [
+    {'code': 1, 'name': 'Hollow Knight', 'developer': 'Team Cherry', 'category': [1], 'desc': 'Acción y plataformas'},
+    {'code': 2, 'name': 'Hades', 'developer': 'Supergiant', 'category': [1, 2], 'desc': 'Roguelike de acción'},
+    {'code': 3, 'name': 'Celeste', 'developer': 'Maddy Makes Games', 'category': [2], 'desc': 'Plataformas'},
+]
+
+
+class SearchTests(SimpleTestCase):
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Los JUEGOS de Acción'), ['juego', 'accion'])
+        stems = {}
+        tokenize('aventuras', stems)
+        self.assertEqual(stems, {'aventuras': 'aventura'})
+
+    def test_search(self):
+        index = SearchIndex(GAMES, {1: 'Acción', 2: 'Indie'})
+        self.assertEqual(index.search('acciones')[1], 2)
+        self.assertEqual(index.search('hollow')[0], [1])
+        # La última palabra vale como prefijo
+        self.assertEqual(index.search('plataformas cel'), ([3], 1))
+        self.assertEqual(index.search('de los'), ([], 0))
+
+    @override_settings(SEARCH_CHECK_INTERVAL=0, SEARCH_RETRY_INTERVAL=60)
+    def test_service_builds_in_background_and_backs_off(self):
+        calls = []
+
+        def loader():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('Mongo no responde')
+            return SearchIndex(GAMES, {})
+
+        service = SearchService(loader)
+        service._current_key = lambda: (1, 1)
+        with self.assertLogs('rankingsafa.search', 'ERROR'):
+            with self.assertRaises(IndexNotReady):
+                service.search('hades')
+            wait_built(service)
+        # Tras el fallo no se reintenta en cada petición
+        for _ in range(3):
+            with self.assertRaises(IndexNotReady):
+                service.search('hades')
+        self.assertEqual(len(calls), 1)
+
+        service._failed -= 60
+        with self.assertRaises(IndexNotReady):
+            service.search('hades')
+        wait_built(service)
+        self.assertEqual(service.search('hades'), ([2], 1))
+        self.assertEqual(len(calls), 2)
+
+
+class PrefixIndexTests(SimpleTestCase):
+    def games(self, n):
+        return [{'code': i, 'name': f'Juego {i} Knight' if i % 3 else f'Hollow {i}', 'developer': f'Estudio {i % 7}',
+                 'platforms': ['PC', 'Switch'] if i % 2 else ['PS5'], 'category': [i % 4], 'reviews_count': i % 11}
+                for i in range(1, n + 1)]
+
+    def assertSameSuggestions(self, index, rebuilt):
+        for prefix in ('j', 'juego 1', 'kni', 'hollow', 'estudio', 'estudio 3', 'p', 'switch', 'zz'):
+            for category in (None, 2):
+                with self.subTest(prefix=prefix, category=category):
+                    self.assertEqual(index.suggest(prefix, 10, category=category),
+                                     rebuilt.suggest(prefix, 10, category=category))
+
+    def test_suggest(self):
+        index = PrefixIndex(self.games(30))
+        self.assertEqual([s['label'] for s in index.suggest('hollow 2', 5)['juego']], ['Hollow 21', 'Hollow 27', 'Hollow 24'])
+        self.assertEqual([s['label'] for s in index.suggest('sw')['plataforma']], ['Switch'])
+        self.assertEqual(len(index.suggest('knight', 50)['juego']), 20)
+
+    def test_incremental_changes_match_rebuild(self):
+        games = {doc['code']: doc for doc in self.games(300)}
+        index = PrefixIndex(games.values())
+        # Ediciones, altas y bajas: el último estudio y la plataforma PS5 quedan vacíos
+        for code in range(1, 301, 5):
+            games[code] = {**games[code], 'name': f'Renombrado {code}', 'developer': 'Estudio nuevo'}
+            index.upsert_game(games[code])
+        for code in range(301, 320):
+            games[code] = {'code': code, 'name': f'Nuevo {code}', 'platforms': ['Switch'], 'category': [2]}
+            index.upsert_game(games[code])
+        for code in [c for c, doc in games.items() if doc.get('platforms') == ['PS5'] or c % 7 == 6]:
+            del games[code]
+            index.remove_game(code)
+        index.remove_game(9999)
+
+        rebuilt = PrefixIndex(games.values())
+        self.assertEqual(len(index), len(rebuilt))
+        self.assertEqual(index.suggest('ps5')['plataforma'], [])
+        self.assertSameSuggestions(index, rebuilt)
+        # Y también después de compactar
+        index._compact()
+        self.assertSameSuggestions(index, rebuilt)
+
+
+class SyncIndexesTests(SimpleTestCase):
+    def test_unknown_indexes_are_only_dropped_on_request(self):
+        database = mongomock.MongoClient().db
+        database.videojuegos.create_index('name', name='creado_a_mano')
+        database.videojuegos.create_index('platforms', name='videojuegos_category')
+        actions = sync_indexes(database, only=['videojuegos'])
+        # El de nombre conocido y claves distintas se rehace; el desconocido se queda
+        self.assertIn(('videojuegos', 'borrar', 'videojuegos_category'), actions)
+        self.assertNotIn(('videojuegos', 'borrar', 'creado_a_mano'), actions)
+        self.assertEqual(sync_indexes(database, only=['videojuegos']), [])
+        self.assertEqual(sync_indexes(database, drop=True, dry_run=True, only=['videojuegos']),
+                         [('videojuegos', 'borrar', 'creado_a_mano')])
+        self.assertIn('creado_a_mano', database.videojuegos.index_information())
+
+
+class PageCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.stamps = {'pagina': 1, CATEGORIES_VERSION_KEY: 1}
+        patcher = mock.patch('rankingsafa.pagecache.get_versions',
+                             side_effect=lambda keys: tuple(self.stamps.get(k, 0) for k in keys))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = 0
+
+    def request(self, method='get', **extra):
+        request = getattr(RequestFactory(), method)(f'/pagina/{id(self)}/', **extra)
+        request.user = AnonymousUser()
+        return request
+
+    def view(self, request):
+        self.calls += 1
+        return HttpResponse(f'llamada {self.calls}')
+
+    def test_etag_and_stamps(self):
+        view = versioned_page('pagina')(self.view)
+        first = view(self.request())
+        self.assertEqual(view(self.request()).content, first.content)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(view(self.request(HTTP_IF_NONE_MATCH=first['ETag'])).status_code, 304)
+        self.stamps['pagina'] += 1
+        self.assertEqual(view(self.request()).content, b'llamada 2')
+
+    def test_post_and_messages_are_not_cached(self):
+        view = versioned_page('pagina')(self.view)
+        view(self.request('post'))
+        view(self.request('post'))
+        request = self.request()
+        request._messages = ['Guardado']
+        view(request)
+        self.assertEqual(self.calls, 3)
+        # Lo anterior tampoco ha dejado nada guardado
+        view(self.request())
+        self.assertEqual(self.calls, 4)
+
+    def test_page_is_not_stored_with_stale_categories(self):
+        categorias = [SimpleNamespace(code=1, name='Rol')]
+        registry = CategoryRegistry()
+        registry._read = lambda: list(categorias)
+        registry.ensure(1)
+
+        def view(request):
+            return HttpResponse(', '.join(c.name for c in registry.all()))
+
+        view = versioned_page(CATEGORIES_VERSION_KEY)(view)
+        with mock.patch('rankingsafa.pagecache.category_registry', registry):
+            self.assertEqual(view(self.request()).content, b'Rol')
+            # Otro proceso renombra la categoría; la copia no toca comprobar el sello todavía
+            categorias[0] = SimpleNamespace(code=1, name='Rol táctico')
+            self.stamps[CATEGORIES_VERSION_KEY] += 1
+            self.assertEqual(view(self.request()).content.decode(), 'Rol táctico')
+
+    @override_settings(CATEGORY_CHECK_INTERVAL=60)
+    def test_registry_checks_stamp_every_interval(self):
+        registry = CategoryRegistry()
+        registry._read = lambda: [SimpleNamespace(code=3, name='Puzle')]
+        with mock.patch('rankingsafa.categories.get_version', return_value=4) as get_version:
+            self.assertEqual(registry.tags_for([3, 9]), [{'name': 'Puzle', 'color': 'is-success'},
+                                                           {'name': 'Cat. 9', 'color': 'is-dark'}])
+            registry.maps()
+            self.assertEqual(get_version.call_count, 1)
+            registry.reset()
+            registry.all()
+            self.assertEqual(get_version.call_count, 2)
+
+
+class KeysetFilterTests(SimpleTestCase):
+    def test_pages_cover_collection_once(self):
+        collection = mongomock.MongoClient().db.reviews
+        # Fechas repetidas: el desempate es la serie
+        collection.insert_many([{'code': 1, 'serie': i, 'reviewDate': datetime.datetime(2024, 1, 1 + i % 4)}
+                                for i in range(1, 41)])
+        ordering = ['-reviewDate', '-serie']
+        sort = [('reviewDate', -1), ('serie', -1)]
+        expected = [(d['reviewDate'], d['serie']) for d in collection.find({'code': 1}, sort=sort)]
+
+        seen, token = [], None
+        while True:
+            query = {'code': 1}
+            if token:
+                # El cursor viaja por la URL y vuelve como datetime
+                query.update(keyset_filter(ordering, decode_cursor(token)))
+            page = list(collection.find(query, sort=sort, limit=7))
+            if not page:
+                break
+            seen += [(d['reviewDate'], d['serie']) for d in page]
+            token = encode_cursor([page[-1]['reviewDate'], page[-1]['serie']])
+        self.assertEqual(seen, expected)
+
+    def test_filter_shape(self):
+        self.assertEqual(keyset_filter(['code'], [5]), {'code': {'$gt': 5}})
+        self.assertEqual(keyset_filter(['-a', 'b'], [1, 2]),
+                         {'$or': [{'a': {'$lt': 1}}, {'a': 1, 'b': {'$gt': 2}}]})
+
+
+class NdjsonExportTests(SimpleTestCase):
+    def setUp(self):
+        self.source = mock_database()
+        self.source['categorias'].insert_many([{'code': c, 'name': f'Categoría {c}', 'desc': 'ñ', 'image': ''}
+                                               for c in (1, 2)])
+        self.source['videojuegos'].insert_many([{
+            'code': i, 'name': f'Juego {i}', 'desc': 'Descripción', 'category': [1 + i % 2], 'image': '',
+            'developer': 'Estudio', 'publisher': '', 'release_date': datetime.datetime(2020, 1, i),
+            'platforms': ['PC'], 'price': 9.99, 'age_rating': '16', 'duration': 10, 'multiplayer': i % 2 == 0,
+        } for i in range(1, 6)])
+        self.source['reviews'].insert_many([{
+            'code': 1 + i % 5, 'serie': i, 'user': f'usuario{i}', 'reviewDate': datetime.datetime(2024, 1 + i % 3, 1),
+            'rating': i % 6, 'comentary': 'Bien',
+        } for i in range(1, 13)])
+        self.source['rankings'].insert_one({'code': 1, 'user': 'usuario1', 'category': 2,
+                                            'rankDate': datetime.datetime(2024, 6, 1), 'rankingList': [5, 3, 1]})
+
+    def export(self, collections, since=None, counts=None):
+        return b''.join(export_chunks(('categorias', 'videojuegos', 'reviews', 'rankings'), since, counts,
+                                      collections))
+
+    def test_round_trip(self):
+        counts = {}
+        dump = self.export(self.source, counts=counts)
+        self.assertEqual(counts, {'categorias': 2, 'videojuegos': 5, 'reviews': 12, 'rankings': 1})
+        lines = gzip.decompress(dump).decode('utf-8').splitlines()
+        self.assertEqual(json.loads(lines[0])['seccion'], 'categorias')
+        self.assertEqual(len(lines), 20)
+
+        target = mock_database()
+        totals = report_totals(import_catalog_stream(io.BytesIO(dump), collections=target, name='volcado.ndjson.gz'))
+        self.assertEqual((totals['inserted'], totals['failed']), (20, 0))
+        self.assertEqual(gzip.decompress(self.export(target)), gzip.decompress(dump))
+        self.assertEqual(target['counters'].find_one({'_id': 'reviews:1'})['value'], 10)
+
+        totals = report_totals(import_catalog_stream(io.BytesIO(dump), collections=target, name='volcado.ndjson.gz'))
+        self.assertEqual(totals['unchanged'], 20)
+
+    def test_incremental(self):
+        counts = {}
+        self.export(self.source, since=datetime.date(2024, 3, 1), counts=counts)
+        # Las secciones sin fecha salen enteras
+        self.assertEqual(counts, {'categorias': 2, 'videojuegos': 5, 'reviews': 4, 'rankings': 1})
+
+    def test_iter_ndjson(self):
+        lines = [b'\xef\xbb\xbf{"seccion": "categorias", "id": "cat_001"}\n', b'\n', b'{"seccion": "otra"}\n']
+        self.assertEqual(list(iter_ndjson(iter(lines))), [('categorias', {'id': 'cat_001'})])
+        for line in (b'{"seccion": ', b'[1, 2]'):
+            with self.subTest(line=line), self.assertRaises(CatalogFormatError):
+                list(iter_ndjson([line]))
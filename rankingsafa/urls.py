@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.contrib.auth import views as auth_views
-from rankingsafa import views  # tus vistas personalizadas
+from rankingsafa import async_views, views  # tus vistas personalizadas
 from rankingsafa.views import *
 
+# Con ASGI las lecturas más visitadas tienen versión async
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
     # Página de inicio
-    path('inicio/', views.mostrar_inicio, name='inicio'),
+    path('inicio/', read_views.mostrar_inicio, name='inicio'),
+    path('inicio/juegos/', views.inicio_juegos, name='inicio_juegos'),
+    path('buscar/', views.buscar, name='buscar'),
+    path('autocompletar/', views.autocompletar, name='autocompletar'),
 
     # Autenticación (usamos las vistas por defecto de Django)
     # path('login/', auth_views.LoginView.as_view(template_name='registration/login.html'), name='login'),
@@ -22,6 +29,9 @@ urlpatterns = [
     path('logout/', logout_view, name='logout'),
     path('admin-dashboard/', admin_dashboard, name='admin_dashboard'),
     path('upload-json/', upload_json, name='upload_json'),
+    path('importaciones/', import_job_list, name='import_job_list'),
+    path('importaciones/<str:code>/', import_job_detail, name='import_job_detail'),
+    path('exportar/', export_ndjson, name='export_ndjson'),
 
     # CRUD Categorías (administración)
     path('categorias/', categoria_list, name='categoria_list'),
@@ -33,6 +43,7 @@ urlpatterns = [
     path('juegos-admin/', juego_list, name='juego_list'),
     path('juegos-admin/crear/', juego_create, name='juego_create'),
     path('juegos-admin/<int:pk>/editar/', juego_update, name='juego_update'),
+    path('juegos-admin/<int:pk>/desc/', juego_desc, name='juego_desc'),
     path('juegos-admin/<int:pk>/eliminar/', juego_delete, name='juego_delete'),
 
     # Vista pública de categorías
@@ -41,7 +52,7 @@ urlpatterns = [
 
     # Listado y detalle de juegos
     path('juegos/', games_list, name='games_list'),
-    path('juego/<int:code>/', game_detail, name='game_detail'),
+    path('juego/<int:code>/', read_views.game_detail, name='game_detail'),
 
     # Reseñas
     path('juego/<int:game_code>/review/<int:serie>/editar/', review_edit, name='review_edit'),
@@ -53,6 +64,13 @@ urlpatterns = [
     path('rankings/categoria/<int:category_code>/crear/', ranking_crear, name='ranking_crear'),
     path('rankings/categoria/<int:category_code>/eliminar/', ranking_delete, name='ranking_delete'),
 
+    # API JSON de solo lectura
+    path('api/juegos/', api_juegos, name='api_juegos'),
+    path('api/juegos/<int:code>/', api_juego, name='api_juego'),
+    path('api/juegos/<int:code>/reviews/', api_reviews, name='api_reviews'),
+    path('api/categorias/', api_categorias, name='api_categorias'),
+    path('api/rankings/<int:category_code>/', api_ranking, name='api_ranking'),
+
     # Usuarios
     path('usuarios/', user_list, name='user_list'),
     path('usuarios/<int:user_id>/eliminar/', user_delete, name='user_delete'),
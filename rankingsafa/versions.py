@@ -0,0 +1,43 @@
+"""
+Sellos de versión compartidos entre procesos, guardados en la colección
+'versions' de Mongo. Cada escritura incrementa el sello de lo que modifica
+y las cachés usan el sello como parte de la clave, así una escritura en un
+worker invalida las entradas de todos los demás.
+"""
+from pymongo import ReturnDocument
+
+from .mongo import get_async_collection, get_collection
+
+VERSIONS_COLLECTION = 'versions'
+
+
+def get_version(key, collection=None):
+    collection = collection or get_collection(VERSIONS_COLLECTION)
+    doc = collection.find_one({'_id': key}, {'value': 1})
+    return doc['value'] if doc else 0
+
+
+def get_versions(keys, collection=None):
+    """Sellos de varias claves en una sola consulta, en el orden de ``keys``."""
+    collection = collection or get_collection(VERSIONS_COLLECTION)
+    found = {doc['_id']: doc['value'] for doc in collection.find({'_id': {'$in': list(keys)}}, {'value': 1})}
+    return tuple(found.get(key, 0) for key in keys)
+
+
+async def aget_versions(keys):
+    """get_versions con el driver async (vistas async)."""
+    cursor = get_async_collection(VERSIONS_COLLECTION).find({'_id': {'$in': list(keys)}}, {'value': 1})
+    found = {doc['_id']: doc['value'] for doc in await cursor.to_list()}
+    return tuple(found.get(key, 0) for key in keys)
+
+
+def bump_version(key, collection=None):
+    """Incrementa el sello de ``key`` y devuelve el nuevo valor."""
+    collection = collection or get_collection(VERSIONS_COLLECTION)
+    doc = collection.find_one_and_update(
+        {'_id': key},
+        {'$inc': {'value': 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc['value']
@@ -1,25 +1,43 @@
 from django.db.models import Count
+from django.conf import settings
+from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from django.template.loader import render_to_string
 from django.contrib.auth.decorators import login_required
 from rankingsafa.forms import RegisterForm, LoginForm, UploadJSONForm, CategoriaForm, VideojuegoForm, ReviewForm
 from django.contrib.auth import login as auth_login, authenticate, logout as auth_logout, get_user_model
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from .models import Videojuego, Categoria, Review, Ranking
+from .models import Videojuego, Categoria, Review, Ranking, ImportJob
+from .jobs import submit_import
+from .export import SECTION_ORDER as EXPORT_SECTIONS, export_chunks
+from .categories import VERSION_KEY as CATEGORIES_VERSION_KEY, category_registry, invalidate_categories
+from .catalog import VERSION_KEY as CATALOG_VERSION_KEY, cached_faceted_search, game_from_doc, game_query, invalidate_catalog, short_description, LIST_FIELDS
+from .api import CATEGORIES, GAMES, REVIEWS, detail_response, error_response, list_response
+from .mongo import get_collection
+from .pagecache import versioned_page
+from .pagination import build_page, page_cursors, page_query, paginate
+from .search import IndexNotReady, search_service
+from .autocomplete import KINDS, MAX_RESULTS, autocomplete_service
+from .review_stats import apply_review_change, delete_review, review_version_key, update_review
+from .sequences import category_sequence, create_with_serie, game_sequence, ranking_sequence
+from .scores import (
+    apply_ranking_change, category_matrix, delete_rankings, rank_games, ranking_version_key, update_ranking,
+    window_lists, window_scores, SCORE_MODES, WINDOWS,
+)
+from .cache import LRUCache, cache_stats
+from .versions import get_version, bump_version
 from django.db.models import Count, Avg
 from functools import wraps
+from operator import itemgetter
 import json
 
 
-# Helpers para categorías: nombre y color determinista por código
-def _build_categoria_maps():
-    categorias = Categoria.objects.all()
-    name_map = {c.code: c.name for c in categorias}
-    palette = ['is-primary', 'is-link', 'is-info', 'is-success', 'is-warning', 'is-danger', 'is-dark']
-    color_map = {c.code: palette[c.code % len(palette)] for c in categorias}
-    return name_map, color_map
-
-
 # Create your views here.
 def admin_required(view_func):
     @wraps(view_func)
@@ -30,33 +48,72 @@ def admin_required(view_func):
     return wrapper
 
 def mostrar_inicio(request):
-    # Obtener juegos como lista
-    videojuegos = list(Videojuego.objects.all())
-
-    # Calcular estadísticas de reviews por código de juego en una sola consulta
-    stats = Review.objects.values('code').annotate(
-        reviews_count=Count('rating'),
-        avg_rating=Avg('rating')
-    )
-    stats_map = {s['code']: s for s in stats}
-
-    name_map, color_map = _build_categoria_maps()
-    for v in videojuegos:
-        cats = getattr(v, 'category', []) or []
-        v.cat_tags = [
-            {
-                'name': name_map.get(code, f'Cat. {code}'),
-                'color': color_map.get(code, 'is-dark')
-            }
-            for code in cats
-        ]
-
-        # Adjuntar estadísticas (por si no hay reviews, poner 0)
-        stat = stats_map.get(v.code, {})
-        v.reviews_count = stat.get('reviews_count', 0)
-        v.avg_rating = round(stat.get('avg_rating') or 0, 1)
-
-    return render(request, 'inicio.html', {'videojuegos': videojuegos})
+    # Primera página de juegos por código; el resto llega con scroll infinito
+    # (inicio_juegos) o con los enlaces de página si no hay JavaScript
+    after, before = page_cursors(request)
+    page = paginate(Videojuego.objects.only(*LIST_FIELDS['inicio']), ['code'], after, before,
+                    getattr(settings, 'HOME_PAGE_SIZE', 24))
+
+    # Las estadísticas de reseñas vienen ya guardadas en cada juego
+    # (reviews_count, avg_rating), no hace falta recorrer 'reviews'
+    videojuegos = category_registry.attach_tags(page['items'])
+
+    return render(request, 'inicio.html', {'videojuegos': videojuegos, 'page': page})
+
+
+def inicio_juegos(request):
+    """Siguiente bloque de tarjetas de la portada (JSON para el scroll infinito)."""
+    after, _ = page_cursors(request)
+    page = paginate(Videojuego.objects.only(*LIST_FIELDS['inicio']), ['code'], after, None,
+                    getattr(settings, 'HOME_PAGE_SIZE', 24))
+    html = render_to_string('inicio_game_cards.html', {
+        'videojuegos': category_registry.attach_tags(page['items']),
+    }, request=request)
+    return JsonResponse({'html': html, 'next': page['next']})
+
+
+def buscar(request):
+    """Búsqueda del catálogo por relevancia (JSON con las tarjetas de la portada)."""
+    query = request.GET.get('q', '').strip()
+    try:
+        codes, total = search_service.search(query, getattr(settings, 'SEARCH_RESULTS', 24))
+    except IndexNotReady:
+        # El proceso acaba de arrancar: respuesta vacía, el cliente puede reintentar
+        response = JsonResponse({'html': '', 'count': 0, 'total': 0, 'pending': True}, status=503)
+        response['Retry-After'] = '5'
+        return response
+    juegos = {v.code: v for v in Videojuego.objects.filter(code__in=codes).only(*LIST_FIELDS['inicio'])}
+    videojuegos = category_registry.attach_tags([juegos[c] for c in codes if c in juegos])
+    html = render_to_string('inicio_game_cards.html', {'videojuegos': videojuegos}, request=request)
+    return JsonResponse({'html': html, 'count': len(videojuegos), 'total': total})
+
+
+def autocompletar(request):
+    """
+    Sugerencias por prefijo: ?q=hol&tipo=juego&categoria=3&limite=20
+    (tipo, categoria y limite son opcionales).
+    """
+    kinds = [k for k in request.GET.getlist('tipo') if k in KINDS] or list(KINDS)
+    limit = getattr(settings, 'AUTOCOMPLETE_RESULTS', 8)
+    category = None
+    try:
+        if request.GET.get('limite'):
+            limit = max(1, min(int(request.GET['limite']), MAX_RESULTS))
+        if request.GET.get('categoria'):
+            category = int(request.GET['categoria'])
+    except ValueError:
+        pass
+    try:
+        results = autocomplete_service.suggest(request.GET.get('q', ''), limit, kinds, category)
+    except IndexNotReady:
+        response = JsonResponse({kind: [] for kind in kinds}, status=503)
+        response['Retry-After'] = '5'
+        return response
+    for item in results.get('juego', []):
+        item['url'] = reverse('game_detail', args=[item['code']])
+    for item in results.get('plataforma', []):
+        item['url'] = f"{reverse('games_list')}?{urlencode({'platform': item['label']})}"
+    return JsonResponse(results)
 
 
 def register(request):
@@ -92,7 +149,7 @@ def logout_view(request):
 
 @admin_required
 def admin_dashboard(request):
-    return render(request, 'admin_dashboard.html')
+    return render(request, 'admin_dashboard.html', {'caches': cache_stats()})
 
 
 @admin_required
@@ -100,76 +157,47 @@ def upload_json(request):
     if request.method == 'POST':
         form = UploadJSONForm(request.POST, request.FILES)
         if form.is_valid():
-            json_file = request.FILES['json_file']
-            data = json.load(json_file)
-
-            # Procesar categorías
-            if 'categorias' in data:
-                for cat_data in data['categorias']:
-                    try:
-                        code = int(cat_data['id'].split('_')[1])
-                    except (IndexError, ValueError):
-                        code = 0
-
-                    image_url = cat_data.get('imagen_url', '') or cat_data.get('image', '')
-
-                    existing = Categoria.objects.filter(code=code)
-                    if existing.exists():
-                        existing.update(
-                            name=cat_data['nombre'],
-                            desc=cat_data['descripcion'],
-                            image=image_url
-                        )
-                    else:
-                        Categoria.objects.create(
-                            code=code,
-                            name=cat_data['nombre'],
-                            desc=cat_data['descripcion'],
-                            image=image_url
-                        )
-
-            # Procesar videojuegos
-            if 'videojuegos' in data:
-                for game_data in data['videojuegos']:
-                    try:
-                        code = int(game_data['id'].split('_')[1])
-                    except (IndexError, ValueError):
-                        code = 0
-
-                    category_codes = []
-                    for cat_id in game_data.get('categorias', []):
-                        try:
-                            cat_code = int(cat_id.split('_')[1])
-                            category_codes.append(cat_code)
-                        except (IndexError, ValueError):
-                            pass
-
-                    existing_game = Videojuego.objects.filter(code=code)
-                    game_fields = {
-                        'name': game_data['nombre'],
-                        'desc': game_data['descripcion'],
-                        'category': category_codes,
-                        'image': game_data.get('imagen_url', ''),
-                        'developer': game_data.get('desarrollador', ''),
-                        'publisher': game_data.get('publisher', ''),
-                        'release_date': game_data.get('fecha_lanzamiento'),
-                        'platforms': game_data.get('plataformas', []),
-                        'price': game_data.get('precio_actual', 0.0),
-                        'age_rating': game_data.get('clasificacion_edad', ''),
-                        'duration': game_data.get('duracion_aproximada', 0),
-                        'multiplayer': game_data.get('multijugador', False),
-                    }
-                    if existing_game.exists():
-                        existing_game.update(**game_fields)
-                    else:
-                        Videojuego.objects.create(code=code, **game_fields)
-
-            return redirect('inicio')
+            # La importación se hace en segundo plano: aquí solo se guarda el
+            # fichero y se encola el trabajo, así la petición vuelve enseguida.
+            # El trabajo invalida la caché de categorías al terminar.
+            job = submit_import(request.FILES['json_file'], request.user.username)
+            messages.info(request, 'Importación encolada. Puedes seguir su progreso aquí.')
+            return redirect('import_job_detail', code=job.code)
     else:
         form = UploadJSONForm()
     return render(request, 'upload_json.html', {'form': form})
 
 
+@admin_required
+def import_job_list(request):
+    jobs = ImportJob.objects.order_by('-created')[:50]
+    return render(request, 'import_job_list.html', {'jobs': jobs})
+
+
+@admin_required
+def import_job_detail(request, code):
+    job = get_object_or_404(ImportJob, code=code)
+    return render(request, 'import_job_detail.html', {'job': job})
+
+
+@admin_required
+def export_ndjson(request):
+    """Volcado NDJSON con gzip: ?seccion=reviews&seccion=rankings&desde=2025-01-01 (opcionales)."""
+    sections = [s for s in request.GET.getlist('seccion') if s in EXPORT_SECTIONS] or list(EXPORT_SECTIONS)
+    since = None
+    if request.GET.get('desde'):
+        try:
+            since = parse_date(request.GET['desde'])
+        except ValueError:
+            pass
+        if since is None:
+            return HttpResponseBadRequest('Fecha no válida, se espera AAAA-MM-DD.')
+    response = StreamingHttpResponse(export_chunks(sections, since), content_type='application/gzip')
+    suffix = f'-desde-{since:%Y%m%d}' if since else ''
+    response['Content-Disposition'] = f'attachment; filename="export-{timezone.localdate():%Y%m%d}{suffix}.ndjson.gz"'
+    return response
+
+
 @admin_required
 def categoria_list(request):
     categorias = Categoria.objects.all()
@@ -184,15 +212,14 @@ def categoria_create(request):
         if form.is_valid():
             cleaned = form.cleaned_data
             try:
-                # Generar código automático: siguiente al máximo existente
-                last_code = Categoria.objects.order_by('-code').values_list('code', flat=True).first()
-                next_code = (last_code or 0) + 1
+                # Código automático reservado en la secuencia de categorías
                 Categoria.objects.create(
-                    code=next_code,
+                    code=category_sequence.next(),
                     name=cleaned['name'],
                     desc=cleaned['desc'],
                     image=cleaned.get('image', '')
                 )
+                invalidate_categories()
                 messages.success(request, 'Categoría creada correctamente.')
                 return redirect('categoria_list')
             except Exception as e:
@@ -219,8 +246,10 @@ def categoria_update(request, pk):
                 Categoria.objects.filter(pk=pk).update(
                     name=cleaned.get('name', categoria.name),
                     desc=cleaned.get('desc', categoria.desc),
-                    image=cleaned.get('image', categoria.image)
+                    image=cleaned.get('image', categoria.image),
+                    content_hash=None
                 )
+                invalidate_categories()
                 messages.success(request, 'Categoría actualizada correctamente.')
                 return redirect('categoria_list')
             except Exception as e:
@@ -238,6 +267,7 @@ def categoria_delete(request, pk):
     if request.method == 'POST':
         try:
             Categoria.objects.filter(pk=pk).delete()
+            invalidate_categories()
             messages.success(request, 'Categoría eliminada correctamente.')
         except Exception:
             messages.error(request, 'Ocurrió un error al eliminar la categoría.')
@@ -247,33 +277,41 @@ def categoria_delete(request, pk):
 
 @admin_required
 def juego_list(request):
-    juegos = Videojuego.objects.all().order_by('code')
+    after, before = page_cursors(request)
+    page = paginate(Videojuego.objects.only(*LIST_FIELDS['juego_list']), ['code'], after, before,
+                    getattr(settings, 'LIST_PAGE_SIZE', 50))
     categorias = Categoria.objects.all()
     form = VideojuegoForm()
     return render(request, 'juego_list.html', {
-        'juegos': juegos,
+        'juegos': page['items'],
+        'page': page,
         'categorias': categorias,
         'form': form
     })
 
 
+@admin_required
+def juego_desc(request, pk):
+    """Descripción completa para el formulario de edición (juego_list no la trae)."""
+    desc = Videojuego.objects.filter(pk=pk).values_list('desc', flat=True).first()
+    return JsonResponse({'desc': desc or ''})
+
+
 @admin_required
 def juego_create(request):
     if request.method == 'POST':
         form = VideojuegoForm(request.POST)
         if form.is_valid():
-            last_code = Videojuego.objects.order_by('-code').values_list('code', flat=True).first()
-            next_code = (last_code or 0) + 1
-
             category_codes = form.cleaned_data.get('category', [])
 
             platforms = form.cleaned_data.get('platforms', [])
 
             # Crear juego
-            Videojuego.objects.create(
-                code=next_code,
+            juego = Videojuego.objects.create(
+                code=game_sequence.next(),
                 name=form.cleaned_data['name'],
                 desc=form.cleaned_data['desc'],
+                short_desc=short_description(form.cleaned_data['desc']),
                 image=form.cleaned_data.get('image', ''),
                 developer=form.cleaned_data.get('developer', ''),
                 publisher=form.cleaned_data.get('publisher', ''),
@@ -285,6 +323,7 @@ def juego_create(request):
                 duration=form.cleaned_data.get('duration', 0),
                 multiplayer=form.cleaned_data.get('multiplayer', False)
             )
+            autocomplete_service.game_saved(juego, invalidate_catalog())
             messages.success(request, 'Juego creado correctamente.')
         else:
             messages.error(request, 'Revisa los errores del formulario.')
@@ -305,9 +344,11 @@ def juego_update(request, pk):
             # Las plataformas ya vienen como lista desde clean_platforms()
             platforms = form.cleaned_data.get('platforms', [])
 
+            # content_hash=None: la próxima importación reescribirá el juego
             Videojuego.objects.filter(pk=pk).update(
                 name=form.cleaned_data['name'],
                 desc=form.cleaned_data['desc'],
+                short_desc=short_description(form.cleaned_data['desc']),
                 image=form.cleaned_data.get('image', ''),
                 developer=form.cleaned_data.get('developer', ''),
                 publisher=form.cleaned_data.get('publisher', ''),
@@ -317,8 +358,11 @@ def juego_update(request, pk):
                 price=form.cleaned_data.get('price', 0),
                 age_rating=form.cleaned_data.get('age_rating', ''),
                 duration=form.cleaned_data.get('duration', 0),
-                multiplayer=form.cleaned_data.get('multiplayer', False)
+                multiplayer=form.cleaned_data.get('multiplayer', False),
+                content_hash=None
             )
+            # El formulario ya ha copiado los datos nuevos en ``juego``
+            autocomplete_service.game_saved(juego, invalidate_catalog())
             messages.success(request, 'Juego actualizado correctamente.')
         else:
             messages.error(request, 'Revisa los errores del formulario.')
@@ -333,94 +377,81 @@ def juego_delete(request, pk):
     if request.method == 'POST':
         # Usar filter().delete() por MongoDB managed=False
         Videojuego.objects.filter(pk=pk).delete()
+        autocomplete_service.game_deleted(juego.code, invalidate_catalog())
         messages.success(request, 'Juego eliminado correctamente.')
 
     return redirect('juego_list')
 
 
+@versioned_page(CATEGORIES_VERSION_KEY)
 def categoria_public_list(request):
-    categorias = Categoria.objects.all()
+    categorias = category_registry.all()
     return render(request, 'categoria_cards.html', {'categorias': categorias})
 
 
 # Listado de juegos por categoría (vista pública)
+@versioned_page(CATEGORIES_VERSION_KEY, CATALOG_VERSION_KEY)
 def categoria_games(request, code):
     categoria = get_object_or_404(Categoria, code=code)
     # Videojuego.category es un ArrayField de códigos de categoría.
     # En MongoDB, (campo = valor) actúa como búsqueda de pertenencia en arrays.
-    videojuegos = Videojuego.objects.filter(category=code)
-    name_map, color_map = _build_categoria_maps()
-    for v in videojuegos:
-        cats = getattr(v, 'category', []) or []
-        v.cat_tags = [
-            {
-                'name': name_map.get(c, f'Cat. {c}'),
-                'color': color_map.get(c, 'is-dark')
-            }
-            for c in cats
-        ]
+    after, before = page_cursors(request)
+    videojuegos = Videojuego.objects.filter(category=code).only(*LIST_FIELDS['categoria_games'])
+    page = paginate(videojuegos, ['code'], after, before,
+                    getattr(settings, 'CATALOG_PAGE_SIZE', 48))
+    videojuegos = category_registry.attach_tags(page['items'])
     context = {
         'categoria': categoria,
         'videojuegos': videojuegos,
+        'page': page,
     }
     return render(request, 'categoria_games.html', context)
 
 
 def games_list(request):
-    videojuegos = Videojuego.objects.all()
-
-    selected_categories = request.GET.getlist('category')
+    selected_categories = [int(c) for c in request.GET.getlist('category') if c.isdigit()]
     selected_platforms = request.GET.getlist('platform')
 
-    if selected_categories:
-        selected_categories = [int(c) for c in selected_categories if c.isdigit()]
-        videojuegos = [v for v in videojuegos if any(cat in (v.category or []) for cat in selected_categories)]
+    # Página por clave sobre el código del juego
+    after, before = page_cursors(request)
+    after = after[0] if after and isinstance(after[0], int) else None
+    before = before[0] if before and isinstance(before[0], int) else None
 
-    if selected_platforms:
-        videojuegos = [v for v in videojuegos if any(plat in (v.platforms or []) for plat in selected_platforms)]
-
-    categorias = Categoria.objects.all()
+    # La página se lee por clave con el filtro; los recuentos de la barra
+    # lateral se cachean por filtro mientras no cambie el catálogo
+    result = cached_faceted_search(
+        selected_categories, selected_platforms, getattr(settings, 'CATALOG_PAGE_SIZE', 48), after, before
+    )
+    videojuegos = category_registry.attach_tags([game_from_doc(doc) for doc in result['games']])
+    page = build_page(videojuegos, result['has_more'], after, before, lambda v: [v.code])
 
-    all_platforms = set()
-    for v in Videojuego.objects.all():
-        if v.platforms:
-            all_platforms.update(v.platforms)
-    all_platforms = sorted(all_platforms)
-
-    name_map, color_map = _build_categoria_maps()
-    for v in videojuegos:
-        cats = getattr(v, 'category', []) or []
-        v.cat_tags = [
-            {
-                'name': name_map.get(c, f'Cat. {c}'),
-                'color': color_map.get(c, 'is-dark')
-            }
-            for c in cats
-        ]
+    categorias = [
+        {'code': c.code, 'name': c.name, 'count': result['categories'].get(c.code, 0)}
+        for c in category_registry.all()
+    ]
+    platform_counts = dict(result['platforms'])
+    for platform in selected_platforms:
+        platform_counts.setdefault(platform, 0)
+    plataformas = [{'name': p, 'count': n} for p, n in sorted(platform_counts.items())]
 
     context = {
         'videojuegos': videojuegos,
+        'total': result['total'],
+        'page': page,
+        'page_query': page_query(request),
         'categorias': categorias,
-        'all_platforms': all_platforms,
-        'selected_categories': [int(c) for c in request.GET.getlist('category') if c.isdigit()],
-        'selected_platforms': request.GET.getlist('platform'),
+        'plataformas': plataformas,
+        'selected_categories': selected_categories,
+        'selected_platforms': selected_platforms,
     }
     return render(request, 'games_list.html', context)
 
 
+@versioned_page(CATEGORIES_VERSION_KEY, CATALOG_VERSION_KEY, lambda code: review_version_key(code))
 def game_detail(request, code):
     juego = get_object_or_404(Videojuego, code=code)
-    reviews = Review.objects.filter(code=code).order_by('-reviewDate')
-
-    name_map, color_map = _build_categoria_maps()
-    cats = getattr(juego, 'category', []) or []
-    juego.cat_tags = [
-        {
-            'name': name_map.get(c, f'Cat. {c}'),
-            'color': color_map.get(c, 'is-dark')
-        }
-        for c in cats
-    ]
+
+    juego.cat_tags = category_registry.tags_for(juego.category)
 
     if request.method == 'POST':
         if not request.user.is_authenticated:
@@ -432,26 +463,31 @@ def game_detail(request, code):
             if Review.objects.filter(code=code, user=request.user.username).exists():
                 messages.error(request, 'Solo una review por usuario.')
             else:
-                # Generar serie automática para la review del juego
-                last_review = Review.objects.filter(code=code).order_by('-serie').first()
-                next_serie = (last_review.serie + 1) if last_review else 1
-
                 # Crear review. Como es managed=False y Mongo, usamos .create() o .save()
-                Review.objects.create(
+                # La serie sale de la secuencia del juego (bloques en memoria)
+                create_with_serie(code, lambda serie: Review.objects.create(
                     code=code,
-                    serie=next_serie,
+                    serie=serie,
                     user=request.user.username,
                     rating=form.cleaned_data['rating'],
                     comentary=form.cleaned_data['comentary']
-                )
+                ))
+                apply_review_change(code, new_rating=form.cleaned_data['rating'])
+                bump_version(review_version_key(code))
                 messages.success(request, 'Review añadida correctamente.')
                 return redirect('game_detail', code=code)
     else:
         form = ReviewForm()
 
+    # Reseñas más recientes primero, por clave (reviewDate, serie)
+    after, before = page_cursors(request)
+    page = paginate(Review.objects.filter(code=code), ['-reviewDate', '-serie'], after, before,
+                    getattr(settings, 'REVIEWS_PAGE_SIZE', 20))
+
     return render(request, 'game_detail.html', {
         'juego': juego,
-        'reviews': reviews,
+        'reviews': page['items'],
+        'page': page,
         'form': form
     })
 
@@ -469,10 +505,14 @@ def review_edit(request, game_code, serie):
         if form.is_valid():
             cleaned = form.cleaned_data
             try:
-                Review.objects.filter(code=game_code, serie=serie).update(
-                    rating=cleaned.get('rating', review.rating),
-                    comentary=cleaned.get('comentary', review.comentary)
-                )
+                # La nota anterior sale del documento que se modifica, no de
+                # la leída al empezar (otra edición puede haberla cambiado)
+                updated = update_review(game_code, serie, {
+                    'rating': cleaned.get('rating', review.rating),
+                    'comentary': cleaned.get('comentary', review.comentary),
+                })
+                if updated is not None:
+                    bump_version(review_version_key(game_code))
                 messages.success(request, 'Reseña actualizada correctamente.')
                 return redirect('game_detail', code=game_code)
             except Exception:
@@ -484,56 +524,87 @@ def review_edit(request, game_code, serie):
 
 
 # ========== RANKINGS ==========
+@versioned_page(CATEGORIES_VERSION_KEY)
 def rankings_home(request):
     """Vista principal de rankings - muestra todas las categorías"""
-    categorias = Categoria.objects.all()
+    categorias = category_registry.all()
     return render(request, 'rankings_home.html', {'categorias': categorias})
 
 
+# Resultados del ranking global por (categoría, versión, modo, método)
+_ranking_cache = LRUCache('ranking_global', getattr(settings, 'RANKING_CACHE_SIZE', 256))
+
+
+def _ranking_params(request):
+    """(modo, ventana, metodo) del ranking global, con los valores por defecto si no son válidos."""
+    # Se leen las puntuaciones materializadas en 'ranking_scores'. Solo el
+    # staff puede recalcular desde 'rankings' (?modo=agregacion|python) para
+    # comparar: cada modo es una entrada más en _ranking_cache y un recorrido
+    # completo de la colección
+    modo = 'tabla'
+    if request.user.is_staff:
+        modo = request.GET.get('modo', getattr(settings, 'RANKING_SCORES_MODE', 'tabla'))
+        if modo not in SCORE_MODES:
+            modo = 'tabla'
+    # Ventanas temporales: salen de cubetas precalculadas, no de 'rankings'
+    ventana = request.GET.get('ventana', 'all')
+    if ventana not in WINDOWS:
+        ventana = 'all'
+    # Métodos de consenso por pares: reordenan la tabla con el motor NumPy
+    # (necesitan las listas completas, solo para todo el histórico). Como los
+    # modos, solo para el staff: cada cálculo recorre 'rankings' de la
+    # categoría y compara todos los pares de juegos
+    metodo = 'borda'
+    if request.user.is_staff and ventana == 'all' and request.GET.get('metodo') in ('copeland', 'schulze'):
+        metodo = request.GET['metodo']
+    return modo, ventana, metodo
+
+
+def _global_ranking(category_code, modo, ventana, metodo):
+    """(puntuaciones, orden de consenso o None, número de tier lists de la ventana) de una categoría."""
+    # Las puntuaciones solo cambian al guardar o borrar una tier list de la
+    # categoría, que incrementa su sello de versión. Las ventanas dependen
+    # además del día.
+    today = timezone.localdate()
+    key = (category_code, get_version(ranking_version_key(category_code)), modo, metodo, ventana, today)
+    cached = _ranking_cache.get(key)
+    if cached is None:
+        if ventana == 'all':
+            scores = SCORE_MODES[modo](category_code)
+        else:
+            scores = window_scores(category_code, ventana, today)
+        order = category_matrix(category_code).order(metodo) if metodo != 'borda' and scores else None
+        # Tier lists de la ventana; la tendencia pondera todas
+        if ventana in ('30d', 'year'):
+            total = window_lists(category_code, ventana, today)
+        else:
+            total = Ranking.objects.filter(category=category_code).count()
+        cached = (scores, order, total)
+        _ranking_cache.set(key, cached)
+    return cached
+
+
+# Las ventanas por periodo dependen del día
+@versioned_page(CATEGORIES_VERSION_KEY, CATALOG_VERSION_KEY, lambda category_code: ranking_version_key(category_code),
+                vary=lambda request: timezone.localdate())
 def ranking_categoria_global(request, category_code):
     categoria = get_object_or_404(Categoria, code=category_code)
 
     videojuegos = Videojuego.objects.filter(category=category_code)
+    modo, ventana, metodo = _ranking_params(request)
+    scores, order, total_rankings = _global_ranking(category_code, modo, ventana, metodo)
 
-    rankings = Ranking.objects.filter(category=category_code)
-
-    game_scores = {}
-    game_positions = {}
-
-    for ranking in rankings:
-        ranking_list = ranking.rankingList or []
-        total_games = len(ranking_list)
-
-        for idx, game_code in enumerate(ranking_list):
-            points = total_games - idx
-
-            if game_code not in game_scores:
-                game_scores[game_code] = []
-                game_positions[game_code] = []
-
-            game_scores[game_code].append(points)
-            game_positions[game_code].append(idx + 1)
-
-    game_rankings = []
-    for juego in videojuegos:
-        if juego.code in game_scores:
-            scores = game_scores[juego.code]
-            avg_score = sum(scores) / len(scores)
-            avg_position = sum(game_positions[juego.code]) / len(game_positions[juego.code])
-
-            game_rankings.append({
-                'juego': juego,
-                'score': round(avg_score, 2),
-                'avg_position': round(avg_position, 1),
-                'votes': len(scores)
-            })
-
-    game_rankings.sort(key=lambda x: x['score'], reverse=True)
+    game_rankings = rank_games(videojuegos, scores)
+    if order:
+        position = {code: i for i, code in enumerate(order)}
+        game_rankings.sort(key=lambda x: position.get(x['juego'].code, len(position)))
 
     context = {
         'categoria': categoria,
         'game_rankings': game_rankings,
-        'total_rankings': rankings.count()
+        'total_rankings': total_rankings,
+        'metodo': metodo,
+        'ventana': ventana,
     }
     return render(request, 'ranking_global.html', context)
 
@@ -556,24 +627,25 @@ def ranking_crear(request, category_code):
 
         if ranking_data:
             try:
-                ranking_list = json.loads(ranking_data)
+                ranking_list = [int(game_code) for game_code in json.loads(ranking_data)]
 
+                # Se diffea contra la lista que había justo antes de escribir,
+                # no contra la leída al principio de la petición
+                before = None
                 if existing_ranking:
-                    Ranking.objects.filter(
-                        user=request.user.username,
-                        category=category_code
-                    ).update(rankingList=ranking_list)
+                    before = update_ranking(category_code, request.user.username, ranking_list)
+                if before is not None:
+                    bump_version(ranking_version_key(category_code))
                     messages.success(request, 'Ranking actualizado correctamente.')
                 else:
-                    last_code = Ranking.objects.order_by('-code').values_list('code', flat=True).first()
-                    next_code = (last_code or 0) + 1
-
                     Ranking.objects.create(
-                        code=next_code,
+                        code=ranking_sequence.next(),
                         user=request.user.username,
                         category=category_code,
                         rankingList=ranking_list
                     )
+                    apply_ranking_change(category_code, [], ranking_list)
+                    bump_version(ranking_version_key(category_code))
                     messages.success(request, 'Ranking creado correctamente.')
 
                 return redirect('ranking_categoria_global', category_code=category_code)
@@ -605,10 +677,8 @@ def ranking_crear(request, category_code):
 def ranking_delete(request, category_code):
     if request.method == 'POST':
         try:
-            Ranking.objects.filter(
-                user=request.user.username,
-                category=category_code
-            ).delete()
+            if delete_rankings(category_code, request.user.username):
+                bump_version(ranking_version_key(category_code))
             messages.success(request, 'Tier list eliminado correctamente.')
         except Exception:
             messages.error(request, 'Error al eliminar el tier list.')
@@ -625,9 +695,10 @@ def review_delete(request, game_code, serie):
         return redirect('game_detail', code=game_code)
 
     if request.method == 'POST':
-        # Como Review es managed=False y no tiene PK explícita (id),
-        # borramos filtrando directamente para evitar errores de atributo id=None
-        Review.objects.filter(code=game_code, serie=serie).delete()
+        # Se descuenta la nota del documento borrado: si otra petición lo
+        # borró o editó antes, no se resta dos veces ni una nota antigua
+        if delete_review(game_code, serie) is not None:
+            bump_version(review_version_key(game_code))
         messages.success(request, 'Reseña eliminada correctamente.')
         return redirect('game_detail', code=game_code)
 
@@ -711,4 +782,59 @@ def user_toggle_role(request, user_id):
         except Exception as e:
             messages.error(request, f'Error al cambiar el rol: {str(e)}')
 
-    return redirect('user_list')
\ No newline at end of file
+    return redirect('user_list')
+
+
+# ========== API JSON (solo lectura, ver rankingsafa.api) ==========
+@require_GET
+def api_juegos(request):
+    """Juegos por código: ?categoria=3&plataforma=PC (repetibles), ?campos=, ?after=, ?limite=."""
+    categories = [int(c) for c in request.GET.getlist('categoria') if c.isdigit()]
+    return list_response(request, GAMES, game_query(categories, request.GET.getlist('plataforma')))
+
+
+@require_GET
+def api_juego(request, code):
+    return detail_response(request, GAMES, {'code': code})
+
+
+@require_GET
+def api_reviews(request, code):
+    """Reseñas de un juego, de la más reciente a la más antigua."""
+    if get_collection(Videojuego).find_one({'code': code}, {'_id': 1}) is None:
+        return error_response('No encontrado.', status=404)
+    return list_response(request, REVIEWS, {'code': code})
+
+
+@require_GET
+def api_categorias(request):
+    return list_response(request, CATEGORIES, {})
+
+
+@require_GET
+def api_ranking(request, category_code):
+    """Ranking global de una categoría con la misma ?ventana= (y ?metodo=, ?modo= para el staff) que la página."""
+    name_map, _ = category_registry.maps()
+    if category_code not in name_map:
+        return error_response('No encontrado.', status=404)
+    modo, ventana, metodo = _ranking_params(request)
+    scores, order, total_rankings = _global_ranking(category_code, modo, ventana, metodo)
+
+    juegos = get_collection(Videojuego).find(
+        {'category': category_code, 'code': {'$in': list(scores)}}, {'_id': 0, 'code': 1, 'name': 1},
+    )
+    game_rankings = rank_games(juegos, scores, code=itemgetter('code'))
+    if order:
+        position = {code: i for i, code in enumerate(order)}
+        game_rankings.sort(key=lambda x: position.get(x['juego']['code'], len(position)))
+
+    return JsonResponse({
+        'categoria': {'code': category_code, 'name': name_map[category_code]},
+        'ventana': ventana,
+        'metodo': metodo,
+        'total_rankings': total_rankings,
+        'items': [
+            {**row['juego'], 'score': row['score'], 'avg_position': row['avg_position'], 'votes': row['votes']}
+            for row in game_rankings
+        ],
+    })